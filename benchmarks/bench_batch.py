@@ -0,0 +1,47 @@
+"""
+Throughput benchmark: per-verb conjugate() against verbs.conjugate_all()
+
+Conjugates every verb of the lexicon plus N synthetic weak verbs both ways, checks that
+the tables are identical and prints the verbs/s of each.
+
+Usage:
+	python benchmarks/bench_batch.py [N]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import conjutils
+import verbs as v
+
+
+def make_verbs(words : list, irregular_verbs : list) -> list:
+	context = conjutils.get_context(irregular_verbs)
+	return [conjutils.determine_verb_class(word, conjutils.find_verb_matches(word, irregular_verbs), context) for word in words]
+
+def main(count : int = 10000):
+	irregular_verbs = conjutils.get_irregular_verbs()
+	conjutils.get_context(irregular_verbs)
+	words = [verb[conjutils.IrregularIdx.INFINITIVE] for verb in irregular_verbs[1:]] + \
+			["lern" + str(i) + "en" for i in range(count)]
+
+	single = make_verbs(words, irregular_verbs)
+	start = time.perf_counter()
+	for verb in single:
+		verb.conjugate()
+	single_time = time.perf_counter() - start
+
+	batch = make_verbs(words, irregular_verbs)
+	start = time.perf_counter()
+	v.conjugate_all(batch)
+	batch_time = time.perf_counter() - start
+
+	assert all(a.get_table().expand() == b.get_table().expand() for (a, b) in zip(single, batch))
+	print(f"verbs: {len(words)}")
+	print(f"conjugate():     {len(words) / single_time:10.0f} verbs/s")
+	print(f"conjugate_all(): {len(words) / batch_time:10.0f} verbs/s ({single_time / batch_time:.1f}x)")
+
+if __name__ == "__main__":
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
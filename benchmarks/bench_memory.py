@@ -0,0 +1,112 @@
+"""
+Memory benchmark: conjugation table layout
+
+Compares the memory held by N conjugated verbs in the compact layout (slotted Verb
++ ConjugationTable of the valid cells only) against the previous layout (Verb with
+an instance __dict__ + a plain n_entries long list).
+
+Then compares N real verbs (the lexicon, weak verbs and compounds) fully conjugated in that
+expanded layout against their paradigms (stems and overrides plus a shared template, see
+paradigm), reported per 10k verbs.
+
+Usage:
+	python benchmarks/bench_memory.py [N]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import conjutils
+import paradigm
+import verbs as v
+
+
+class LegacyVerb:
+	"""Reproduction of the previous Verb storage: instance __dict__ and a full table."""
+
+	def __init__(self, infinitive : str):
+		self.infinitive = infinitive
+		self.stem = infinitive[:-2]
+		self.past_stem = self.stem
+		self.participle = "ge" + self.stem + "t"
+		self.imperative_stem = self.stem
+		self.subjunctive1_stem = self.stem
+		self.subjunctive2_stem = self.stem
+		self._prefix = ""
+		self._is_separable = False
+		self._use_haben = True
+		self._perfect_aux = None
+		self._conjugation_table = ["" for person in range(v.n_entries)]
+
+
+def synthetic_form(stem : str, index : int) -> str:
+	"""Return a made-up but deterministic form for table cell <index>."""
+	return stem + v.Verb._present_endings[index % 6]
+
+def measure(make_verb, count : int) -> int:
+	"""Return the bytes still allocated after building <count> verbs with filled tables."""
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	held = []
+	for i in range(count):
+		verb = make_verb("verb" + str(i) + "en")
+		table = verb.get_table() if isinstance(verb, v.Verb) else verb._conjugation_table
+		for index in range(v.n_entries):
+			(mood, tense, aspect, person, number) = v.table_unhash(index)
+			if not v.is_none_value(tense, mood, aspect, person, number):
+				table[index] = synthetic_form(verb.stem, index)
+		held.append(verb)
+	after = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return after - before
+
+def real_words(count : int) -> list:
+	"""Return <count> words: the lexicon, then compounds of it and synthetic weak verbs, alternately."""
+	irregular = [verb[conjutils.IrregularIdx.INFINITIVE] for verb in conjutils.get_irregular_verbs()[1:]]
+	prefixes = [prefix for (prefix, is_separable) in conjutils.get_prefixes().prefixes()]
+	words = list(irregular)
+	i = 0
+	while len(words) < count:
+		words.append(prefixes[i % len(prefixes)] + irregular[i % len(irregular)] if i % 2 else "lern" + str(i) + "en")
+		i += 1
+	return words[:count]
+
+def measure_held(build, words : list) -> int:
+	"""Return the bytes still allocated after build() of every word of <words>."""
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	held = [build(word) for word in words]
+	after = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del held
+	return after - before
+
+def main(count : int = 10000):
+	legacy = measure(LegacyVerb, count)
+	compact = measure(v.Weak, count)
+	print(f"verbs: {count}")
+	print(f"legacy layout:  {legacy / 1024:10.1f} KiB ({legacy / count:7.1f} B/verb)")
+	print(f"compact layout: {compact / 1024:10.1f} KiB ({compact / count:7.1f} B/verb)")
+	print(f"saved: {100 * (1 - compact / legacy):.1f}%")
+
+	context = conjutils.get_context()
+	words = real_words(count)
+	def expanded(word):
+		verb = context.classify(word)
+		verb.conjugate()
+		return verb
+	roots = {}
+	for word in words: # conjugate the shared roots and build the templates outside the measurements
+		expanded(word)
+		paradigm.Paradigm.from_verb(context.classify(word), roots)
+	expanded_size = measure_held(expanded, words)
+	paradigm_size = measure_held(lambda word: paradigm.Paradigm.from_verb(context.classify(word), roots), words)
+	scale = 10000 / count
+	print(f"expanded tables: {expanded_size * scale / 1024:10.1f} KiB per 10k verbs ({expanded_size / count:7.1f} B/verb)")
+	print(f"paradigms:       {paradigm_size * scale / 1024:10.1f} KiB per 10k verbs ({paradigm_size / count:7.1f} B/verb)")
+	print(f"saved: {100 * (1 - paradigm_size / expanded_size):.1f}%")
+
+if __name__ == "__main__":
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
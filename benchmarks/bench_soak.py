@@ -0,0 +1,241 @@
+"""
+Soak benchmark: sustained load with memory-growth and latency-drift checks
+
+Drives the conjugator at a target rate for a fixed duration with a synthetic mix of the
+corpora of corpora.py, either through the library (conjugator.conjugate() and its cache)
+or over HTTP through an in-process service.ConjugationService. Every interval it samples:
+	- p50/p99 latency of the requests of that interval (from their scheduled start, so that
+	  falling behind the target rate shows up as latency)
+	- RSS of the process
+	- with --top, the traced memory and the allocation sites that grew most since the baseline
+
+The first sample after the warm-up period is the baseline. The run fails (exit status 1) if
+RSS grew by more than --max-growth MiB since then, or if the median p99 of the last third
+of the samples exceeds --max-drift times that of the first third.
+
+Usage:
+	python benchmarks/bench_soak.py [--target library|server] [--duration S] [--rate N] [--interval S] [--warm-up S]
+		[--mix irregular=1,weak=1,prefixed=1] [--zipf S] [--cache-size N] [--top N]
+		[--max-growth MIB] [--max-drift RATIO] [--output FILE]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import conjcache
+import conjugator
+from bench_suite import percentile
+from corpora import get_corpora
+
+MIB = 1024 * 1024
+
+
+def rss_bytes() -> int:
+	"""Return the resident set size of this process (its peak where /proc is unavailable)."""
+	try:
+		with open("/proc/self/statm", "r") as file:
+			return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError, AttributeError):
+		import resource
+		peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		return peak if sys.platform == "darwin" else peak * 1024 # bytes on macOS, KiB elsewhere
+
+
+def parse_mix(text : str) -> dict:
+	"""Parse "corpus=weight,..." into {corpus : weight}."""
+	mix = {}
+	for item in text.split(","):
+		(name, _, weight) = item.partition("=")
+		mix[name.strip()] = float(weight) if weight else 1.0
+	return mix
+
+def word_source(mix : dict, size : int, zipf : float, seed : int):
+	"""
+	Return a function picking the next word: a corpus by the <mix> weights, then a word of it
+	with Zipf-distributed popularity of exponent <zipf> (0 for uniform).
+	"""
+	corpora = get_corpora(size, seed)
+	unknown = set(mix) - set(corpora)
+	if unknown:
+		raise ValueError(f"unknown corpora {sorted(unknown)}, expected any of {sorted(corpora)}")
+	rand = random.Random(seed)
+	names = list(mix)
+	weights = [mix[name] for name in names]
+	cumulative = {name : list(itertools.accumulate(1 / (rank + 1) ** zipf for rank in range(len(corpora[name]))))
+				  for name in names}
+	def pick() -> str:
+		name = rand.choices(names, weights)[0]
+		return rand.choices(corpora[name], cum_weights = cumulative[name])[0]
+	return pick
+
+
+class LibraryTarget:
+	"""Conjugates in this thread through conjugator.conjugate() and a cache of its own."""
+
+	def __init__(self, cache_size : int):
+		self.cache = conjcache.ConjugationCache(cache_size)
+		conjugator.warm_up()
+
+	def __call__(self, word : str):
+		conjugator.conjugate(word, cache = self.cache)
+
+	def close(self):
+		pass
+
+class ServerTarget:
+	"""Sends each word to a ConjugationService served on a local port by an event loop thread of this process."""
+
+	def __init__(self, cache_size : int):
+		import asyncio
+		import threading
+		import service
+		self._asyncio = asyncio
+		self.loop = asyncio.new_event_loop()
+		threading.Thread(target = self.loop.run_forever, name = "soak-server", daemon = True).start()
+		self.service = service.ConjugationService(cache = conjcache.ConjugationCache(cache_size))
+		self.server = asyncio.run_coroutine_threadsafe(self.service.serve("127.0.0.1", 0), self.loop).result()
+		self.port = self.server.sockets[0].getsockname()[1]
+
+	def __call__(self, word : str):
+		import http.client
+		import urllib.parse
+		connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout = 30)
+		try:
+			connection.request("GET", "/conjugate?" + urllib.parse.urlencode({"infinitive" : word}))
+			response = connection.getresponse()
+			response.read()
+			if response.status != 200:
+				raise RuntimeError(f"{word}: HTTP {response.status}")
+		finally:
+			connection.close()
+
+	def close(self):
+		self.server.close()
+		self._asyncio.run_coroutine_threadsafe(self.server.wait_closed(), self.loop).result()
+		self.loop.call_soon_threadsafe(self.loop.stop)
+		self.service.close()
+
+
+def take_sample(elapsed : float, latencies : list, window : float, baseline, top : int) -> dict:
+	"""Return the sample of one interval: <latencies> (seconds) of its requests, memory, and the top allocation growth."""
+	latencies = sorted(latencies)
+	sample = {"t" : elapsed,
+			  "ops" : len(latencies),
+			  "ops_per_sec" : len(latencies) / window if window else 0.0,
+			  "p50_ms" : percentile(latencies, 0.50) * 1e3 if latencies else 0.0,
+			  "p99_ms" : percentile(latencies, 0.99) * 1e3 if latencies else 0.0,
+			  "rss_mib" : rss_bytes() / MIB}
+	if tracemalloc.is_tracing():
+		sample["traced_mib"] = tracemalloc.get_traced_memory()[0] / MIB
+		if baseline is not None:
+			growth = tracemalloc.take_snapshot().compare_to(baseline, "lineno")[:top]
+			sample["top"] = [f"{stat.size_diff / 1024:+.1f} KiB {stat.traceback}" for stat in growth]
+	return sample
+
+def run(target, pick, duration : float, rate : float, interval : float, warm_up : float, top : int) -> list:
+	"""Drive <target> with words from pick() for <duration> seconds and return the samples taken every <interval>."""
+	if top:
+		tracemalloc.start()
+	samples = []
+	(baseline, latencies, paused) = (None, [], 0.0)
+	start = time.perf_counter()
+	(window_start, next_sample) = (start, start + interval)
+	try:
+		for i in itertools.count():
+			now = time.perf_counter()
+			if now - start >= duration:
+				break
+			scheduled = now
+			if rate:
+				scheduled = start + paused + i / rate # open loop: requests do not wait for slow ones
+				if scheduled > now:
+					time.sleep(scheduled - now)
+			target(pick())
+			end = time.perf_counter()
+			latencies.append(end - scheduled)
+
+			if end >= next_sample:
+				samples.append(take_sample(end - start, latencies, end - window_start, baseline, top))
+				if top and baseline is None and end - start >= warm_up:
+					baseline = tracemalloc.take_snapshot()
+				resumed = time.perf_counter()
+				paused += resumed - end # sampling is not load: shift the schedule past it
+				(latencies, window_start, next_sample) = ([], resumed, resumed + interval)
+	finally:
+		if top:
+			tracemalloc.stop()
+	return samples
+
+def check(samples : list, warm_up : float, max_growth : float, max_drift : float) -> list:
+	"""Return the thresholds the <samples> crossed after the <warm_up> period, as messages."""
+	steady = [sample for sample in samples if sample["t"] >= warm_up]
+	if len(steady) < 2:
+		return [f"only {len(steady)} samples after the warm-up: run longer or sample more often"]
+	failures = []
+	growth = steady[-1]["rss_mib"] - steady[0]["rss_mib"]
+	if growth > max_growth:
+		failures.append(f"RSS grew by {growth:.1f} MiB (limit {max_growth:.1f} MiB)")
+	third = max(1, len(steady) // 3)
+	(first, last) = (sorted(sample["p99_ms"] for sample in steady[:third]), sorted(sample["p99_ms"] for sample in steady[-third:]))
+	(first_p99, last_p99) = (first[len(first) // 2], last[len(last) // 2])
+	if first_p99 and last_p99 / first_p99 > max_drift:
+		failures.append(f"p99 latency drifted from {first_p99:.3f} to {last_p99:.3f} ms (limit x{max_drift:.2f})")
+	return failures
+
+def main(argv : list = None) -> int:
+	parser = argparse.ArgumentParser(description = "Soak the conjugator under sustained load.")
+	parser.add_argument("--target", choices = ("library", "server"), default = "library",
+						help = "call the library directly or go through an in-process HTTP service (default: library)")
+	parser.add_argument("--duration", type = float, default = 60.0, help = "seconds to run (default: 60)")
+	parser.add_argument("--rate", type = float, default = 500.0, help = "target requests per second, 0 for as fast as possible (default: 500)")
+	parser.add_argument("--interval", type = float, default = 5.0, help = "seconds between samples (default: 5)")
+	parser.add_argument("--warm-up", type = float, default = 10.0, help = "seconds before the baseline sample (default: 10)")
+	parser.add_argument("--mix", type = parse_mix, default = "irregular=1,weak=1,prefixed=1",
+						help = "corpus weights of the request mix (default: irregular=1,weak=1,prefixed=1)")
+	parser.add_argument("--size", type = int, default = 2000, help = "words in the weak and prefixed corpora (default: 2000)")
+	parser.add_argument("--zipf", type = float, default = 1.0, help = "Zipf exponent of word popularity, 0 for uniform (default: 1)")
+	parser.add_argument("--seed", type = int, default = 0, help = "seed of the request mix (default: 0)")
+	parser.add_argument("--cache-size", type = int, default = 1024, help = "conjugation cache entries, 0 disables it (default: 1024)")
+	parser.add_argument("--top", type = int, default = 5,
+						help = "allocation sites reported per sample with tracemalloc, 0 to leave it off (default: 5)")
+	parser.add_argument("--max-growth", type = float, default = 32.0, help = "RSS growth in MiB that fails the run (default: 32)")
+	parser.add_argument("--max-drift", type = float, default = 2.0, help = "p99 latency ratio that fails the run (default: 2)")
+	parser.add_argument("--output", help = "file to write the samples and verdict to as JSON")
+	args = parser.parse_args(argv)
+
+	pick = word_source(args.mix, args.size, args.zipf, args.seed)
+	target = (LibraryTarget if args.target == "library" else ServerTarget)(args.cache_size)
+	try:
+		samples = run(target, pick, args.duration, args.rate, args.interval, args.warm_up, args.top)
+	finally:
+		target.close()
+
+	print(f"{'t s':>7} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'RSS MiB':>9} {'traced MiB':>11}")
+	for sample in samples:
+		print(f"{sample['t']:7.1f} {sample['ops_per_sec']:9.0f} {sample['p50_ms']:9.3f} {sample['p99_ms']:9.3f} "
+			  f"{sample['rss_mib']:9.1f} {sample.get('traced_mib', 0.0):11.2f}")
+	if samples and samples[-1].get("top"):
+		print("largest allocation growth since the baseline:")
+		for line in samples[-1]["top"]:
+			print("  " + line)
+
+	failures = check(samples, args.warm_up, args.max_growth, args.max_drift)
+	for failure in failures:
+		print("FAIL: " + failure)
+	if not failures:
+		print("PASS")
+	if args.output:
+		with open(args.output, "w", encoding = "utf-8") as file:
+			json.dump({"arguments" : {name : value for (name, value) in vars(args).items() if name != "output"},
+					   "samples" : samples, "failures" : failures}, file, indent = 1)
+	return 1 if failures else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Startup benchmark: cold start to first conjugation
+
+Runs fresh interpreters that import the conjugator and conjugate one verb, and reports the
+median of, in milliseconds:
+	- import --> importing conjugator (as python -X importtime measures it)
+	- first --> the first conjugate() call (lexicon, prefixes, auxiliaries and the conjugation)
+	- total --> interpreter start to first conjugation
+with the auxiliaries read from data/auxiliaries.txt (frozen) and conjugated at startup (built).
+The modules costing most to import are listed with -v.
+
+Usage:
+	python benchmarks/bench_startup.py [--repeat N] [-v]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = """
+import time
+start = time.perf_counter()
+import conjugator
+import conjutils
+imported = time.perf_counter()
+conjutils.get_context(frozen = {frozen})
+conjugator.conjugate("gehen")
+print((imported - start) * 1e3, (time.perf_counter() - imported) * 1e3)
+"""
+
+
+def run_child(frozen : bool) -> tuple:
+	"""Return the (import ms, first conjugation ms, total ms, -X importtime lines) of one fresh interpreter."""
+	start = time.perf_counter()
+	process = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD.format(frozen = frozen)],
+							 cwd = ROOT, capture_output = True, text = True, check = True)
+	total = (time.perf_counter() - start) * 1e3
+	(imported, first) = (float(value) for value in process.stdout.split())
+	return (imported, first, total, process.stderr.splitlines())
+
+def slowest_imports(lines : list, count : int = 10) -> list:
+	"""Return the <count> (self us, module) entries of -X importtime output with the largest self time."""
+	entries = []
+	for line in lines:
+		fields = line.split("|")
+		if len(fields) == 3 and fields[0].split(":")[-1].strip().isdigit():
+			entries.append((int(fields[0].split(":")[-1]), fields[2].strip()))
+	return sorted(entries, reverse = True)[:count]
+
+def main(argv : list = None):
+	parser = argparse.ArgumentParser(description = "Measure cold start to first conjugation.")
+	parser.add_argument("--repeat", type = int, default = 10, help = "fresh interpreters per variant (default: 10)")
+	parser.add_argument("-v", "--verbose", action = "store_true", help = "list the modules costing most to import")
+	args = parser.parse_args(argv)
+
+	print(f"{'auxiliaries':12} {'import ms':>10} {'first ms':>10} {'total ms':>10}")
+	for frozen in (True, False):
+		runs = [run_child(frozen) for _ in range(args.repeat)]
+		(imported, first, total) = (statistics.median(run[i] for run in runs) for i in range(3))
+		print(f"{'frozen' if frozen else 'built':12} {imported:10.2f} {first:10.2f} {total:10.2f}")
+	if args.verbose:
+		print("\nslowest imports (self us):")
+		for (self_us, module) in slowest_imports(runs[-1][3]):
+			print(f"{self_us:8} {module}")
+
+
+if __name__ == "__main__":
+	main()
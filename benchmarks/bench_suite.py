@@ -0,0 +1,156 @@
+"""
+Benchmark suite
+
+Times the conjugator's hot paths on the fixed corpora of corpora.py and reports, per
+benchmark, operations per second, latency percentiles and peak traced memory:
+	- get_irregular_verbs (cold: parse verbs.txt, warm: memoized)
+	- find_verb_matches, get_prefix, determine_verb_class over all corpora
+	- Verb.conjugate (eager), verbs.conjugate_all (batch, ops/s counted in verbs) and get_conjugation_at lookups
+
+Results are written as JSON so that runs from different commits can be compared.
+
+Usage:
+	python benchmarks/bench_suite.py [--size N] [--output FILE] [--compare BASELINE] [--threshold PERCENT]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import conjutils
+import verbs as v
+from corpora import get_corpora
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def percentile(sorted_values : list, fraction : float) -> float:
+	"""Return the <fraction> percentile of <sorted_values> (nearest rank)."""
+	return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def measure(operation, items : list, repeat : int = 1, setup = None) -> dict:
+	"""
+	Time operation(item) for every item of <items>, <repeat> times, then once more under tracemalloc.
+
+	<setup>, if given, is called before every timed pass (e.g. to build fresh Verb objects) and
+	its result replaces <items>.
+	"""
+	latencies = []
+	for _ in range(repeat):
+		batch = setup() if setup is not None else items
+		for item in batch:
+			start = time.perf_counter_ns()
+			operation(item)
+			latencies.append(time.perf_counter_ns() - start)
+	latencies.sort()
+	total = sum(latencies) / 1e9
+
+	batch = setup() if setup is not None else items
+	tracemalloc.start()
+	for item in batch:
+		operation(item)
+	(_, peak) = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	return {"ops" : len(latencies),
+			"ops_per_sec" : len(latencies) / total if total else 0.0,
+			"p50_us" : percentile(latencies, 0.50) / 1e3,
+			"p90_us" : percentile(latencies, 0.90) / 1e3,
+			"p99_us" : percentile(latencies, 0.99) / 1e3,
+			"peak_kib" : peak / 1024}
+
+def run(size : int = 2000, repeat : int = 3) -> dict:
+	"""Run every benchmark and return the results by benchmark name."""
+	corpora = get_corpora(size)
+	words = [word for corpus in corpora.values() for word in corpus]
+	irregular_verbs = conjutils.get_irregular_verbs()
+	prefixes = conjutils.get_prefixes()
+	conjutils.get_context(irregular_verbs)
+
+	def load_cold(_):
+		conjutils.clear_lexicons()
+		conjutils.get_irregular_verbs()
+	results = {}
+	results["get_irregular_verbs.cold"] = measure(load_cold, range(20))
+	results["get_irregular_verbs.warm"] = measure(lambda _: conjutils.get_irregular_verbs(), range(1000))
+	irregular_verbs = conjutils.get_irregular_verbs()
+	context = conjutils.get_context(irregular_verbs)
+
+	for (name, corpus) in corpora.items():
+		results["find_verb_matches." + name] = measure(lambda word: conjutils.find_verb_matches(word, irregular_verbs), corpus, repeat)
+		results["get_prefix." + name] = measure(lambda word: conjutils.get_prefix(word, prefixes), corpus, repeat)
+		results["determine_verb_class." + name] = measure(
+			lambda word: conjutils.determine_verb_class(word, conjutils.find_verb_matches(word, irregular_verbs), context), corpus, repeat)
+
+	def make_verbs():
+		return [conjutils.determine_verb_class(word, conjutils.find_verb_matches(word, irregular_verbs), context) for word in words]
+	results["Verb.conjugate"] = measure(lambda verb: verb.conjugate(), None, repeat, setup = make_verbs)
+	results["conjugate_all"] = measure(lambda verbs: v.conjugate_all(verbs), None, repeat, setup = lambda: [make_verbs()])
+	results["conjugate_all"]["ops_per_sec"] *= len(words) # one op conjugates every word: report verbs/s
+
+	conjugated = make_verbs()
+	v.conjugate_all(conjugated)
+	cells = [v.table_unhash(index) for index in v.cell_indices()]
+	lookups = [(verb, cell) for verb in conjugated[:500] for cell in cells]
+	results["get_conjugation_at"] = measure(
+		lambda lookup: lookup[0].get_conjugation_at(lookup[1][1], lookup[1][0], *lookup[1][2:]), lookups, repeat)
+	return results
+
+def metadata() -> dict:
+	"""Return the environment the benchmarks ran in."""
+	try:
+		commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd = ROOT, capture_output = True, text = True).stdout.strip()
+	except OSError:
+		commit = ""
+	return {"commit" : commit,
+			"python" : platform.python_version(),
+			"platform" : platform.platform(),
+			"time" : time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+def compare(results : dict, baseline : dict, threshold : float) -> list:
+	"""Print the ops/sec change of every benchmark against <baseline> and return the names that regressed beyond <threshold> %."""
+	regressions = []
+	for (name, result) in results.items():
+		before = baseline.get(name)
+		if before is None or not before["ops_per_sec"]:
+			continue
+		change = 100 * (result["ops_per_sec"] / before["ops_per_sec"] - 1)
+		flag = ""
+		if change < -threshold:
+			regressions.append(name)
+			flag = "  <-- regression"
+		print(f"{name:40} {change:+8.1f}%{flag}")
+	return regressions
+
+def main(argv : list = None) -> int:
+	parser = argparse.ArgumentParser(description = "Benchmark the conjugator's hot paths.")
+	parser.add_argument("--size", type = int, default = 2000, help = "words in the weak and prefixed corpora (default: 2000)")
+	parser.add_argument("--repeat", type = int, default = 3, help = "timed passes per benchmark (default: 3)")
+	parser.add_argument("--output", help = "file to write the JSON results to")
+	parser.add_argument("--compare", help = "JSON results of an earlier run to compare against")
+	parser.add_argument("--threshold", type = float, default = 10.0, help = "ops/sec drop in %% reported as a regression (default: 10)")
+	args = parser.parse_args(argv)
+
+	results = run(args.size, args.repeat)
+	print(f"{'benchmark':40} {'ops/s':>12} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'peak KiB':>9}")
+	for (name, result) in results.items():
+		print(f"{name:40} {result['ops_per_sec']:12.0f} {result['p50_us']:9.2f} {result['p90_us']:9.2f} "
+			  f"{result['p99_us']:9.2f} {result['peak_kib']:9.1f}")
+
+	if args.output:
+		with open(args.output, "w", encoding = "utf-8") as file:
+			json.dump({"meta" : metadata(), "results" : results}, file, indent = 1)
+	if args.compare:
+		with open(args.compare, "r", encoding = "utf-8") as file:
+			baseline = json.load(file)["results"]
+		return 1 if compare(results, baseline, args.threshold) else 0
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Benchmark corpora
+
+Fixed, reproducible word lists shared by the benchmarks:
+	- weak --> real weak verbs plus synthetic ones built from them
+	- irregular --> every infinitive of verbs.txt
+	- prefixed --> compounds of the two with the prefixes of prefixes.txt (one or two stacked)
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import conjutils
+
+WEAK_VERBS = ("lernen", "machen", "spielen", "sagen", "fragen", "hören", "kaufen", "leben", "lieben", "lachen",
+			  "arbeiten", "brauchen", "glauben", "holen", "kochen", "legen", "malen", "reisen", "schicken", "stellen",
+			  "suchen", "tanzen", "wohnen", "zahlen", "zeigen", "wandern", "studieren", "putzen", "hoffen", "feiern")
+
+
+def get_corpora(size : int = 2000, seed : int = 0) -> dict:
+	"""
+	Return the benchmark corpora.
+
+	Parameters:
+		size (default 2000) : int --> number of words in the weak and prefixed corpora
+		seed (default 0) : int --> seed of the pseudo-random choices, fixed for reproducible runs
+	Return:
+		dict[str, list[str]] --> corpus name : words
+	"""
+	rand = random.Random(seed)
+	irregular = list(dict.fromkeys(verb[conjutils.IrregularIdx.INFINITIVE] for verb in conjutils.get_irregular_verbs()[1:]))
+	prefixes = [prefix for (prefix, is_separable) in conjutils.get_prefixes().prefixes()]
+
+	weak = list(WEAK_VERBS)
+	while len(weak) < size:
+		# synthetic weak verbs: a real stem with a made-up syllable, as unseen words would be
+		weak.append(rand.choice(("", "ver", "be")) + rand.choice(WEAK_VERBS)[:-2] + rand.choice(("el", "er", "ier", "ig")) + "n")
+
+	prefixed = []
+	roots = irregular + list(WEAK_VERBS)
+	while len(prefixed) < size:
+		stack = rand.choice(prefixes) + (rand.choice(prefixes) if rand.random() < 0.25 else "")
+		prefixed.append(stack + rand.choice(roots))
+
+	return {"weak" : weak[:size], "irregular" : irregular, "prefixed" : prefixed}
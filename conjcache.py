@@ -0,0 +1,199 @@
+"""
+Conjugation Cache
+
+Bounded cache of conjugated verbs, so that the few verbs making up most requests
+(sein, haben, machen, gehen...) are not reclassified and reconjugated every time.
+
+Entries are keyed by infinitive plus the requested cells and hold read-only snapshots,
+so callers cannot corrupt what other callers will be handed. Three eviction policies
+are available:
+	- "lru" --> evict the least recently used entry
+	- "lfu" --> evict the least frequently used entry (least recently used among ties)
+	- "fifo" --> evict the oldest entry
+"""
+
+import threading
+from collections import OrderedDict
+
+POLICIES = ("lru", "lfu", "fifo")
+
+
+class ConjugationCache:
+	"""
+	Bounded, thread-safe mapping of keys to conjugation snapshots with hit/miss/eviction counters.
+
+	Methods:
+		get(self, key) -> object
+			get the cached value of <key>, None if it is not cached
+		put(self, key, value)
+			cache <value> under <key>, evicting an entry if the cache is full
+		get_or_compute(self, key, compute) -> object
+			get the cached value of <key>, computing and caching it with compute() on a miss
+		invalidate(self, predicate) -> int
+			drop the entries whose key satisfies <predicate>
+		rekey(self, function) -> int
+			move every entry to the key function() maps its key to, or drop it
+		stats(self) -> dict
+			get the counters and current size
+		clear(self)
+			drop every entry and reset the counters
+	"""
+
+	def __init__(self, max_size : int = 1024, policy : str = "lru"):
+		"""
+		Construct an empty cache.
+
+		Parameters:
+			max_size (default 1024) : int --> maximum number of entries, 0 disables caching
+			policy (default "lru") : str --> eviction policy, any of POLICIES
+		"""
+		if policy not in POLICIES:
+			raise ValueError(f"unknown eviction policy {policy!r}, expected any of {POLICIES}")
+		if max_size < 0:
+			raise ValueError("max_size must not be negative")
+		self.max_size = max_size
+		self.policy = policy
+		self._lock = threading.Lock()
+		self.clear()
+
+	def clear(self):
+		"""Drop every entry and reset the counters."""
+		with self._lock:
+			self._entries = OrderedDict() # key : value, in eviction order for lru/fifo
+			self._frequencies = {} # key : use count (lfu)
+			self._by_frequency = {} # use count : OrderedDict of its keys, least recently used first (lfu)
+			self._min_frequency = 0
+			self.hits = 0
+			self.misses = 0
+			self.evictions = 0
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def __contains__(self, key) -> bool:
+		return key in self._entries
+
+	def _touch(self, key):
+		"""Record a use of cached <key>."""
+		if self.policy == "lru":
+			self._entries.move_to_end(key)
+		elif self.policy == "lfu":
+			frequency = self._frequencies[key]
+			keys = self._by_frequency[frequency]
+			del keys[key]
+			if not keys:
+				del self._by_frequency[frequency]
+				if self._min_frequency == frequency:
+					self._min_frequency = frequency + 1
+			self._frequencies[key] = frequency + 1
+			self._by_frequency.setdefault(frequency + 1, OrderedDict())[key] = None
+
+	def _evict(self):
+		"""Drop one entry according to the policy."""
+		if self.policy == "lfu":
+			keys = self._by_frequency[self._min_frequency]
+			(key, _) = keys.popitem(last = False)
+			if not keys:
+				del self._by_frequency[self._min_frequency]
+			del self._frequencies[key]
+			del self._entries[key]
+		else:
+			self._entries.popitem(last = False)
+		self.evictions += 1
+
+	def _remove(self, key):
+		"""Drop cached <key>."""
+		del self._entries[key]
+		if self.policy == "lfu":
+			frequency = self._frequencies.pop(key)
+			keys = self._by_frequency[frequency]
+			del keys[key]
+			if not keys:
+				del self._by_frequency[frequency]
+				if self._min_frequency == frequency:
+					self._min_frequency = min(self._by_frequency, default = 0)
+
+	def get(self, key):
+		"""Return the cached value of <key>, None if it is not cached."""
+		with self._lock:
+			value = self._entries.get(key)
+			if value is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+				self._touch(key)
+			return value
+
+	def put(self, key, value):
+		"""Cache <value> under <key>, evicting an entry first if the cache is full."""
+		if self.max_size == 0:
+			return
+		with self._lock:
+			if key in self._entries:
+				self._entries[key] = value
+				self._touch(key)
+				return
+			while len(self._entries) >= self.max_size:
+				self._evict()
+			self._entries[key] = value
+			if self.policy == "lfu":
+				self._frequencies[key] = 1
+				self._by_frequency.setdefault(1, OrderedDict())[key] = None
+				self._min_frequency = 1
+
+	def get_or_compute(self, key, compute):
+		"""Return the cached value of <key>; on a miss, cache and return compute()."""
+		value = self.get(key)
+		if value is None:
+			value = compute()
+			self.put(key, value)
+		return value
+
+	def invalidate(self, predicate) -> int:
+		"""Drop every entry whose key satisfies predicate(key) and return how many were dropped."""
+		with self._lock:
+			keys = [key for key in self._entries if predicate(key)]
+			for key in keys:
+				self._remove(key)
+			return len(keys)
+
+	def rekey(self, function) -> int:
+		"""
+		Replace the key of every entry by function(key), keeping its value and its place in the eviction order.
+
+		Entries mapped to None are dropped, as are those mapped to a key an earlier entry already moved to.
+
+		Return:
+			int --> number of entries dropped
+		"""
+		with self._lock:
+			(keys, targets) = ({}, set()) # key : new key
+			for key in self._entries:
+				new = function(key)
+				if new is not None and new not in targets:
+					keys[key] = new
+					targets.add(new)
+			dropped = len(self._entries) - len(keys)
+			self._entries = OrderedDict((keys[key], value) for (key, value) in self._entries.items() if key in keys)
+			if self.policy == "lfu":
+				self._frequencies = {keys[key] : frequency for (key, frequency) in self._frequencies.items() if key in keys}
+				by_frequency = {}
+				for (frequency, ordered) in self._by_frequency.items():
+					moved = OrderedDict((keys[key], None) for key in ordered if key in keys)
+					if moved:
+						by_frequency[frequency] = moved
+				self._by_frequency = by_frequency
+				self._min_frequency = min(by_frequency, default = 0)
+			return dropped
+
+	def stats(self) -> dict:
+		"""Return the hit/miss/eviction counters, hit rate and current size."""
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {"policy" : self.policy,
+					"max_size" : self.max_size,
+					"size" : len(self._entries),
+					"hits" : self.hits,
+					"misses" : self.misses,
+					"evictions" : self.evictions,
+					"hit_rate" : self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,190 @@
+"""
+Conjugation Database
+
+Precomputed conjugation tables of a whole lexicon, stored in one file that is
+memory-mapped when read. Lookups need no Verb objects and every process reading
+the same file shares one page-cached copy of it.
+
+File layout (little-endian):
+	header --> magic, version, number of verbs, n_entries, offsets of the sections below
+	names --> one (pool offset, length, row) entry per infinitive, sorted by infinitive for binary search
+	table --> n_entries (pool offset, length) cells per verb row, in table_hash() order
+	pool --> UTF-8 bytes of every distinct infinitive and form
+
+Usage:
+	python conjdb.py OUTPUT [--weak FILE]
+"""
+
+import argparse
+import mmap
+import struct
+
+import conjutils
+import verbs as v
+
+MAGIC = b"GVCONJDB"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIIQQQ") # magic, version, verbs, cells per verb, names/table/pool offsets
+_NAME = struct.Struct("<III") # pool offset, length, row
+_CELL = struct.Struct("<II") # pool offset, length
+_BUILD_CHUNK = 1024 # verbs conjugated together while building
+
+
+def build_database(path : str, weak_verbs = (), irregular_verbs : list = None) -> int:
+	"""
+	Conjugate every verb of the lexicon plus <weak_verbs> and write the database file <path>.
+
+	Parameters:
+		path : str --> file to write
+		weak_verbs (default ()) : iterable[str] --> further infinitives to include (any class)
+		irregular_verbs (default get_irregular_verbs()) : list --> the irregular verb information
+	Return:
+		int --> number of verbs written
+	"""
+	irregular_verbs = irregular_verbs if irregular_verbs is not None else conjutils.get_irregular_verbs()
+	words = [verb[conjutils.IrregularIdx.INFINITIVE] for verb in irregular_verbs[1:]] # skip the header
+	words = list(dict.fromkeys(words + [word for word in weak_verbs if word])) # unique, in order
+
+	pool = bytearray()
+	pooled = {} # str : pool offset, so that repeated forms are stored once
+	def intern(string : str) -> tuple:
+		data = string.encode("utf-8")
+		offset = pooled.get(string)
+		if offset is None:
+			offset = len(pool)
+			pool.extend(data)
+			pooled[string] = offset
+		return (offset, len(data))
+
+	context = conjutils.get_context(irregular_verbs)
+	table = bytearray()
+	names = []
+	for start in range(0, len(words), _BUILD_CHUNK):
+		chunk = [context.classify(word) for word in words[start:start + _BUILD_CHUNK]]
+		v.conjugate_all(chunk)
+		for (row, verb) in enumerate(chunk, start):
+			names.append((verb.infinitive.encode("utf-8"), intern(verb.infinitive), row))
+			for form in verb.get_table():
+				table.extend(_CELL.pack(*intern(form)) if form else _CELL.pack(0, 0))
+	names.sort()
+
+	names_offset = _HEADER.size
+	table_offset = names_offset + len(names) * _NAME.size
+	pool_offset = table_offset + len(table)
+	with open(path, "wb") as file:
+		file.write(_HEADER.pack(MAGIC, VERSION, len(words), v.n_entries, names_offset, table_offset, pool_offset))
+		for (_, (offset, length), row) in names:
+			file.write(_NAME.pack(offset, length, row))
+		file.write(table)
+		file.write(pool)
+	return len(words)
+
+
+class ConjugationDatabase:
+	"""
+	Read-only, memory-mapped view of a file written by build_database().
+
+	Methods:
+		get_conjugation_at(self, infinitive : str, tense : int, mood : int, aspect : int, person : int, number : int) -> str
+			get specified conjugation of <infinitive>
+		get_table(self, infinitive : str) -> list
+			get the whole conjugation table of <infinitive>, indexed by table_hash()
+		infinitives(self) -> list
+			get every infinitive in the database, sorted
+		close(self)
+			unmap the file
+	"""
+
+	def __init__(self, path : str):
+		"""Map the database file <path>."""
+		with open(path, "rb") as file:
+			self._map = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+		(magic, version, self._n_verbs, n_cells, self._names, self._table, self._pool) = _HEADER.unpack_from(self._map, 0)
+		if magic != MAGIC or version != VERSION:
+			self._map.close()
+			raise ValueError(f"{path} is not a version {VERSION} conjugation database")
+		if n_cells != v.n_entries:
+			self._map.close()
+			raise ValueError(f"{path} has {n_cells} cells per verb, expected {v.n_entries}")
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def __len__(self) -> int:
+		return self._n_verbs
+
+	def __contains__(self, infinitive : str) -> bool:
+		return self._find(infinitive) >= 0
+
+	def close(self):
+		"""Unmap the file."""
+		self._map.close()
+
+	def _string(self, offset : int, length : int) -> str:
+		start = self._pool + offset
+		return self._map[start:start + length].decode("utf-8")
+
+	def _find(self, infinitive : str) -> int:
+		"""Return the table row of <infinitive>, -1 if it is not in the database."""
+		key = infinitive.encode("utf-8")
+		(low, high) = (0, self._n_verbs)
+		while low < high:
+			middle = (low + high) // 2
+			(offset, length, row) = _NAME.unpack_from(self._map, self._names + middle * _NAME.size)
+			start = self._pool + offset
+			name = self._map[start:start + length]
+			if name == key:
+				return row
+			if name < key:
+				low = middle + 1
+			else:
+				high = middle
+		return -1
+
+	def _row(self, infinitive : str) -> int:
+		row = self._find(infinitive)
+		if row < 0:
+			raise KeyError(infinitive)
+		return row
+
+	def get_conjugation_at(self,
+						   infinitive : str,
+						   tense : int,
+						   mood : int,
+						   aspect : int,
+						   person : int,
+						   number : int) -> str:
+		"""Return a specified conjugation of <infinitive>; raises KeyError if it is not in the database."""
+		row = self._row(infinitive)
+		index = v.table_hash(mood, tense, aspect, person, number)
+		return self._string(*_CELL.unpack_from(self._map, self._table + (row * v.n_entries + index) * _CELL.size))
+
+	def get_table(self, infinitive : str) -> list:
+		"""Return the conjugation table of <infinitive>; raises KeyError if it is not in the database."""
+		start = self._table + self._row(infinitive) * v.n_entries * _CELL.size
+		return [self._string(offset, length) for (offset, length) in _CELL.iter_unpack(self._map[start:start + v.n_entries * _CELL.size])]
+
+	def infinitives(self) -> list:
+		"""Return every infinitive in the database, sorted."""
+		return [self._string(offset, length) for (offset, length, row) in
+				_NAME.iter_unpack(self._map[self._names:self._names + self._n_verbs * _NAME.size])]
+
+
+def main(argv : list = None):
+	parser = argparse.ArgumentParser(description = "Precompute the conjugation tables of the lexicon into a database file.")
+	parser.add_argument("output", help = "database file to write")
+	parser.add_argument("--weak", help = "file of further infinitives, one per line, to include")
+	args = parser.parse_args(argv)
+
+	weak_verbs = []
+	if args.weak:
+		with open(args.weak, "r", encoding = "utf-8") as file:
+			weak_verbs = [line.strip() for line in file]
+	print(f"wrote {build_database(args.output, weak_verbs)} verbs to {args.output}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,205 @@
+"""
+Conjugation Export
+
+Bulk writers streaming the filled cells of many conjugated verbs to disk, one chunk of verbs
+at a time, so that exporting a whole lexicon never holds more than a chunk in memory:
+	- long CSV --> one "infinitive,mood,tense,aspect,person,number,form" row per cell, enums by name
+	- columnar --> compact binary, dictionary-encoded strings plus one array per column
+
+Columnar file layout (little-endian):
+	header --> magic, version
+	blocks --> one per chunk of verbs:
+		(strings, rows) counts
+		strings --> their UTF-8 lengths then bytes; the string dictionary of this block only
+		columns --> infinitive ids (uint32), mood, tense, aspect, person, number (uint8 each), form ids (uint32)
+
+Usage:
+	python conjexport.py OUTPUT [--format long|columnar] [--weak FILE] [--chunk-size N]
+"""
+
+import argparse
+import array
+import csv
+import struct
+import sys
+
+import conjutils
+import verbs as v
+from conjugator import _chunks
+
+MAGIC = b"GVCONJCL"
+VERSION = 2
+_HEADER = struct.Struct("<8sI") # magic, version
+_BLOCK = struct.Struct("<II") # strings, rows
+_ENUM_COLUMNS = ("mood", "tense", "aspect", "person", "number") # in table_unhash() order
+COLUMNS = ("infinitive",) + _ENUM_COLUMNS + ("form",)
+_BUFFER_SIZE = 1 << 20
+
+
+def iter_conjugated(infinitives, context = None, chunk_size : int = 1024):
+	"""
+	Classify and fully conjugate <infinitives> a chunk at a time (with verbs.conjugate_all()).
+
+	Parameters:
+		infinitives : iterable[str] --> the verbs to conjugate
+		context (default get_context()) : ConjugationContext --> context to classify them in
+		chunk_size (default 1024) : int --> verbs conjugated together
+	Yield:
+		Verb --> each conjugated verb, in order
+	"""
+	context = context if context is not None else conjutils.get_context()
+	for words in _chunks(infinitives, chunk_size):
+		chunk = [context.classify(word) for word in words]
+		v.conjugate_all(chunk)
+		yield from chunk
+
+def _filled_cells(verb : v.Verb) -> list:
+	"""Return the (table index, form) of every non-empty filled cell of <verb>."""
+	forms = verb.get_table().expand()
+	return [(index, forms[index]) for index in verb.get_filled() if forms[index]]
+
+
+def write_long_csv(verbs, out, chunk_size : int = 1024) -> int:
+	"""
+	Write the filled cells of <verbs> to text file <out> as long-format CSV, with a header.
+
+	Parameters:
+		verbs : iterable[Verb] --> conjugated verbs, e.g. from iter_conjugated()
+		out : file --> text file opened with newline = ""
+		chunk_size (default 1024) : int --> verbs whose rows are written at once
+	Return:
+		int --> number of rows written
+	"""
+	names = [tuple(enum.name for enum in v.table_unhash(index)) for index in range(v.n_entries)]
+	writer = csv.writer(out)
+	writer.writerow(COLUMNS)
+	count = 0
+	for chunk in _chunks(verbs, chunk_size):
+		rows = [(verb.infinitive,) + names[index] + (form,) for verb in chunk for (index, form) in _filled_cells(verb)]
+		writer.writerows(rows)
+		count += len(rows)
+	return count
+
+
+def _little_endian(column : array.array) -> bytes:
+	if sys.byteorder == "big":
+		column = array.array(column.typecode, column)
+		column.byteswap()
+	return column.tobytes()
+
+def write_columnar(verbs, out, chunk_size : int = 4096) -> int:
+	"""
+	Write the filled cells of <verbs> to binary file <out> in the columnar format (see the module docstring).
+
+	Strings are dictionary encoded per block, so that neither writing nor reading holds more
+	than a block's strings in memory.
+
+	Parameters:
+		verbs : iterable[Verb] --> conjugated verbs, e.g. from iter_conjugated()
+		out : file --> binary file
+		chunk_size (default 4096) : int --> verbs per block
+	Return:
+		int --> number of rows written
+	"""
+	cell_values = [tuple(int(enum) for enum in v.table_unhash(index)) for index in range(v.n_entries)]
+	out.write(_HEADER.pack(MAGIC, VERSION))
+	count = 0
+	for chunk in _chunks(verbs, chunk_size):
+		(ids, new) = ({}, []) # string : id in the block's dictionary, and the strings by id
+		(infinitives, indices, forms) = (array.array("I"), [], array.array("I"))
+		for verb in chunk:
+			cells = _filled_cells(verb)
+			for string in [verb.infinitive] + [form for (_, form) in cells]:
+				string_id = ids.get(string)
+				if string_id is None:
+					ids[string] = len(ids)
+					new.append(string.encode("utf-8"))
+			infinitives.extend([ids[verb.infinitive]] * len(cells))
+			indices += [index for (index, _) in cells]
+			forms.extend([ids[form] for (_, form) in cells])
+		columns = [infinitives] + [array.array("B", [cell[i] for cell in map(cell_values.__getitem__, indices)])
+								   for i in range(len(_ENUM_COLUMNS))] + [forms]
+
+		out.write(_BLOCK.pack(len(new), len(forms)))
+		out.write(_little_endian(array.array("I", (len(data) for data in new))))
+		out.write(b"".join(new))
+		for column in columns:
+			out.write(_little_endian(column))
+		count += len(forms)
+	return count
+
+def _read(file, size : int) -> bytes:
+	data = file.read(size)
+	if len(data) != size:
+		raise ValueError("truncated columnar conjugation file")
+	return data
+
+def _read_column(file, typecode : str, length : int) -> array.array:
+	column = array.array(typecode)
+	column.frombytes(_read(file, length * column.itemsize))
+	if sys.byteorder == "big":
+		column.byteswap()
+	return column
+
+def iter_columnar(file):
+	"""
+	Read a file written by write_columnar() from binary file <file>, a block at a time.
+
+	Yield:
+		dict[str, list | array] --> per block, each of COLUMNS: "infinitive" and "form" as lists of str,
+			the enum columns as arrays of their integer values
+	"""
+	(magic, version) = _HEADER.unpack(_read(file, _HEADER.size))
+	if magic != MAGIC or version != VERSION:
+		raise ValueError(f"not a version {VERSION} columnar conjugation file")
+	while True:
+		head = file.read(_BLOCK.size)
+		if not head:
+			return
+		(n_strings, n_rows) = _BLOCK.unpack(head)
+		lengths = _read_column(file, "I", n_strings)
+		data = _read(file, sum(lengths))
+		(strings, start) = ([], 0)
+		for length in lengths:
+			strings.append(data[start:start + length].decode("utf-8"))
+			start += length
+
+		block = {"infinitive" : [strings[i] for i in _read_column(file, "I", n_rows)]}
+		for name in _ENUM_COLUMNS:
+			block[name] = _read_column(file, "B", n_rows)
+		block["form"] = [strings[i] for i in _read_column(file, "I", n_rows)]
+		yield block
+
+def read_columnar(file):
+	"""Yield the (infinitive, Mood, Tense, Aspect, Person, Number, form) rows of a file written by write_columnar()."""
+	for block in iter_columnar(file):
+		for (infinitive, mood, tense, aspect, person, number, form) in zip(*(block[name] for name in COLUMNS)):
+			yield (infinitive, v.Mood(mood), v.Tense(tense), v.Aspect(aspect), v.Person(person), v.Number(number), form)
+
+
+def main(argv : list = None):
+	parser = argparse.ArgumentParser(description = "Export the conjugations of the lexicon in bulk.")
+	parser.add_argument("output", help = "file to write")
+	parser.add_argument("-f", "--format", choices = ("long", "columnar"), default = "long",
+						help = "long-format CSV or compact columnar binary (default: long)")
+	parser.add_argument("--weak", help = "file of further infinitives, one per line, to include")
+	parser.add_argument("--chunk-size", type = int, default = 1024, help = "verbs conjugated and written at once (default: 1024)")
+	args = parser.parse_args(argv)
+
+	irregular_verbs = conjutils.get_irregular_verbs()
+	words = dict.fromkeys(verb[conjutils.IrregularIdx.INFINITIVE] for verb in irregular_verbs[1:]) # skip the header
+	if args.weak:
+		with open(args.weak, "r", encoding = "utf-8") as file:
+			words.update(dict.fromkeys(word for word in (line.strip() for line in file) if word))
+	verbs = iter_conjugated(words, chunk_size = args.chunk_size)
+	if args.format == "long":
+		with open(args.output, "w", encoding = "utf-8", newline = "", buffering = _BUFFER_SIZE) as file:
+			count = write_long_csv(verbs, file, args.chunk_size)
+	else:
+		with open(args.output, "wb", buffering = _BUFFER_SIZE) as file:
+			count = write_columnar(verbs, file, args.chunk_size)
+	print(f"wrote {count} forms of {len(words)} verbs to {args.output}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,104 @@
+"""
+Conjugation Index
+
+Reverse lookup from a conjugated form back to the cells producing it, e.g.
+"gingst" --> [("gehen", Tense.PAST, Mood.INDICATIVE, Aspect.SIMPLE, Person.SECOND, Number.SINGULAR)].
+Periphrastic forms are indexed whole ("hätte gesehen").
+
+The index is filled as verbs are conjugated (add_verb(), add_cells(), or record() around
+any stream of conjugations) and can be saved to and loaded from a JSON file.
+"""
+
+import json
+
+import verbs as v
+
+VERSION = 1
+
+
+def normalize_form(form : str) -> str:
+	"""Return <form> lowercased with its whitespace collapsed, as forms are indexed."""
+	return " ".join(form.split()).lower()
+
+
+class ReverseIndex:
+	"""
+	Inverted index of conjugated forms.
+
+	Methods:
+		add(self, form : str, infinitive : str, tense : int, mood : int, aspect : int, person : int, number : int)
+			index one analysis of <form>
+		add_cells(self, infinitive : str, cells : dict)
+			index a {(mood, tense, aspect, person, number) : form} mapping, as returned by conjugator.conjugate_many()
+		add_table(self, infinitive : str, table)
+			index a conjugation table indexed by table_hash()
+		add_verb(self, verb : Verb)
+			index the filled cells of a conjugated Verb
+		record(self, conjugations)
+			index (infinitive, cells) pairs while passing them through
+		lookup(self, form : str) -> list
+			get every (infinitive, Tense, Mood, Aspect, Person, Number) analysis of <form>
+		save(self, path : str) / load(path : str)
+			write/read the index as JSON
+	"""
+
+	def __init__(self):
+		self._forms = {} # normalized form : {analysis : None}, an ordered set
+
+	def __len__(self) -> int:
+		return len(self._forms)
+
+	def __contains__(self, form : str) -> bool:
+		return normalize_form(form) in self._forms
+
+	def add(self, form : str, infinitive : str, tense : int, mood : int, aspect : int, person : int, number : int):
+		"""Index one analysis of <form>; empty forms are ignored."""
+		if form:
+			analysis = (infinitive, v.Tense(tense), v.Mood(mood), v.Aspect(aspect), v.Person(person), v.Number(number))
+			self._forms.setdefault(normalize_form(form), {})[analysis] = None
+
+	def add_cells(self, infinitive : str, cells : dict):
+		"""Index a {(mood, tense, aspect, person, number) : form} mapping of <infinitive>."""
+		for ((mood, tense, aspect, person, number), form) in cells.items():
+			self.add(form, infinitive, tense, mood, aspect, person, number)
+
+	def add_table(self, infinitive : str, table):
+		"""Index a conjugation table of <infinitive>, indexed by table_hash()."""
+		for (index, form) in enumerate(table):
+			if form:
+				(mood, tense, aspect, person, number) = v.table_unhash(index)
+				self.add(form, infinitive, tense, mood, aspect, person, number)
+
+	def add_verb(self, verb : v.Verb):
+		"""Index the filled cells of conjugated <verb>."""
+		self.add_table(verb.infinitive, verb.get_table())
+
+	def record(self, conjugations):
+		"""Index each (infinitive, cells) pair of <conjugations> (e.g. from iter_conjugations()) as it is yielded."""
+		for (infinitive, cells) in conjugations:
+			self.add_cells(infinitive, cells)
+			yield (infinitive, cells)
+
+	def lookup(self, form : str) -> list:
+		"""Return every (infinitive, Tense, Mood, Aspect, Person, Number) producing <form>, [] if there is none."""
+		return list(self._forms.get(normalize_form(form), ()))
+
+	def save(self, path : str):
+		"""Write the index to <path> as JSON."""
+		forms = {form : [[infinitive] + [int(value) for value in cell] for (infinitive, *cell) in analyses]
+				 for (form, analyses) in self._forms.items()}
+		with open(path, "w", encoding = "utf-8") as file:
+			json.dump({"version" : VERSION, "forms" : forms}, file, ensure_ascii = False)
+
+	@classmethod
+	def load(cls, path : str):
+		"""Read an index written by save() from <path>."""
+		with open(path, "r", encoding = "utf-8") as file:
+			state = json.load(file)
+		if state.get("version") != VERSION:
+			raise ValueError(f"{path} is not a version {VERSION} reverse index")
+		index = cls()
+		for (form, analyses) in state["forms"].items():
+			for (infinitive, tense, mood, aspect, person, number) in analyses:
+				index.add(form, infinitive, tense, mood, aspect, person, number)
+		return index
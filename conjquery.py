@@ -0,0 +1,136 @@
+"""
+Lexicon Queries
+
+Secondary indexes over the irregular verbs of a context, answering questions such as
+"every 2nd person singular past indicative of class 1aS" or "every preterite-present in
+subjunctive II" without scanning and conjugating the whole lexicon:
+	- category --> IrregularIdx.CATEGORY of verbs.txt (1aS, 7cv, M, PP, I, ...)
+	- verb_class --> the Verb class the verb is conjugated as ("Strong" or "Mixed")
+	- separability --> "separable" or "inseparable" if the verb starts with a prefix of prefixes.txt
+	  followed by a listed or known root (befehlen, empfehlen), "simple" otherwise (vergessen)
+
+Only the verbs matching every filter are conjugated, only in the requested cells, through the
+conjugation cache, so conjugations already cached are reused.
+
+Usage:
+	for (infinitive, cells) in conjquery.query(category = "PP", mood = Mood.SUBJUNCTIVE_2): ...
+"""
+
+import weakref
+
+import conjugator
+import conjutils
+import verbs as v
+from conjutils import IrregularIdx
+
+FILTERS = ("category", "verb_class", "separability")
+
+
+class LexiconIndex:
+	"""
+	Secondary indexes over the irregular verbs of one ConjugationContext.
+
+	Each index maps a value to the positions, in lexicon order, of the infinitives having it.
+	A verb listed more than once is indexed by its first row, as find_verb_matches() uses it.
+
+	Attributes:
+		context : ConjugationContext --> the indexed context
+		infinitives : list[str] --> the distinct infinitives of the lexicon, in order
+
+	Methods:
+		values(self, name : str) -> list
+			get the values indexed under filter <name>
+		select(self, category = None, verb_class = None, separability = None) -> list
+			get the infinitives matching every given filter
+	"""
+
+	def __init__(self, context : conjutils.ConjugationContext):
+		self._context = weakref.ref(context) # so that get_index() does not keep superseded contexts alive
+		rows = {}
+		for verb in context.lexicon.verbs[1:]: # skip the header
+			rows.setdefault(verb[IrregularIdx.INFINITIVE], verb)
+		self.infinitives = list(rows)
+		self._indexes = {name : {} for name in FILTERS}
+		for (position, (infinitive, row)) in enumerate(rows.items()):
+			values = (row[IrregularIdx.CATEGORY],
+					  conjutils.determine_verb_class(infinitive, row, context).kind(),
+					  self._separability(infinitive, rows))
+			for (name, value) in zip(FILTERS, values):
+				self._indexes[name].setdefault(value, []).append(position)
+
+	@property
+	def context(self) -> conjutils.ConjugationContext:
+		return self._context()
+
+	def _separability(self, infinitive : str, rows : dict) -> str:
+		"""Return whether <infinitive> is a separable or inseparable compound, or simple (roots as in ConjugationContext.decompose())."""
+		for (found, root) in reversed(self.context.prefixes.splits(infinitive)): # longest root first
+			if found and (root in rows or conjutils._is_known_root(root)):
+				return "separable" if found[0][1] else "inseparable"
+		return "simple"
+
+	def values(self, name : str) -> list:
+		"""Return the values indexed under filter <name> (one of FILTERS), sorted."""
+		return sorted(self._indexes[name])
+
+	def select(self, category = None, verb_class = None, separability = None) -> list:
+		"""
+		Return the infinitives matching every given filter, in lexicon order.
+
+		Parameters:
+			category, verb_class, separability (default None, any) : str or tuple[str] --> the accepted value(s)
+		"""
+		selected = None
+		for (name, accepted) in zip(FILTERS, (category, verb_class, separability)):
+			if accepted is None:
+				continue
+			index = self._indexes[name]
+			accepted = (accepted,) if isinstance(accepted, str) else accepted
+			positions = {position for value in accepted for position in index.get(value, ())}
+			selected = positions if selected is None else selected & positions
+		if selected is None:
+			return list(self.infinitives)
+		return [self.infinitives[position] for position in sorted(selected)]
+
+
+_indexes = weakref.WeakKeyDictionary() # ConjugationContext : its LexiconIndex, dropped with the context
+
+def get_index(context : conjutils.ConjugationContext = None) -> LexiconIndex:
+	"""
+	Return the LexiconIndex of <context>, building it on the first call for that context only.
+
+	The default context is looked up on every call (get_context()), so that the index of a
+	context replaced by a reload (see conjreload) or install_context() is never used again.
+	"""
+	context = context if context is not None else conjutils.get_context()
+	index = _indexes.get(context)
+	if index is None:
+		index = _indexes[context] = LexiconIndex(context)
+	return index
+
+
+def query(category = None,
+		  verb_class = None,
+		  separability = None,
+		  tense = len(v.Tense),
+		  mood = len(v.Mood),
+		  aspect = len(v.Aspect),
+		  person = len(v.Person),
+		  number = len(v.Number),
+		  context : conjutils.ConjugationContext = None,
+		  cache = None):
+	"""
+	Conjugate the requested cells of the irregular verbs matching the filters, one verb at a time.
+
+	Parameters:
+		category, verb_class, separability --> filters, as for LexiconIndex.select()
+		tense, mood, aspect, person, number --> requested cells, as for Verb.conjugate()
+		context (default get_context()) : ConjugationContext --> the lexicon to query
+		cache (default conjugator's cache) : ConjugationCache --> cache to reuse and fill, see conjugator.conjugate()
+	Yield:
+		tuple[str, mappingproxy] --> each matching infinitive and its requested cells, keyed as in conjugator.conjugate_many()
+	"""
+	context = context if context is not None else conjutils.get_context()
+	for infinitive in get_index(context).select(category, verb_class, separability):
+		yield (infinitive, conjugator.conjugate(infinitive, tense, mood, aspect, person, number,
+												cache = cache, context = context))
@@ -0,0 +1,239 @@
+"""
+Lexicon Reloading
+
+Picks up edits of verbs.txt and prefixes.txt without restarting the process. A LexiconManager
+polls both files (mtime and size, then sha256 to rule out mere touches) and when one changed:
+	- parses only its new lines, reusing the rows parsed from the unchanged ones
+	- updates the suffix index, prefix automaton and normalization index along the changed entries only
+	- swaps the new ConjugationContext in with a single assignment (see conjutils.install_context());
+	  conjugations already running finish with the previous one
+	- drops from the conjugation caches only the entries the changes can affect, and moves the
+	  others to the new context (cached conjugations are keyed by context, see conjugator.cache_key())
+
+Usage:
+	manager = conjreload.LexiconManager()
+	manager.start(interval = 2.0) # or call manager.poll() from an existing loop
+"""
+
+import hashlib
+import os
+import threading
+
+import conjutils
+
+
+class _WatchedFile:
+	"""Last seen state of a watched file."""
+	__slots__ = ("path", "signature", "source_hash", "rows")
+
+	def __init__(self, path : str):
+		self.path = path
+		self.signature = None # (mtime ns, size)
+		self.source_hash = ""
+		self.rows = {} # line : row parsed from it
+
+	def check(self):
+		"""Return the file's (signature, sha256, contents) if it changed since the last call, else None."""
+		stat = os.stat(self.path)
+		signature = (stat.st_mtime_ns, stat.st_size)
+		if signature == self.signature:
+			return None
+		with open(self.path, "rb") as file:
+			data = file.read()
+		source_hash = hashlib.sha256(data).hexdigest()
+		if source_hash == self.source_hash:
+			self.signature = signature # touched, not changed
+			return None
+		return (signature, source_hash, data)
+
+
+class LexiconManager:
+	"""
+	Watches the lexicon files of a data directory and reloads them incrementally.
+
+	Attributes:
+		data_dir : str --> the watched directory
+		context : ConjugationContext --> the current context, also returned by conjutils.get_context() for <data_dir>
+		version : int --> number of reloads so far
+
+	Methods:
+		poll(self) -> dict
+			reload the files if they changed
+		add_cache(self, cache : ConjugationCache)
+			also invalidate <cache> on reloads
+		start(self, interval : float = 2.0)
+			poll from a background thread
+		stop(self)
+			stop the background thread
+	"""
+
+	def __init__(self, data_dir : str = None, caches : list = None):
+		"""
+		Load the lexicon files of <data_dir> and install their context.
+
+		Parameters:
+			data_dir (default get_data_dir()) : str --> directory holding verbs.txt and prefixes.txt
+			caches (default conjugator's cache) : list[ConjugationCache] --> caches keyed as conjugator.cache_key()
+				to update on reloads
+		"""
+		self.data_dir = data_dir if data_dir is not None else conjutils.get_data_dir()
+		self._caches = list(caches) if caches is not None else [None] # None stands for conjugator's cache
+		self._verbs = _WatchedFile(os.path.join(self.data_dir, "verbs.txt"))
+		self._prefixes = _WatchedFile(os.path.join(self.data_dir, "prefixes.txt"))
+		self._expansions = {} # prefixes.txt pattern : prefixes it expands to
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+		self._thread = None
+		self.version = 0
+
+		(verbs_state, prefixes_state) = (self._verbs.check(), self._prefixes.check())
+		context = conjutils.get_context(data_dir = self.data_dir)
+		(self._verbs.signature, self._verbs.source_hash, data) = verbs_state
+		if context.lexicon.source_hash != self._verbs.source_hash: # stale, e.g. loaded from an outdated snapshot
+			lexicon = conjutils.Lexicon(self._verbs.path, self._verbs.source_hash,
+										conjutils.parse_irregular_verbs(data.decode("utf-8").splitlines(keepends = True)),
+										checksum = conjutils.Lexicon.checksum_of(data))
+			auxiliaries = os.path.join(self.data_dir, "auxiliaries.txt")
+			prefixes = context.prefixes
+			context = conjutils.ConjugationContext.from_frozen(lexicon, prefixes, auxiliaries)
+			if context is None:
+				context = conjutils.ConjugationContext(lexicon, prefixes)
+			conjutils.install_context(context, self.data_dir)
+		self._verbs.rows = dict(zip(self._lines(data), context.lexicon.verbs)) # parse_irregular_verbs() is line by line
+		(self._prefixes.signature, self._prefixes.source_hash, data) = prefixes_state
+		self._prefixes.rows = {line : self._parse_prefix(line) for line in self._lines(data)[1:]}
+		self.context = context
+
+	@staticmethod
+	def _lines(data : bytes) -> list:
+		"""Return the lines of <data>, without their line endings (so that converting those changes nothing)."""
+		return data.decode("utf-8").splitlines()
+
+	@staticmethod
+	def _parse_prefix(line : str) -> tuple:
+		"""Return the (pattern, is_separable) of a prefixes.txt line, None for a blank one."""
+		rows = conjutils.parse_prefixes([line])
+		return rows[0] if rows else None
+
+	def _expand(self, pattern : str) -> list:
+		expansion = self._expansions.get(pattern)
+		if expansion is None:
+			expansion = self._expansions[pattern] = conjutils.expand_pattern(pattern)
+		return expansion
+
+	def _reload_verbs(self, lexicon : conjutils.Lexicon, state : tuple) -> tuple:
+		"""Return the updated lexicon and the infinitives whose rows changed."""
+		(signature, source_hash, data) = state
+		(old, rows, verbs) = (self._verbs.rows, {}, [])
+		for line in self._lines(data):
+			row = old.get(line)
+			if row is None:
+				(row,) = conjutils.parse_irregular_verbs([line + "\n"])
+			rows[line] = row
+			verbs.append(row)
+		changed = {row[conjutils.IrregularIdx.INFINITIVE] for (line, row) in list(old.items()) + list(rows.items())
+				   if (line in old) != (line in rows) and len(row) > conjutils.IrregularIdx.INFINITIVE}
+		lexicon = conjutils.Lexicon(self._verbs.path, source_hash, verbs, lexicon.suffix_index.updated(verbs, changed),
+									conjutils.Lexicon.checksum_of(data))
+		(self._verbs.signature, self._verbs.source_hash, self._verbs.rows) = (signature, source_hash, rows)
+		return (lexicon, changed)
+
+	def _reload_prefixes(self, prefixes : conjutils.PrefixAutomaton, state : tuple) -> tuple:
+		"""Return the updated prefix automaton and the prefixes whose flag changed or that were added or removed, to their new flag (None if removed)."""
+		(signature, source_hash, data) = state
+		old = self._prefixes.rows
+		rows = {line : old[line] if line in old else self._parse_prefix(line) for line in self._lines(data)[1:]}
+		changed = set()
+		for (line, row) in list(old.items()) + list(rows.items()):
+			if (line in old) != (line in rows) and row is not None:
+				changed.update(self._expand(row[0]))
+		flags = {}
+		for row in rows.values(): # the first listed flag wins, as in PrefixAutomaton()
+			if row is not None:
+				for prefix in self._expand(row[0]):
+					if prefix in changed and prefix not in flags:
+						flags[prefix] = row[1]
+		flags.update({prefix : None for prefix in changed if prefix not in flags})
+		(self._prefixes.signature, self._prefixes.source_hash, self._prefixes.rows) = (signature, source_hash, rows)
+		return (prefixes.updated(flags), flags)
+
+	def poll(self) -> dict:
+		"""
+		Reload verbs.txt and prefixes.txt if either changed since the last poll.
+
+		Return:
+			dict --> None if nothing changed, else {"verbs" : changed infinitives, "prefixes" : changed prefixes,
+				"invalidated" : number of cache entries dropped}
+		"""
+		with self._lock:
+			(verbs_state, prefixes_state) = (self._verbs.check(), self._prefixes.check())
+			if verbs_state is None and prefixes_state is None:
+				return None
+
+			context = self.context
+			(lexicon, prefixes) = (context.lexicon, context.prefixes)
+			(changed_verbs, changed_prefixes) = (set(), {})
+			if verbs_state is not None:
+				(lexicon, changed_verbs) = self._reload_verbs(lexicon, verbs_state)
+			if prefixes_state is not None:
+				(prefixes, changed_prefixes) = self._reload_prefixes(prefixes, prefixes_state)
+
+			auxiliaries = (context.haben, context.sein, context.werden)
+			rebuild = any(auxiliary.infinitive.endswith(tuple(changed_verbs)) for auxiliary in auxiliaries)
+			normalization = context.normalization.updated(lexicon.verbs, changed_verbs, changed_prefixes)
+			(old, context) = (context, conjutils.ConjugationContext(lexicon, prefixes, None if rebuild else auxiliaries,
+																   normalization))
+			if rebuild: # every perfect and future form may have changed
+				affected = lambda key: True
+			else:
+				suffixes = tuple(changed_verbs)
+				automata = (old.prefixes, prefixes) # the changed prefixes are in either
+				def affected(key):
+					if key[1].endswith(suffixes):
+						return True
+					# any prefix of the word, stacked (wieder + auf + nehmen) or not
+					return bool(changed_prefixes) and any(prefix in changed_prefixes for automaton in automata
+														  for (found, _) in automaton.splits(key[1]) for (prefix, _) in found)
+			# before installing it, so that no entry of the new context can exist yet
+			invalidated = self._rekey(lambda key: key if key[0] is not old else None if affected(key) else (context,) + key[1:])
+			conjutils.install_context(context, self.data_dir)
+			self.context = context
+			self.version += 1
+			return {"verbs" : sorted(changed_verbs), "prefixes" : sorted(changed_prefixes), "invalidated" : invalidated}
+
+	def add_cache(self, cache):
+		"""Also update <cache> (a ConjugationCache keyed as conjugator.cache_key()) on reloads."""
+		with self._lock:
+			self._caches = self._caches + [cache]
+
+	def _rekey(self, function) -> int:
+		count = 0
+		for cache in self._caches:
+			if cache is None:
+				import conjugator
+				count += conjugator.rekey_cache(function)
+			else:
+				count += cache.rekey(function)
+		return count
+
+	def start(self, interval : float = 2.0):
+		"""Poll every <interval> seconds from a daemon thread until stop()."""
+		if self._thread is not None:
+			return
+		self._stop.clear()
+		self._thread = threading.Thread(target = self._run, args = (interval,), name = "lexicon-reload", daemon = True)
+		self._thread.start()
+
+	def _run(self, interval : float):
+		while not self._stop.wait(interval):
+			try:
+				self.poll()
+			except (OSError, ValueError, IndexError, UnicodeDecodeError):
+				pass # e.g. a file caught half written: retried on the next poll
+
+	def stop(self):
+		"""Stop polling and wait for the background thread to finish."""
+		if self._thread is not None:
+			self._stop.set()
+			self._thread.join()
+			self._thread = None
@@ -1,48 +1,530 @@
+from __future__ import annotations
+
+import collections
+import os
+import sys
+import types
+
+import conjcache
 import conjutils
 import verbs as v
-from conjutils import IrregularIdx
-
-# TODO: actually make this a 'main' function
-############## MAIN PROGRAM ####################
-
-irregular_verbs = conjutils.get_irregular_verbs()
-#prefixes = conjutils.get_prefixes()
-
-# TODO: determine verb class: Strong, Weak, Mixed
-
-# partial conjugation of auxiliaries
-
-word = "haben"
-match = conjutils.find_verb_matches(word, irregular_verbs)
-v.Haben = v.Strong(infinitive = word, use_haben = True, parts = {})
-v.Haben.conjugate(aspect = (v.Aspect.SIMPLE),
-				  tense = (v.Tense.PRESENT, v.Tense.PAST),
-				  mood = (v.Mood.INDICATIVE, v.Mood.SUBJUNCTIVE_1, v.Mood.SUBJUNCTIVE_2))
-
-word = "sein"
-match = conjutils.find_verb_matches(word, irregular_verbs)
-v.Sein = v.Strong(infinitive = word, use_haben = False, parts = {})
-v.Sein.conjugate(aspect = v.Aspect.SIMPLE,
-				  tense = (v.Tense.PRESENT, v.Tense.PAST),
-				  mood = (v.Mood.INDICATIVE, v.Mood.SUBJUNCTIVE_1, v.Mood.SUBJUNCTIVE_2))
-
-word = "werden"
-match = conjutils.find_verb_matches(word, irregular_verbs)
-v.Werden = v.Strong(infinitive = word, use_haben = False, parts = {})
-v.Werden.conjugate(aspect = v.Aspect.SIMPLE,
-				  tense = (v.Tense.PRESENT, v.Tense.PAST),
-				  mood = (v.Mood.INDICATIVE, v.Mood.SUBJUNCTIVE_1, v.Mood.SUBJUNCTIVE_2))
-# TODO: somehow determine verb transitivity/is motion or not
-while(1):
-	word = input("enter a verb infinitive (or 'q' to quit): ")
-	if word == "q":
-		break
-
-	matches = conjutils.find_verb_matches(word, irregular_verbs)
-	#(not_root, root) = conjutils.get_prefix(word, prefixes)
-	verb = conjutils.determine_verb_class(word, matches)
-	print(verb.kind())
-	if verb:
-		verb.conjugate()
-		# TODO: display the conjugation
-		print(verb.get_table())
\ No newline at end of file
+
+# argparse, concurrent.futures, cProfile, csv, json, pstats and instrument are imported where they are used,
+# so that importing the conjugator as a library (or running it once, e.g. in a serverless handler) stays cheap
+
+
+def _prepare_cells(tense, mood, aspect, person, number, irregular_verbs : list) -> tuple:
+	"""Return the conjugation context of <irregular_verbs> and the (mood, tense, aspect, person, number) cells requested."""
+	context = conjutils.get_context(irregular_verbs)
+	cells = tuple(v.table_unhash(cell) for cell in v.cell_indices(tense, mood, aspect, person, number))
+	return (context, cells)
+
+def _conjugate_cells(verb : v.Verb, cells : tuple) -> dict:
+	"""Construct the <cells> of <verb> without filling its table."""
+	return {(mood_idx, tense_idx, aspect_idx, person_idx, number_idx) :
+			verb.compute_conjugation_at(tense_idx, mood_idx, aspect_idx, person_idx, number_idx)
+			for (mood_idx, tense_idx, aspect_idx, person_idx, number_idx) in cells}
+
+_cache = conjcache.ConjugationCache()
+
+def configure_cache(max_size : int = 1024, policy : str = "lru"):
+	"""Replace the cache used by conjugate() with an empty one of the given size and eviction policy."""
+	global _cache
+	_cache = conjcache.ConjugationCache(max_size, policy)
+
+def cache_stats() -> dict:
+	"""Return the hit/miss/eviction counters of the cache used by conjugate()."""
+	return _cache.stats()
+
+def clear_cache():
+	"""Empty the cache used by conjugate()."""
+	_cache.clear()
+
+def invalidate_cache(predicate) -> int:
+	"""Drop the entries of the cache used by conjugate() whose key (see cache_key()) satisfies <predicate>."""
+	return _cache.invalidate(predicate)
+
+def rekey_cache(function) -> int:
+	"""Move the entries of the cache used by conjugate() to the keys <function> maps theirs to (see ConjugationCache.rekey())."""
+	return _cache.rekey(function)
+
+def cache_key(infinitive : str, cells : tuple, context : conjutils.ConjugationContext) -> tuple:
+	"""
+	Return the key the conjugation of <infinitive> in <context> is cached under.
+
+	Parameters:
+		infinitive : str --> the conjugated verb
+		cells : tuple[int] --> the table indexes of the requested cells, as returned by verbs.cell_indices()
+		context : ConjugationContext --> the context conjugating it
+	Return:
+		tuple --> (context, infinitive, cells): a context superseded by a reload (see conjreload) or built from
+			another lexicon never shares entries with the current one
+	"""
+	return (context, infinitive, cells)
+
+def conjugate(infinitive : str,
+			  tense = len(v.Tense),
+			  mood = len(v.Mood),
+			  aspect = len(v.Aspect),
+			  person = len(v.Person),
+			  number = len(v.Number),
+			  irregular_verbs : list = None,
+			  cache : conjcache.ConjugationCache = None,
+			  context : conjutils.ConjugationContext = None):
+	"""
+	Conjugate a single infinitive through the conjugation cache.
+
+	Entries are keyed by the context as well (see cache_key()), so one cache may serve several lexicons, and a context
+	superseded by a reload never shares the current one's entries.
+
+	Parameters:
+		infinitive : str --> the verb to conjugate
+		tense, mood, aspect, person, number --> requested cells, as for Verb.conjugate()
+		irregular_verbs (default get_irregular_verbs()) : list --> the irregular verb information
+		cache (default the module cache, see configure_cache()) : ConjugationCache --> cache to look up and fill
+		context (default that of <irregular_verbs>) : ConjugationContext --> context to conjugate in, instead of <irregular_verbs>
+	Return:
+		mappingproxy[tuple[Mood, Tense, Aspect, Person, Number], str] --> read-only requested cells, keyed as in conjugate_many()
+	"""
+	cache = cache if cache is not None else _cache
+	context = context if context is not None else conjutils.get_context(irregular_verbs)
+	key = cache_key(infinitive, v.cell_indices(tense, mood, aspect, person, number), context)
+
+	def compute():
+		cells = tuple(v.table_unhash(cell) for cell in key[2])
+		return types.MappingProxyType(_conjugate_cells(context.classify(infinitive), cells))
+	return cache.get_or_compute(key, compute)
+
+def warm_up(data_dir : str = None) -> conjutils.ConjugationContext:
+	"""
+	Load everything the first conjugation needs (lexicon, prefixes, auxiliaries) ahead of time.
+
+	Nothing is loaded on import, so that the cost is paid by whichever call comes first; call
+	this at startup (e.g. in a serverless handler's init phase) to keep it off the first request.
+
+	Parameters:
+		data_dir (default get_data_dir()) : str --> directory holding the lexicon
+	Return:
+		ConjugationContext --> the context subsequent conjugations use
+	"""
+	context = conjutils.get_context(data_dir = data_dir)
+	context.classify("gehen").conjugate() # and the code paths of a conjugation
+	return context
+
+def read_frequencies(file) -> list:
+	"""
+	Read a frequency list: one "infinitive,count" (or whitespace separated) pair per line.
+
+	Blank lines, # comments and a header line are skipped; repeated infinitives add up.
+
+	Return:
+		list[tuple[str, int]] --> (infinitive, count) pairs, most frequent first
+	"""
+	counts = {}
+	for (number, line) in enumerate(file, 1):
+		line = line.strip()
+		if not line or line.startswith("#"):
+			continue
+		fields = line.split(",") if "," in line else line.split()
+		try:
+			(word, count) = (fields[0].strip(), int(fields[1]))
+		except (IndexError, ValueError):
+			if number == 1 and not counts:
+				continue # header
+			raise ValueError(f"line {number}: expected 'infinitive,count', got {line!r}")
+		counts[word] = counts.get(word, 0) + count
+	return sorted(counts.items(), key = lambda item: -item[1])
+
+def _estimate_size(forms) -> int:
+	"""Return the approximate bytes held by a cached mapping of forms."""
+	return sys.getsizeof(forms) + sum(sys.getsizeof(form) for form in forms.values())
+
+def prefetch(frequencies : list,
+			 top : int = None,
+			 seconds : float = None,
+			 max_bytes : int = None,
+			 tense = len(v.Tense),
+			 mood = len(v.Mood),
+			 aspect = len(v.Aspect),
+			 person = len(v.Person),
+			 number = len(v.Number),
+			 cache : conjcache.ConjugationCache = None,
+			 context : conjutils.ConjugationContext = None,
+			 background : bool = False):
+	"""
+	Conjugate the most frequent verbs into the conjugation cache ahead of the requests for them.
+
+	The context is loaded first (see warm_up()), then verbs are conjugated most frequent first
+	until <top> verbs are cached, the cache is full, or the time or memory budget is spent.
+
+	Parameters:
+		frequencies : list[tuple[str, int]] --> (infinitive, count) pairs, most frequent first (see read_frequencies())
+		top (default the cache's size) : int --> number of verbs to warm at most
+		seconds (default None, no limit) : float --> time budget
+		max_bytes (default None, no limit) : int --> budget of (approximate) bytes held by the warmed entries
+		tense, mood, aspect, person, number --> cells to warm, as the requests will ask for them (see conjugate())
+		cache (default the module cache) : ConjugationCache --> cache to fill
+		context (default get_context()) : ConjugationContext --> the lexicon to conjugate with, as the requests will
+			pass it to conjugate(); entries are keyed by it
+		background (default False) : bool --> warm in a daemon thread and return a Future of the report instead
+	Return:
+		dict --> {"verbs" : verbs warmed, "share" : fraction of the total count they cover, "bytes" : approximate bytes
+			held, "seconds" : time taken, "stopped_by" : "top", "time", "memory" or "list"}
+	"""
+	if background:
+		import concurrent.futures
+		import threading
+		future = concurrent.futures.Future()
+		def run():
+			try:
+				future.set_result(prefetch(frequencies, top, seconds, max_bytes, tense, mood, aspect, person, number,
+										   cache = cache, context = context))
+			except BaseException as error:
+				future.set_exception(error)
+		threading.Thread(target = run, name = "prefetch", daemon = True).start()
+		return future
+
+	import time
+	start = time.perf_counter()
+	cache = cache if cache is not None else _cache
+	top = min(top if top is not None else cache.max_size, cache.max_size)
+	context = context if context is not None else conjutils.get_context()
+	context.classify("gehen").conjugate()
+	selection = v.cell_indices(tense, mood, aspect, person, number)
+	cells = tuple(v.table_unhash(cell) for cell in selection)
+
+	total = sum(count for (word, count) in frequencies)
+	(warmed, covered, size, stopped_by) = (0, 0, 0, "list")
+	for (word, count) in frequencies:
+		if warmed >= top:
+			stopped_by = "top"
+			break
+		if seconds is not None and time.perf_counter() - start >= seconds:
+			stopped_by = "time"
+			break
+		forms = types.MappingProxyType(_conjugate_cells(context.classify(word), cells))
+		entry_size = _estimate_size(forms)
+		if max_bytes is not None and size + entry_size > max_bytes:
+			stopped_by = "memory"
+			break
+		cache.put(cache_key(word, selection, context), forms)
+		(warmed, covered, size) = (warmed + 1, covered + count, size + entry_size)
+	return {"verbs" : warmed, "share" : covered / total if total else 0.0, "bytes" : size,
+			"seconds" : time.perf_counter() - start, "stopped_by" : stopped_by}
+
+def conjugate_many(infinitives,
+				   tense = len(v.Tense),
+				   mood = len(v.Mood),
+				   aspect = len(v.Aspect),
+				   person = len(v.Person),
+				   number = len(v.Number),
+				   tables : bool = False,
+				   irregular_verbs : list = None) -> list:
+	"""
+	Conjugate many infinitives in one call.
+
+	All words are classified in the same conjugation context (lexicon and auxiliaries),
+	and repeated infinitives are conjugated only once (their results are shared, read-only).
+	Unless <tables> is set, only the requested cells are constructed from the verbs' stems;
+	no table is allocated. If it is, the tables are filled a class at a time by verbs.conjugate_all(),
+	and each repetition of an infinitive gets its own copy of the table, as tables are mutable.
+
+	Parameters:
+		infinitives : iterable[str] --> the verbs to conjugate
+		tense, mood, aspect, person, number --> requested cells, as for Verb.conjugate()
+		tables (default False) : bool --> return each verb's (partially) filled ConjugationTable instead of a dict
+		irregular_verbs (default get_irregular_verbs()) : list --> the irregular verb information
+	Return:
+		list[mappingproxy[tuple[Mood, Tense, Aspect, Person, Number], str]] --> per infinitive (in order), its requested
+			cells keyed as table_unhash() returns them; ConjugationTable's instead if <tables> is set, one per entry.
+	"""
+	(context, cells) = _prepare_cells(tense, mood, aspect, person, number, irregular_verbs)
+
+	results = {}
+	words = list(infinitives)
+	if tables:
+		unique = list(dict.fromkeys(words))
+		verbs = [context.classify(word) for word in unique]
+		v.conjugate_all(verbs, tense, mood, aspect, person, number)
+		results = {word : verb.get_table() for (word, verb) in zip(unique, verbs)}
+		returned = set() # words whose table has been returned once, so that repetitions get copies
+		entries = []
+		for word in words:
+			entries.append(results[word].copy() if word in returned else results[word])
+			returned.add(word)
+		return entries
+	for word in dict.fromkeys(words):
+		verb = context.classify(word)
+		results[word] = types.MappingProxyType(_conjugate_cells(verb, cells))
+	return [results[word] for word in words]
+
+def iter_conjugations(infinitives,
+					  tense = len(v.Tense),
+					  mood = len(v.Mood),
+					  aspect = len(v.Aspect),
+					  person = len(v.Person),
+					  number = len(v.Number),
+					  irregular_verbs : list = None):
+	"""
+	Lazily conjugate <infinitives>, one at a time.
+
+	Unlike conjugate_many() nothing is kept between words, so memory stays bounded however
+	long <infinitives> is. Parameters are those of conjugate_many().
+
+	Yield:
+		tuple[str, dict] --> the infinitive and its requested cells, keyed as in conjugate_many()
+	"""
+	(context, cells) = _prepare_cells(tense, mood, aspect, person, number, irregular_verbs)
+	for word in infinitives:
+		verb = context.classify(word)
+		yield (word, _conjugate_cells(verb, cells))
+
+
+_worker_state = None # (conjugation context, cells) of a conjugate_parallel() worker process
+
+def _init_worker(tense, mood, aspect, person, number):
+	"""Process pool initializer: load the lexicon and the auxiliaries once per worker."""
+	global _worker_state
+	_worker_state = _prepare_cells(tense, mood, aspect, person, number, None)
+
+def _conjugate_chunk(words : list) -> list:
+	"""Conjugate a chunk of words in a worker, returning each word's forms in cell order (cheaper to send back than dicts)."""
+	(context, cells) = _worker_state
+	chunk = []
+	for word in words:
+		verb = context.classify(word)
+		chunk.append((word, tuple(verb.compute_conjugation_at(tense_idx, mood_idx, aspect_idx, person_idx, number_idx)
+								  for (mood_idx, tense_idx, aspect_idx, person_idx, number_idx) in cells)))
+	return chunk
+
+def _chunks(iterable, size : int):
+	"""Yield lists of up to <size> consecutive items of <iterable>."""
+	chunk = []
+	for item in iterable:
+		chunk.append(item)
+		if len(chunk) == size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+def conjugate_parallel(infinitives,
+					   tense = len(v.Tense),
+					   mood = len(v.Mood),
+					   aspect = len(v.Aspect),
+					   person = len(v.Person),
+					   number = len(v.Number),
+					   workers : int = None,
+					   chunk_size : int = 256,
+					   ordered : bool = True):
+	"""
+	Conjugate <infinitives> across a pool of worker processes.
+
+	Each worker loads the lexicon and conjugates the auxiliaries once, when it starts. Words are
+	sent to the workers in chunks of <chunk_size>, and at most two chunks per worker are in flight
+	at a time, so <infinitives> is consumed lazily and memory stays bounded as with iter_conjugations().
+
+	Parameters:
+		infinitives : iterable[str] --> the verbs to conjugate
+		tense, mood, aspect, person, number --> requested cells, as for Verb.conjugate()
+		workers (default os.cpu_count()) : int --> number of worker processes
+		chunk_size (default 256) : int --> number of words sent to a worker at once
+		ordered (default True) : bool --> yield in input order; otherwise as soon as a chunk is done
+	Yield:
+		tuple[str, dict] --> the infinitive and its requested cells, keyed as in conjugate_many()
+	"""
+	import concurrent.futures
+	selection = (tense, mood, aspect, person, number)
+	cells = tuple(v.table_unhash(cell) for cell in v.cell_indices(*selection))
+	workers = workers if workers is not None else (os.cpu_count() or 1)
+	max_pending = 2 * workers
+
+	with concurrent.futures.ProcessPoolExecutor(max_workers = workers,
+												initializer = _init_worker,
+												initargs = selection) as executor:
+		pending = collections.deque()
+		chunks = _chunks(infinitives, chunk_size)
+		exhausted = False
+		while pending or not exhausted:
+			# keep the pool busy without reading ahead of it
+			while not exhausted and len(pending) < max_pending:
+				chunk = next(chunks, None)
+				if chunk is None:
+					exhausted = True
+				else:
+					pending.append(executor.submit(_conjugate_chunk, chunk))
+			if not pending:
+				break
+
+			if ordered:
+				done = [pending.popleft()]
+			else:
+				(done, _) = concurrent.futures.wait(pending, return_when = concurrent.futures.FIRST_COMPLETED)
+				for future in done:
+					pending.remove(future)
+			for future in done:
+				for (word, forms) in future.result():
+					yield (word, dict(zip(cells, forms)))
+
+
+def normalize_infinitives(infinitives, report = None, irregular_verbs : list = None, bare_vowels : bool = False):
+	"""
+	Restore the spelling of <infinitives> typed without umlauts, ß or in another case (see ConjugationContext.normalize()).
+
+	Parameters:
+		infinitives : iterable[str] --> the words to normalize
+		report (default None) : callable --> called with (word, canonical spelling) whenever a normalization is applied
+		irregular_verbs (default get_irregular_verbs()) : list --> the irregular verb information
+		bare_vowels (default False) : bool --> also read bare vowels as umlauts (see NormalizationIndex.resolve())
+	Yield:
+		str --> the canonical spelling of each word, in order
+	"""
+	context = conjutils.get_context(irregular_verbs)
+	for word in infinitives:
+		(canonical, normalized) = context.normalize(word, bare_vowels)
+		if normalized and report is not None:
+			report(word, canonical)
+		yield canonical
+
+
+def cell_name(cell : tuple) -> str:
+	"""Return the column name of a (mood, tense, aspect, person, number) cell, e.g. INDICATIVE.PRESENT.SIMPLE.FIRST.SINGULAR"""
+	return ".".join(enum.name for enum in cell)
+
+def read_infinitives(file):
+	"""Yield the stripped, non-empty lines of <file>."""
+	for line in file:
+		word = line.strip()
+		if word:
+			yield word
+
+def write_jsonl(conjugations, out):
+	"""Write one JSON object per (infinitive, cells) pair of <conjugations> to <out>."""
+	import json
+	for (word, cells) in conjugations:
+		record = {"infinitive" : word, "forms" : {cell_name(cell) : form for (cell, form) in cells.items()}}
+		out.write(json.dumps(record, ensure_ascii = False) + "\n")
+
+def write_csv(conjugations, out, cells : tuple):
+	"""Write a header, then one row per (infinitive, cells) pair of <conjugations> to <out>."""
+	import csv
+	writer = csv.writer(out)
+	writer.writerow(["infinitive"] + [cell_name(cell) for cell in cells])
+	for (word, forms) in conjugations:
+		writer.writerow([word] + [forms[cell] for cell in cells])
+
+def parse_enums(values : str, enum_type):
+	"""Convert a comma separated list of <enum_type> names (any case) to a tuple of members."""
+	try:
+		return tuple(enum_type[value.strip().upper()] for value in values.split(","))
+	except KeyError as error:
+		import argparse
+		names = ", ".join(member.name.lower() for member in enum_type)
+		raise argparse.ArgumentTypeError(f"unknown {enum_type.__name__.lower()} {error}, expected any of: {names}")
+
+def parse_args(argv : list = None) -> argparse.Namespace:
+	import argparse
+	parser = argparse.ArgumentParser(description = "German verb conjugator. Interactive unless --input is given.")
+	parser.add_argument("-i", "--input", help = "file of infinitives, one per line, to conjugate non-interactively ('-' for stdin)")
+	parser.add_argument("-o", "--output", default = "-", help = "file to write the conjugations to (default: stdout)")
+	parser.add_argument("-f", "--format", choices = ("jsonl", "csv"), default = "jsonl", help = "output format (default: jsonl)")
+	parser.add_argument("-j", "--workers", type = int, default = 1,
+						help = "number of worker processes for --input (default: 1, conjugate in this process)")
+	parser.add_argument("--chunk-size", type = int, default = 256, help = "words sent to a worker at once (default: 256)")
+	parser.add_argument("--normalize", action = "store_true",
+						help = "restore umlauts, ß and lowercase in the input words (reported on stderr) before conjugating them")
+	parser.add_argument("--unordered", action = "store_true", help = "with --workers, write records as soon as they are ready")
+	parser.add_argument("--profile", nargs = "?", const = "-", metavar = "FILE",
+						help = "profile the run with cProfile, print the top functions to stderr and save the stats to FILE if given")
+	parser.add_argument("--metrics", action = "store_true", help = "print the pipeline timers and counters to stderr when done")
+	for (option, enum_type) in (("--tense", v.Tense), ("--mood", v.Mood), ("--aspect", v.Aspect),
+								("--person", v.Person), ("--number", v.Number)):
+		parser.add_argument(option, type = lambda values, enum_type = enum_type: parse_enums(values, enum_type),
+							default = len(enum_type),
+							help = "comma separated " + enum_type.__name__.lower() + "s to emit (default: all of "
+								   + ", ".join(member.name.lower() for member in enum_type) + ")")
+	return parser.parse_args(argv)
+
+def stream(args : argparse.Namespace):
+	"""Conjugate the infinitives of args.input and write them to args.output as they are read."""
+	infile = sys.stdin if args.input == "-" else open(args.input, "r", encoding = "utf-8")
+	outfile = sys.stdout if args.output == "-" else open(args.output, "w", encoding = "utf-8", newline = "")
+	try:
+		selection = (args.tense, args.mood, args.aspect, args.person, args.number)
+		words = read_infinitives(infile)
+		if args.normalize:
+			words = normalize_infinitives(words, lambda word, canonical: print(f"{word}: normalized to {canonical}", file = sys.stderr))
+		if args.workers > 1:
+			conjugations = conjugate_parallel(words, *selection, workers = args.workers,
+											  chunk_size = args.chunk_size, ordered = not args.unordered)
+		else:
+			conjugations = iter_conjugations(words, *selection)
+		if args.format == "csv":
+			cells = tuple(v.table_unhash(cell) for cell in v.cell_indices(*selection))
+			write_csv(conjugations, outfile, cells)
+		else:
+			write_jsonl(conjugations, outfile)
+	finally:
+		if infile is not sys.stdin:
+			infile.close()
+		if outfile is not sys.stdout:
+			outfile.close()
+		else:
+			outfile.flush()
+
+def interact():
+	context = conjutils.get_context()
+
+	# TODO: somehow determine verb transitivity/is motion or not
+	while(1):
+		word = input("enter a verb infinitive (or 'q' to quit): ")
+		if word == "q":
+			break
+
+		(word, normalized) = context.normalize(word)
+		if normalized:
+			print(f"(normalized to {word})")
+		suggestion = context.normalization.suggest(word)
+		if suggestion is not None:
+			print(f"(did you mean {suggestion}?)")
+		verb = context.classify(word)
+		print(verb.kind())
+		if verb:
+			verb.conjugate()
+			# TODO: display the conjugation
+			print(verb.get_table())
+
+
+def run(args : argparse.Namespace):
+	if args.input is not None:
+		stream(args)
+	else:
+		interact()
+
+def main(argv : list = None):
+	args = parse_args(argv)
+	if args.metrics:
+		import instrument
+		instrument.enable()
+	if args.profile is not None:
+		import cProfile
+		import pstats
+	profiler = cProfile.Profile() if args.profile is not None else None
+	try:
+		if profiler is not None:
+			profiler.runcall(run, args)
+		else:
+			run(args)
+	finally:
+		if profiler is not None:
+			stats = pstats.Stats(profiler, stream = sys.stderr).sort_stats("cumulative")
+			if args.profile != "-":
+				stats.dump_stats(args.profile)
+			stats.print_stats(25)
+		if args.metrics:
+			instrument.disable()
+			sys.stderr.write(instrument.prometheus())
+
+
+if __name__ == "__main__":
+	main()
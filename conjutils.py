@@ -4,10 +4,13 @@ Conjugator Utilites
 Provides functions to ease setting up the conjugator proper
 """
 
-import re
 import verbs as v
 from enum import IntEnum
+import functools
 import os
+import threading
+# hashlib, pickle and zlib are imported where they are used: zlib once the lexicon is loaded, hashlib
+# only when its sha256 is asked for (snapshots and reloading), which the first conjugation does not need
 
 
 class IrregularIdx(IntEnum):
@@ -30,128 +33,964 @@ def get_irregular_verbs() -> list:
 	1 (IrregularIdx.INFINITIVE)
 	2 (IrregularIdx.PAST_STEM)
 	3 (IrregularIdx.PARTICIPLE)
-	4 (IrregularIdx.CONJUGATION): present tense conjugation (indicative) for irregular and preterite-present verbs
+	4 (IrregularIdx.CONJUGATION): present tense conjugation (indicative) for irregular and preterite-present verbs,
+		as a tuple of the six forms (ich, du, er, wir, ihr, sie); "" for all other verbs
+
+	The file is read and parsed once per process (see get_lexicon()); every call returns
+	the same shared list, which must not be modified.
 
 	Return:
-		list[tuple[str, str, str, str, str, str]]
+		list[tuple[str, str, str, str, str]]
 	"""
-	# file = open(os.environ["VERB_DATA_DIR"] + "/" + "verbs.txt", "r")
-	file = open("data" + "/" + "verbs.txt", "r")
-	lines = file.readlines()
-	file.close()
+	return get_lexicon().verbs
 
+def parse_irregular_verbs(lines : list) -> list:
+	"""Split the lines of verbs.txt into the verb-tuples described in get_irregular_verbs()."""
 	verbs = []
 	for line in lines:
 		verb = (line.rstrip("\n")).split(",")[:-1] # remove the newline as well
+		if len(verb) > IrregularIdx.CONJUGATION + 1:
+			# the conjugation column is itself a comma separated list: (bin,bist,ist,sein,seid,sein)
+			conjugation = ",".join(verb[IrregularIdx.CONJUGATION:]).strip("()")
+			verb = verb[:IrregularIdx.CONJUGATION] + [tuple(conjugation.split(","))]
 		verb = tuple(verb)
 		verbs.append(verb)
 	return verbs
 
-def find_verb_matches(word : str, verbs : list) -> list:
+def get_data_dir() -> str:
+	"""Return the directory holding verbs.txt and prefixes.txt: $VERB_DATA_DIR, else the bundled data directory."""
+	return os.environ.get("VERB_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+class SuffixIndex:
+	"""
+	Reversed-string trie over the infinitives of the irregular verbs.
+
+	Each infinitive is inserted back to front, so walking a word from its last
+	character finds every infinitive the word ends with in O(len(word)),
+	independent of how many verbs there are.
+
+	Methods:
+		longest_match(self, word : str) -> tuple
+			get the verb-tuple whose infinitive is the longest suffix of <word>
+		all_matches(self, word : str) -> list
+			get every verb-tuple whose infinitive is a suffix of <word>, longest first
+		updated(self, verbs : list, changed) -> SuffixIndex
+			get the index of <verbs>, which differ from this index's verbs in the <changed> infinitives only
 	"""
-	Return all verb-tuples that end with <word>.
+
+	_ROWS = "" # node key holding the verb-tuples ending at that node, never a character
+
+	def __init__(self, verbs : list):
+		"""
+		Construct the index.
+
+		Parameters:
+			verbs: list[tuple[str, str, str, str, str]] --> list holding the irregular verb information.
+		"""
+		self._root = {}
+		for verb in verbs:
+			if len(verb) <= IrregularIdx.INFINITIVE:
+				continue
+			node = self._root
+			for char in reversed(verb[IrregularIdx.INFINITIVE]):
+				node = node.setdefault(char, {})
+			node.setdefault(self._ROWS, []).append(verb)
+
+	def _walk(self, word : str):
+		"""Yield the verb-tuple lists of every infinitive ending <word>, shortest first."""
+		node = self._root
+		for char in reversed(word):
+			node = node.get(char)
+			if node is None:
+				return
+			if self._ROWS in node:
+				yield node[self._ROWS]
+
+	def longest_match(self, word : str) -> tuple:
+		"""Return the verb-tuple with the longest infinitive ending <word>, or () if there is none."""
+		longest = ()
+		for rows in self._walk(word):
+			longest = rows[0] # duplicates keep the first listed row
+		return longest
+
+	def all_matches(self, word : str) -> list:
+		"""Return all verb-tuples whose infinitive ends <word>, longest infinitive first."""
+		matches = []
+		for rows in self._walk(word):
+			matches = rows + matches
+		return matches
+
+	def updated(self, verbs : list, changed):
+		"""
+		Return the index of <verbs>, whose rows differ from this index's in the <changed> infinitives only.
+
+		This index is left untouched: the new one only copies the nodes on the paths of the
+		<changed> infinitives and shares all others with it.
+		"""
+		changed = set(changed)
+		rows = {}
+		for verb in verbs:
+			if len(verb) > IrregularIdx.INFINITIVE and verb[IrregularIdx.INFINITIVE] in changed:
+				rows.setdefault(verb[IrregularIdx.INFINITIVE], []).append(verb)
+		index = SuffixIndex([])
+		index._root = _path_copy(self._root, {infinitive[::-1] : rows.get(infinitive) for infinitive in changed}, self._ROWS)
+		return index
+
+
+def _path_copy(root : dict, paths : dict, marker : str) -> dict:
+	"""
+	Return a copy of trie <root> in which the node at the end of each key path of <paths> holds paths[path]
+	under <marker>, or nothing if it is None. Only the nodes along those paths are copied; the copy shares
+	every other node with <root>, which is left untouched.
+	"""
+	root = dict(root)
+	copied = {id(root)}
+	for (path, value) in paths.items():
+		node = root
+		trail = []
+		for char in path:
+			child = node.get(char)
+			if child is None or id(child) not in copied:
+				child = dict(child) if child is not None else {}
+				copied.add(id(child))
+				node[char] = child
+			trail.append((node, char))
+			node = child
+		if value is None:
+			node.pop(marker, None)
+		else:
+			node[marker] = value
+		for (parent, char) in reversed(trail): # drop the nodes left empty
+			if parent[char]:
+				break
+			del parent[char]
+	return root
+
+
+class Lexicon:
+	"""
+	The irregular verb information of one data directory, parsed once.
+
+	Attributes:
+		path : str --> path of the verbs.txt the lexicon was read from
+		source_hash : str --> sha256 of that file's contents, computed on first use
+		checksum : str --> CRC-32 of that file's contents, cheap enough to check on every start (see ConjugationContext.from_frozen())
+		verbs : list --> verb-tuples as returned by get_irregular_verbs()
+		suffix_index : SuffixIndex --> index over <verbs> used by find_verb_matches()
+	"""
+
+	SNAPSHOT_VERSION = 3
+
+	def __init__(self, path : str, source_hash : str, verbs : list, suffix_index : SuffixIndex = None, checksum : str = ""):
+		self.path = path
+		self._source_hash = source_hash
+		self._source = None # contents of the file, until source_hash is computed from them
+		self.checksum = checksum
+		self.verbs = verbs
+		self.suffix_index = suffix_index if suffix_index is not None else SuffixIndex(verbs)
+
+	@property
+	def source_hash(self) -> str:
+		if self._source_hash is None:
+			import hashlib
+			self._source_hash = hashlib.sha256(self._source).hexdigest()
+			self._source = None
+		return self._source_hash
+
+	@staticmethod
+	def checksum_of(data : bytes) -> str:
+		"""Return the checksum of file contents <data>, as the checksum attribute."""
+		import zlib
+		return f"{zlib.crc32(data):08x}"
+
+	@classmethod
+	def from_file(cls, path : str):
+		"""Parse the lexicon from the verbs.txt at <path>."""
+		with open(path, "rb") as file:
+			data = file.read()
+		lines = data.decode("utf-8").splitlines(keepends = True)
+		lexicon = cls(path, None, parse_irregular_verbs(lines), checksum = cls.checksum_of(data))
+		lexicon._source = data
+		return lexicon
+
+	@classmethod
+	def from_snapshot(cls, path : str, snapshot : str):
+		"""
+		Load the lexicon of the verbs.txt at <path> from the snapshot file <snapshot>.
+
+		Returns None if the snapshot is missing, unreadable or stale. A snapshot is stale when the
+		mtime/size it recorded differ from the source file's and so does the source's sha256.
+		"""
+		import hashlib
+		import pickle
+		try:
+			with open(snapshot, "rb") as file:
+				state = pickle.load(file)
+		except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+			return None
+		if not isinstance(state, dict) or state.get("version") != cls.SNAPSHOT_VERSION:
+			return None
+
+		stat = os.stat(path)
+		if (state["mtime_ns"], state["size"]) != (stat.st_mtime_ns, stat.st_size):
+			with open(path, "rb") as file:
+				if hashlib.sha256(file.read()).hexdigest() != state["source_hash"]:
+					return None
+		return cls(path, state["source_hash"], state["verbs"], state["suffix_index"], state["checksum"])
+
+	def write_snapshot(self, snapshot : str):
+		"""Write the parsed lexicon and its index to <snapshot>, replacing any previous one atomically."""
+		import pickle
+		stat = os.stat(self.path)
+		state = {"version" : self.SNAPSHOT_VERSION,
+				 "mtime_ns" : stat.st_mtime_ns,
+				 "size" : stat.st_size,
+				 "source_hash" : self.source_hash,
+				 "checksum" : self.checksum,
+				 "verbs" : self.verbs,
+				 "suffix_index" : self.suffix_index}
+		temp = snapshot + ".tmp." + str(os.getpid())
+		with open(temp, "wb") as file:
+			pickle.dump(state, file, protocol = pickle.HIGHEST_PROTOCOL)
+		os.replace(temp, snapshot)
+
+
+_lexicons = {} # verbs.txt path : Lexicon
+
+def get_lexicon(data_dir : str = None, snapshot : str = None) -> Lexicon:
+	"""
+	Return the Lexicon of <data_dir>, loading it on the first call only.
+
+	Parameters:
+		data_dir (default get_data_dir()) : str --> directory holding verbs.txt
+		snapshot (default $VERB_SNAPSHOT) : str --> optional precompiled snapshot file.
+			A valid snapshot is loaded instead of parsing verbs.txt; a missing or stale one is (re)written.
+	Return:
+		Lexicon --> the memoized lexicon, shared by every caller within the process.
+	"""
+	path = os.path.join(data_dir if data_dir is not None else get_data_dir(), "verbs.txt")
+	lexicon = _lexicons.get(path)
+	if lexicon is None:
+		snapshot = snapshot if snapshot is not None else os.environ.get("VERB_SNAPSHOT")
+		if snapshot:
+			lexicon = Lexicon.from_snapshot(path, snapshot)
+		if lexicon is None:
+			lexicon = Lexicon.from_file(path)
+			if snapshot:
+				lexicon.write_snapshot(snapshot)
+		_lexicons[path] = lexicon
+	return lexicon
+
+def clear_lexicons():
+	"""Forget every loaded lexicon (and the contexts built on them) so that the next get_lexicon() reloads it from disk."""
+	_lexicons.clear()
+	clear_contexts()
+
+
+_suffix_index_cache = (None, None) # (verbs list, its SuffixIndex)
+
+def get_suffix_index(verbs : list) -> SuffixIndex:
+	"""Return the SuffixIndex of <verbs>, reusing the last one built if it is for the same list."""
+	global _suffix_index_cache
+	for lexicon in _lexicons.values():
+		if lexicon.verbs is verbs:
+			return lexicon.suffix_index
+	(cached_verbs, index) = _suffix_index_cache
+	if cached_verbs is not verbs:
+		index = SuffixIndex(verbs)
+		_suffix_index_cache = (verbs, index)
+	return index
+
+def find_verb_matches(word : str, verbs) -> list:
+	"""
+	Return the verb-tuple whose infinitive is the longest ending of <word>.
 	
-		Construct a list of matches by comparing <word> with the infinitive in <verbs> and if they
-		end identically. If so, it is added to the list.
+		Looks <word> up in the SuffixIndex of <verbs>. The index is built once per list
+		and reused by subsequent calls with the same list.
 
 		Parameters:
 			word: str --> string to compare the irregular verbs to.
-			verbs: list[tuple[str, str, str, str, str]] --> list holding the irregular verb information.
+			verbs: list[tuple[str, str, str, str, str]] or SuffixIndex --> the irregular verb information.
 		Return:
-			list[tuple[str, str, str, str, str]] --> list of irregular verb-tuples that match the word-ending regex pattern.
+			tuple[str, str, str, str, str] --> the longest matching irregular verb-tuple, [] if none match.
+	"""
+	index = verbs if isinstance(verbs, SuffixIndex) else get_suffix_index(verbs)
+	match = index.longest_match(word)
+	return match if match else []
+
+
+def construct_verb(word : str, prefix : tuple, root : v.Verb, lazy : bool = False, context = None) -> v.Verb:
 	"""
-	matches = [verb for verb in verbs if re.findall("(" + verb[IrregularIdx.INFINITIVE] + ")" + "$", word) != []]
-	return matches[0] if len(matches) > 0 else []
+	Construct the Verb of compound <word> from the Verb of its <root>, overwriting the stems derived by __init__().
 
+	The compound is of the root's class and takes its stems from the root's. Its simple forms are
+	read off the root's conjugations, so <root> should be conjugated (see ConjugationContext.classify()).
 
-def construct_verb(word : str, match : tuple) -> v.Verb:
-	"""Construct a Verb object manually by overwriting stem values from __init__()."""
-	remainder = word[:-len(match[IrregularIdx.INFINITIVE])]
-	verb = v.Verb()
-	verb.past_stem = remainder + match[IrregularIdx.PAST_STEM]
-	# TODO: fill with the other values
+	Parameters:
+		word : str --> the compound's infinitive, <prefix> + <root>'s
+		prefix : tuple[str, bool] --> the prefix (separable particles separated by spaces) and whether it is separable
+		root : Verb --> the root
+		lazy, context --> see Verb
+	"""
+	(text, is_separable) = prefix
+	verb = type(root)(infinitive = word, use_haben = root._use_haben, prefix = prefix, lazy = lazy, context = context)
+	glued = "" if is_separable else text
+	verb.stem = glued + root.stem
+	verb.past_stem = glued + root.past_stem
+	verb.imperative_stem = glued + root.imperative_stem
+	verb.subjunctive1_stem = glued + root.subjunctive1_stem
+	verb.subjunctive2_stem = glued + root.subjunctive2_stem
+	if root._overrides:
+		verb._overrides = {index : glued + form for (index, form) in root._overrides.items()}
+	if is_separable:
+		verb.participle = text.replace(" ", "") + root.participle # an + gefangen
+	else:
+		verb.participle = text + (root.participle[2:] if root.participle.startswith("ge") else root.participle) # ver + gangen
+	verb._root = root
 	return verb
 
-def get_prefixes() -> str:
-	"""Retrieve the prefixes from the file as a single regex expression."""
-	file = open(os.environ["VERB_DATA_DIR"] + "/" + "prefix.txt", "r")
-	lines = file.readlines()
-	file.close()
+# weak verbs that compounds are commonly built on (aufmachen, verkaufen, abholen); a weak word is only split
+# into prefixes and a root found here, never by the root's spelling alone (abonnieren is not ab + onnieren)
+_WEAK_ROOTS = frozenset((
+	"achten", "ändern", "antworten", "arbeiten", "atmen", "bauen", "bessern", "bilden", "blättern", "brauchen",
+	"danken", "decken", "dienen", "drehen", "drucken", "drücken", "eignen", "eilen", "fassen", "fehlen", "feiern",
+	"fertigen", "fordern", "fragen", "freuen", "fügen", "führen", "füllen", "glauben", "grenzen", "grüßen", "handeln",
+	"häufen", "heben", "heilen", "heizen", "hetzen", "holen", "hören", "jagen", "kämpfen", "kaufen", "kehren",
+	"klären", "kleben", "klingeln", "klopfen", "kochen", "kümmern", "lachen", "laden", "landen", "leben", "legen",
+	"lehnen", "lehren", "leiten", "lenken", "lernen", "leuchten", "lösen", "machen", "malen", "melden", "merken",
+	"nutzen", "nützen", "öffnen", "ordnen", "packen", "passen", "planen", "prägen", "prüfen", "putzen", "rahmen",
+	"räumen", "rechnen", "reden", "regeln", "reichen", "reinigen", "reisen", "reißen", "richten", "rücken", "sagen",
+	"sammeln", "schalten", "schauen", "schenken", "schicken", "schildern", "schmecken", "schneiden", "schöpfen",
+	"schütteln", "schützen", "segnen", "setzen", "sichern", "spannen", "sparen", "spielen", "stärken", "stecken",
+	"stellen", "stimmen", "stören", "strafen", "stützen", "suchen", "tauschen", "teilen", "töten", "trauen",
+	"trennen", "üben", "wachen", "wählen", "wandeln", "wandern", "warten", "wechseln", "wecken", "wehren", "weisen",
+	"werten", "wirken", "wohnen", "wundern", "zahlen", "zählen", "zeichnen", "zeigen", "zielen", "zweifeln"))
+
+def _is_known_root(root : str) -> bool:
+	"""Return True if <root> is a weak verb compounds are built on (see _WEAK_ROOTS)."""
+	return root in _WEAK_ROOTS
+
+def expand_pattern(pattern : str) -> list:
+	"""
+	Return every string matched by <pattern>, a prefixes.txt pattern.
+
+	Patterns only use the regex subset literals, [abc] classes, (x|y) groups and ? after a
+	character, class or group, e.g. "da(r|(bei))?" --> ["da", "dar", "dabei"].
+	"""
+	def parse_alternatives(pos : int) -> tuple:
+		(strings, pos) = parse_sequence(pos)
+		alternatives = list(strings)
+		while pos < len(pattern) and pattern[pos] == "|":
+			(strings, pos) = parse_sequence(pos + 1)
+			alternatives.extend(strings)
+		return (alternatives, pos)
+
+	def parse_sequence(pos : int) -> tuple:
+		strings = [""]
+		while pos < len(pattern) and pattern[pos] not in "|)":
+			char = pattern[pos]
+			if char == "(":
+				(atom, pos) = parse_alternatives(pos + 1)
+				if pos >= len(pattern) or pattern[pos] != ")":
+					raise ValueError(f"unbalanced parenthesis in prefix pattern {pattern!r}")
+				pos += 1
+			elif char == "[":
+				end = pattern.index("]", pos)
+				atom = list(pattern[pos + 1:end])
+				pos = end + 1
+			else:
+				atom = [char]
+				pos += 1
+			if pos < len(pattern) and pattern[pos] == "?":
+				atom = [""] + atom
+				pos += 1
+			strings = [string + suffix for string in strings for suffix in atom]
+		return (strings, pos)
+
+	(strings, pos) = parse_alternatives(0)
+	if pos != len(pattern):
+		raise ValueError(f"unbalanced parenthesis in prefix pattern {pattern!r}")
+	return list(dict.fromkeys(strings)) # unique, in order
+
+
+class PrefixAutomaton:
+	"""
+	Trie of the verbal prefixes, built once from prefixes.txt.
+
+	Prefixes are read left to right from the start of a word, so stacked prefixes
+	(wieder + auf + nehmen) are found in a single pass without any regex backtracking.
+	A prefix is only stripped if what remains still has a vowel, i.e. can be a root.
+
+	Methods:
+		prefixes(self) -> list
+			get every (prefix, is_separable) in the automaton
+		match_at(self, word : str, start : int = 0) -> list
+			get every (prefix, is_separable) starting at <start>, longest first
+		strip(self, word : str) -> tuple
+			greedily strip the longest prefix until none is left
+		updated(self, flags : dict) -> PrefixAutomaton
+			get the automaton with some prefixes changed
+		splits(self, word : str) -> list
+			get every way of splitting <word> into prefixes and a root
+	"""
+
+	_END = "" # node key holding the is_separable flag of the prefix ending at that node, never a character
+
+	def __init__(self, prefixes : list):
+		"""
+		Construct the automaton.
+
+		Parameters:
+			prefixes : list[tuple[str, bool]] --> (prefixes.txt pattern, is_separable) pairs
+		"""
+		self._root = {}
+		for (pattern, is_separable) in prefixes:
+			for prefix in expand_pattern(pattern):
+				node = self._root
+				for char in prefix:
+					node = node.setdefault(char, {})
+				node.setdefault(self._END, is_separable) # the first listed flag wins
+
+	@classmethod
+	def from_file(cls, path : str):
+		"""Read the automaton from the prefixes.txt at <path>."""
+		with open(path, "r", encoding = "utf-8") as file:
+			lines = file.readlines()
+		return cls(parse_prefixes(lines[1:])) # skip the header
+
+	def updated(self, flags : dict):
+		"""
+		Return the automaton with the prefixes of <flags> changed to their is_separable flag, or removed if it is None.
+
+		This automaton is left untouched: the new one only copies the nodes on the paths of the
+		changed prefixes and shares all others with it.
+		"""
+		automaton = PrefixAutomaton([])
+		automaton._root = _path_copy(self._root, flags, self._END)
+		return automaton
+
+	def prefixes(self) -> list:
+		"""Return every (prefix, is_separable) in the automaton, in alphabetical order."""
+		found = []
+		def walk(node : dict, prefix : str):
+			for (char, child) in sorted(node.items()):
+				if char == self._END:
+					found.append((prefix, child))
+				else:
+					walk(child, prefix + char)
+		walk(self._root, "")
+		return found
+
+	def match_at(self, word : str, start : int = 0) -> list:
+		"""Return every (prefix, is_separable) of <word> starting at index <start> that leaves a root, longest first."""
+		matches = []
+		node = self._root
+		for end in range(start, len(word)):
+			node = node.get(word[end])
+			if node is None:
+				break
+			if self._END in node and _has_vowel(word, end + 1):
+				matches.append((word[start:end + 1], node[self._END]))
+		matches.reverse()
+		return matches
+
+	def strip(self, word : str) -> tuple:
+		"""
+		Greedily strip the longest prefix off <word> until none is left.
+
+		Return:
+			tuple[list[tuple[str, bool]], str] --> the (prefix, is_separable) pairs found, in order, and the root.
+		"""
+		prefixes = []
+		start = 0
+		while True:
+			matches = self.match_at(word, start)
+			if not matches:
+				break
+			prefixes.append(matches[0])
+			start += len(matches[0][0])
+		return (prefixes, word[start:])
+
+	def splits(self, word : str) -> list:
+		"""
+		Return every way of splitting <word> into stacked prefixes and a root, including no prefix at all.
 
-	# append each line (excluding the new line) within an OR capture
-	prefixes = "^("
+		Return:
+			list[tuple[list[tuple[str, bool]], str]] --> (prefixes, root) splits, the most prefix characters first.
+		"""
+		splits = []
+		def walk(start : int, prefixes : list):
+			splits.append((prefixes, word[start:]))
+			for match in self.match_at(word, start):
+				walk(start + len(match[0]), prefixes + [match])
+		walk(0, [])
+		splits.sort(key = lambda split: len(split[1]))
+		return splits
+
+def parse_prefixes(lines : list) -> list:
+	"""Return the (pattern, is_separable) pairs of the lines of prefixes.txt (without its header)."""
+	prefixes = []
 	for line in lines:
-		prefixes += "(" + line[:-1] + ")|"
-	prefixes =  prefixes[:-1] + ")" # remove last/redundant "|"
+		fields = line.strip().split(",")
+		if fields[0]:
+			prefixes.append((fields[0], fields[1].strip().lower() == "true"))
 	return prefixes
 
+def _has_vowel(word : str, start : int) -> bool:
+	"""Return True if <word> has a vowel at or after index <start>."""
+	for char in word[start:]:
+		if char in "aeiouyäöü":
+			return True
+	return False
 
-def get_last_prefix(matches : tuple):
-	"""Return the last non-empty element in tuple <matches>."""
-	prefix_match = ""
-	for match in matches:
-		if match:
-			prefix_match = match # the previous match is overwritten.
-	return prefix_match
 
+_prefix_automata = {} # prefixes.txt path : PrefixAutomaton
 
-def get_prefix(word : str, prefixes_expr: str) -> tuple:
+def get_prefixes(data_dir : str = None) -> PrefixAutomaton:
+	"""Return the PrefixAutomaton of prefixes.txt in <data_dir> (default get_data_dir()), building it on the first call only."""
+	path = os.path.join(data_dir if data_dir is not None else get_data_dir(), "prefixes.txt")
+	automaton = _prefix_automata.get(path)
+	if automaton is None:
+		automaton = PrefixAutomaton.from_file(path)
+		_prefix_automata[path] = automaton
+	return automaton
+
+
+def get_prefix(word : str, prefixes : PrefixAutomaton = None) -> tuple:
 
 	"""
 	Extract the prefixes from provided <word>.
 	
-	Continuously appends consecutive prefixes to string <prefixes> in order to obtain
-	a string containing all of the contained prefixes within <word> that
-	adhere to the <prefixes> regex pattern. As a result, as <prefixes> expands,
-	the remaining length of <word> decreases, eventually reducing it to its
-	unprefixed root.
+	Strips consecutive prefixes off the front of <word> with the prefix automaton, always
+	taking the longest one, which reduces <word> to its unprefixed root.
 
 	Parameters:
 		word : str --> word to extract the prefixes from.
-		prefixes_expr : str -->  regex expression containing all valid verbal prefixes.
+		prefixes (default get_prefixes()) : PrefixAutomaton --> automaton of all valid verbal prefixes.
 	Return:
 		tuple[str, str] --> [0]: The resulting string from appending all of the consecutively found prefixes in <word>.
 							[1]: The resulting string from removing the found prefixes from <word> within <word> (the root).
 	"""
-	prefixes = ""
-	prefix = ""
-	root = ""
-	while(1):
-		# keep extracting last prefix matched until all have been found.
-		word = word[len(prefix):]
-		found_prefixes = re.findall(prefixes_expr, word)
-		if found_prefixes == []:
-			break
-		found_prefixes = found_prefixes[0] # list is a singleton
-		prefix = get_last_prefix(found_prefixes)
-		prefixes += prefix
-	root = word
-	return (prefixes, root)
-
-def determine_verb_class(word : str, matches : list[tuple[str, str, str, str, str]]) -> v.Verb:
-	'''Determines verb class based on presence within irregular matches and found properties'''
-	verb = None
-	found = False
+	prefixes = prefixes if prefixes is not None else get_prefixes()
+	(found, root) = prefixes.strip(word)
+	return ("".join(prefix for (prefix, is_separable) in found), root)
+
+
+_FOLDED_LETTERS = str.maketrans({"ä" : "ae", "ö" : "oe", "ü" : "ue", "ß" : "ss"})
+_BARE_LETTERS = str.maketrans({"ä" : "a", "ö" : "o", "ü" : "u", "ß" : "ss"})
+
+def fold(word : str) -> str:
+	"""Return <word> lowercased and spelled without umlauts or ß, however it was typed: 'Lächeln', 'laecheln' -> 'laecheln'."""
+	return word.lower().translate(_FOLDED_LETTERS)
+
+def strip_umlauts(word : str) -> str:
+	"""Return <word> lowercased, with its umlauts typed as bare vowels and ß as ss: 'Lächeln' -> 'lacheln'."""
+	return word.lower().translate(_BARE_LETTERS)
+
+class NormalizationIndex:
+	"""
+	Folded spellings (see fold()) of the irregular infinitives and of the prefixes, mapped to their canonical spelling.
+
+	Restores the spelling of input typed without a German keyboard or in another case:
+	'beissen' -> 'beißen', 'Moegen' -> 'mögen', 'zurueckgeben' -> 'zurückgeben'. A digraph is
+	never read as a bare vowel, so 'faellen' does not become 'fallen'. Umlauts typed as bare
+	vowels ('mogen') are only suggested (see suggest()) or restored on request: the bare spelling
+	is often a verb of its own ('wagen', not 'wägen'). A simple verb is resolved with a dictionary
+	lookup per spelling; a compound with one per prefix split of it. Only the irregular verbs'
+	spellings are known, so other verbs are just lowercased ('lacheln' stays 'lacheln').
+
+	Methods:
+		resolve(self, word : str, bare_vowels : bool = False) -> tuple
+			get the canonical spelling of <word> and whether it differs
+		suggest(self, word : str) -> str
+			get the irregular verb <word> may be with its umlauts typed as bare vowels
+		updated(self, verbs : list, infinitives : set, prefixes : dict) -> NormalizationIndex
+			get the index with the spellings of some verbs and prefixes changed
+	"""
+
+	def __init__(self, verbs : list, prefixes : PrefixAutomaton):
+		"""
+		Construct the index.
+
+		Parameters:
+			verbs : list --> the irregular verb information (see get_irregular_verbs())
+			prefixes : PrefixAutomaton --> the verbal prefixes
+		"""
+		self._spellings = [] # (spelling, infinitives, prefixes, prefix automaton), by priority
+		for spell in (fold, strip_umlauts):
+			infinitives = {} # spelled : canonical
+			for verb in verbs[1:]: # skip the header
+				infinitives.setdefault(spell(verb[IrregularIdx.INFINITIVE]), verb[IrregularIdx.INFINITIVE])
+			prefix_spellings = {} # spelled : canonical
+			for (prefix, is_separable) in prefixes.prefixes():
+				prefix_spellings.setdefault(spell(prefix), prefix)
+			automaton = PrefixAutomaton([(prefix, False) for prefix in prefix_spellings])
+			self._spellings.append((spell, infinitives, prefix_spellings, automaton))
+
+	def resolve(self, word : str, bare_vowels : bool = False) -> tuple:
+		"""
+		Return the canonical spelling of <word>.
+
+		A word typed with umlauts or ß keeps them: 'fällen' is not respelled 'fallen'.
+
+		Parameters:
+			word : str --> the word as typed
+			bare_vowels (default False) : bool --> also read bare vowels as umlauts ('mogen' -> 'mögen') if the
+				folded spelling is unknown; this respells verbs such as 'wagen' as another ('wägen')
+		Return:
+			tuple[str, bool] --> the canonical spelling and whether a normalization was applied
+		"""
+		lower = word.lower()
+		canonical = self._lookup(self._spellings[0], lower)
+		if canonical is None and bare_vowels:
+			canonical = self._lookup(self._spellings[1], lower)
+		if canonical is None or (canonical != lower and lower != lower.translate(_FOLDED_LETTERS)):
+			canonical = lower
+		return (canonical, canonical != word)
+
+	def suggest(self, word : str) -> str:
+		"""Return the irregular verb <word> spells with bare vowels for its umlauts ('mogen' -> 'mögen'), None if there is none."""
+		lower = word.lower()
+		if lower != lower.translate(_FOLDED_LETTERS) or self._lookup(self._spellings[0], lower) is not None:
+			return None
+		return self._lookup(self._spellings[1], lower)
+
+	def updated(self, verbs : list, infinitives : set, prefixes : dict):
+		"""
+		Return the index of <verbs> with the spellings of <infinitives> and of the keys of <prefixes> changed.
+
+		This index is left untouched: the new one copies its dictionaries without respelling them,
+		and only path-copies the changed prefixes into its prefix automata (see PrefixAutomaton.updated()).
+
+		Parameters:
+			verbs : list --> the irregular verb information, <infinitives> included
+			infinitives : set[str] --> infinitives whose rows were added, changed or removed
+			prefixes : dict[str, bool] --> changed prefixes, to their is_separable flag or None if they were removed
+		"""
+		index = NormalizationIndex.__new__(NormalizationIndex)
+		index._spellings = []
+		for (spell, infinitive_spellings, prefix_spellings, automaton) in self._spellings:
+			infinitive_spellings = {key : canonical for (key, canonical) in infinitive_spellings.items() if canonical not in infinitives}
+			for verb in verbs[1:]: # skip the header
+				if len(verb) > IrregularIdx.INFINITIVE and verb[IrregularIdx.INFINITIVE] in infinitives:
+					infinitive_spellings.setdefault(spell(verb[IrregularIdx.INFINITIVE]), verb[IrregularIdx.INFINITIVE])
+			(prefix_spellings, flags) = (dict(prefix_spellings), {})
+			for (prefix, is_separable) in prefixes.items():
+				key = spell(prefix)
+				if is_separable is None and prefix_spellings.get(key) == prefix:
+					del prefix_spellings[key]
+					flags[key] = None
+				elif is_separable is not None and key not in prefix_spellings:
+					prefix_spellings[key] = prefix
+					flags[key] = False
+			automaton = automaton.updated(flags) if flags else automaton
+			index._spellings.append((spell, infinitive_spellings, prefix_spellings, automaton))
+		return index
+
+	@staticmethod
+	def _lookup(spelling : tuple, lower : str) -> str:
+		"""Return the canonical spelling of lowercase <lower> under <spelling> (an entry of _spellings), None if unknown."""
+		(spell, infinitives, prefix_spellings, automaton) = spelling
+		key = spell(lower)
+		canonical = infinitives.get(key)
+		if canonical is None:
+			for (found, root) in reversed(automaton.splits(key)): # longest root first
+				if found and root in infinitives:
+					return "".join(prefix_spellings[prefix] for (prefix, _) in found) + infinitives[root]
+		return canonical
+
+def get_parts(match : tuple) -> dict:
+	"""Return the parts dictionary overriding a Verb's stems from irregular verb-tuple <match> ({} if there is none)."""
 	parts = {}
-	found = len(matches) > 0
-	if found:
-		# update parts dictionary
-		parts = {"present" : matches[IrregularIdx.INFINITIVE],
-				 "past" : matches[IrregularIdx.PAST_STEM],
-				 "participle" : matches[IrregularIdx.PARTICIPLE],
+	if len(match) > 0:
+		parts = {"present" : match[IrregularIdx.INFINITIVE],
+				 "past" : match[IrregularIdx.PAST_STEM],
+				 "participle" : match[IrregularIdx.PARTICIPLE],
 				 "conjugation" : ()
 				 }
-		if len(matches) > IrregularIdx.CONJUGATION:
-			parts["conjugation"] = matches[IrregularIdx.CONJUGATION]
+		if len(match) > IrregularIdx.CONJUGATION:
+			parts["conjugation"] = match[IrregularIdx.CONJUGATION]
+	return parts
 
-	
+def determine_verb_class(word : str,
+						 matches : list[tuple[str, str, str, str, str]],
+						 context,
+						 lazy : bool = False) -> v.Verb:
+	'''
+	Determines verb class based on presence within irregular matches and found properties.
+
+	Parameters:
+		word : str --> the infinitive to classify
+		matches : tuple[str] --> its row of irregular verb information (see find_verb_matches()), empty if weak
+		context : ConjugationContext --> required: the context of the lexicon <matches> come from, whose auxiliaries
+			build the verb's perfect and future tenses (there is no default context to fall back on)
+		lazy (default False) : bool --> see Verb
+	Return:
+		Verb --> a Strong, Mixed or Weak verb of <context>
+	'''
+	verb = None
+	parts = get_parts(matches)
+	if len(parts) > 0:
 		# strong or mixed?
 		if (matches[IrregularIdx.CATEGORY] == "M") or \
 		(matches[IrregularIdx.CATEGORY] == "PP"):
-			verb = v.Mixed(infinitive = word, use_haben = True, parts = parts)
+			verb = v.Mixed(infinitive = word, use_haben = True, parts = parts, lazy = lazy, context = context)
 		else:
-			verb = v.Strong(infinitive = word, use_haben = True, parts = parts)
+			verb = v.Strong(infinitive = word, use_haben = True, parts = parts, lazy = lazy, context = context)
 	else:
 		# weak
-		verb = v.Weak(infinitive = word, use_haben = True, parts = parts)
-	return verb
\ No newline at end of file
+		verb = v.Weak(infinitive = word, use_haben = True, parts = parts, lazy = lazy, context = context)
+	return verb
+
+
+class ConjugationContext:
+	"""
+	Everything conjugating needs besides the verb itself, built once and never modified afterwards.
+
+	A context may be shared freely between threads: classifying and conjugating only read it, so
+	no locking is needed. Several contexts (e.g. of different lexicons) can coexist in one process.
+
+	Compounds (anfangen, zurückgeben, wiederaufnehmen) are built from their root. Decompositions and
+	conjugated roots are memoized, so any number of compounds of "geben" costs one conjugation of it.
+
+	Attributes:
+		lexicon : Lexicon --> the irregular verb information and its suffix index
+		prefixes : PrefixAutomaton --> the verbal prefixes
+		haben, sein, werden : Strong --> the auxiliaries, with their simple present and past cells conjugated
+		normalization : NormalizationIndex --> canonical spellings of the irregular verbs and prefixes
+
+	Methods:
+		classify(self, word : str, lazy : bool = False) -> Verb
+			construct the Verb of <word> in this context
+		decompose(self, word : str) -> tuple
+			split <word> into its separable and inseparable prefixes and root
+		normalize(self, word : str, bare_vowels : bool = False) -> tuple
+			restore the spelling of <word> typed without umlauts, ß or in another case
+		freeze(self, path : str)
+			write the conjugated auxiliaries to <path>, see from_frozen()
+		from_frozen(lexicon : Lexicon, prefixes : PrefixAutomaton, path : str) -> ConjugationContext
+			construct a context with the auxiliaries written by freeze() instead of conjugating them
+	"""
+	__slots__ = ("lexicon", "prefixes", "haben", "sein", "werden", "normalization", "_analyses", "_roots", "__weakref__")
+
+	_AUXILIARIES = (("haben", True), ("sein", False), ("werden", False))
+	FROZEN_VERSION = 3 # of the file format written by freeze()
+
+	def __init__(self, lexicon : Lexicon, prefixes : PrefixAutomaton, auxiliaries : tuple = None,
+				 normalization : NormalizationIndex = None):
+		"""
+		Construct the context of <lexicon> and <prefixes>.
+
+		Parameters:
+			lexicon : Lexicon --> the irregular verb information
+			prefixes : PrefixAutomaton --> the verbal prefixes
+			auxiliaries (default None) : tuple[Strong, Strong, Strong] --> haben, sein and werden, already conjugated;
+				by default they are constructed and conjugated here
+			normalization (default None) : NormalizationIndex --> the spellings of <lexicon> and <prefixes>;
+				by default it is built here
+		"""
+		if auxiliaries is None:
+			auxiliaries = self._make_auxiliaries(lexicon)
+			for auxiliary in auxiliaries:
+				# all that the perfect and future tenses of other verbs need
+				auxiliary.conjugate(aspect = v.Aspect.SIMPLE,
+									tense = (v.Tense.PRESENT, v.Tense.PAST),
+									mood = (v.Mood.INDICATIVE, v.Mood.SUBJUNCTIVE_1, v.Mood.SUBJUNCTIVE_2))
+		for (name, value) in zip(self.__slots__, (lexicon, prefixes) + tuple(auxiliaries)):
+			object.__setattr__(self, name, value)
+		if normalization is None:
+			normalization = NormalizationIndex(lexicon.verbs, prefixes)
+		object.__setattr__(self, "normalization", normalization)
+		# bounded memos; functools.lru_cache is thread-safe
+		object.__setattr__(self, "_analyses", functools.lru_cache(maxsize = 8192)(self._analyse))
+		object.__setattr__(self, "_roots", functools.lru_cache(maxsize = 1024)(self._conjugate_root))
+
+	@classmethod
+	def _make_auxiliaries(cls, lexicon : Lexicon) -> tuple:
+		"""Return haben, sein and werden of <lexicon>, not conjugated yet."""
+		return tuple(v.Strong(infinitive = word, use_haben = use_haben, parts = get_parts(find_verb_matches(word, lexicon.suffix_index)))
+					 for (word, use_haben) in cls._AUXILIARIES)
+
+	@classmethod
+	def from_frozen(cls, lexicon : Lexicon, prefixes : PrefixAutomaton, path : str):
+		"""
+		Construct a context whose auxiliaries' conjugations are read from the file <path> written by freeze().
+
+		Returns None if the file is missing, stale or damaged: written in another format, with other
+		conjugation rules (see verbs.RULES_VERSION) or from a different verbs.txt (by checksum) than
+		<lexicon>'s, or holding another number of cells than its header states, or unparsable.
+		"""
+		try:
+			with open(path, "r", encoding = "utf-8") as file:
+				lines = file.read().splitlines()
+		except (OSError, UnicodeDecodeError):
+			return None
+		(header, _, cells) = lines[0].rpartition(" cells=") if lines else ("", "", "")
+		if not lexicon.checksum or header != cls._frozen_header(lexicon) or cells != str(len(lines) - 1):
+			return None
+		auxiliaries = cls._make_auxiliaries(lexicon)
+		tables = {auxiliary.infinitive : auxiliary.get_table() for auxiliary in auxiliaries}
+		try:
+			for line in lines[1:]:
+				(word, index, form) = line.split(",", 2)
+				tables[word][int(index)] = form
+		except (ValueError, KeyError, IndexError):
+			return None
+		return cls(lexicon, prefixes, auxiliaries)
+
+	@classmethod
+	def _frozen_header(cls, lexicon : Lexicon) -> str:
+		return f"format={cls.FROZEN_VERSION} rules={v.RULES_VERSION} crc32={lexicon.checksum}"
+
+	def freeze(self, path : str):
+		"""
+		Write the conjugated auxiliaries to <path> as "infinitive,table index,form" lines, after a header identifying
+		what they depend on and how many lines follow. Any previous file is replaced atomically.
+		"""
+		lines = []
+		for auxiliary in (self.haben, self.sein, self.werden):
+			table = auxiliary.get_table()
+			lines += [f"{auxiliary.infinitive},{index},{table[index]}" for index in auxiliary.get_filled()]
+		lines.insert(0, f"{self._frozen_header(self.lexicon)} cells={len(lines)}")
+		temp = path + ".tmp." + str(os.getpid())
+		with open(temp, "w", encoding = "utf-8") as file:
+			file.write("\n".join(lines) + "\n")
+		os.replace(temp, path)
+
+	def __setattr__(self, name, value):
+		raise AttributeError(f"{type(self).__name__} is immutable")
+
+	def __delattr__(self, name):
+		raise AttributeError(f"{type(self).__name__} is immutable")
+
+	def classify(self, word : str, lazy : bool = False) -> v.Verb:
+		"""Return the Verb of <word>, classified against this context's lexicon (built from its root if it is a compound)."""
+		(match, decomposition) = self._analyses(word)
+		if decomposition is None:
+			return determine_verb_class(word, match, self, lazy)
+		(particle, inseparable, root) = decomposition
+		if particle:
+			return construct_verb(word, (particle, True), self._roots(root, inseparable), lazy, self)
+		return construct_verb(word, (inseparable, False), self._roots(root, ""), lazy, self)
+
+	def decompose(self, word : str) -> tuple:
+		"""
+		Split <word> into prefixes and root.
+
+		Return:
+			tuple[str, str, str] --> the separable particles (separated by spaces), the inseparable prefixes and the root,
+				None if <word> is not a compound.
+		"""
+		return self._analyses(word)[1]
+
+	def normalize(self, word : str, bare_vowels : bool = False) -> tuple:
+		"""
+		Restore the canonical spelling of <word> (see NormalizationIndex.resolve()).
+
+		Return:
+			tuple[str, bool] --> the canonical spelling and whether a normalization was applied
+		"""
+		return self.normalization.resolve(word, bare_vowels)
+
+	def _analyse(self, word : str) -> tuple:
+		"""Return the irregular match and the decomposition of <word> (see decompose())."""
+		match = find_verb_matches(word, self.lexicon.suffix_index)
+		splits = [(found, root) for (found, root) in self.prefixes.splits(word) if found] # shortest root first
+		if match:
+			# the root must be the irregular verb <word> ends with
+			roots = [split for split in splits if split[1] == match[IrregularIdx.INFINITIVE]]
+		elif word.endswith("ieren"):
+			roots = [] # loanwords (abonnieren, analysieren) merely start like a prefix
+		else:
+			roots = [split for split in splits if _is_known_root(split[1])]
+		if not roots:
+			return (match, None)
+
+		(found, root) = roots[0]
+		separable = 0 # only the leading separable prefixes separate: anerkennen --> erkenne an
+		while separable < len(found) and found[separable][1]:
+			separable += 1
+		particle = " ".join(prefix for (prefix, _) in found[:separable])
+		inseparable = "".join(prefix for (prefix, _) in found[separable:])
+		return (match if match else [], (particle, inseparable, root))
+
+	def _conjugate_root(self, root : str, inseparable : str) -> v.Verb:
+		"""Return the fully conjugated Verb of <inseparable> + <root>, shared by every compound of it."""
+		if inseparable:
+			verb = construct_verb(inseparable + root, (inseparable, False), self._roots(root, ""), context = self)
+		else:
+			verb = determine_verb_class(root, find_verb_matches(root, self.lexicon.suffix_index), self)
+		verb.conjugate()
+		return verb
+
+
+_contexts = {} # (verbs.txt path, prefixes.txt path) : ConjugationContext
+_verbs_context = (None, None) # (verbs list, its ConjugationContext) for lists not loaded by get_lexicon()
+_contexts_lock = threading.Lock()
+
+def get_context(verbs : list = None, data_dir : str = None, frozen : bool = True) -> ConjugationContext:
+	"""
+	Return the ConjugationContext of <data_dir> (default get_data_dir()), building it on the first call only.
+
+	Parameters:
+		verbs (default None) : list --> irregular verb information to use instead of the data directory's verbs.txt;
+			the context of the last such list is reused while the same list is passed
+		data_dir (default get_data_dir()) : str --> directory holding verbs.txt and prefixes.txt
+		frozen (default True) : bool --> read the auxiliaries from the data directory's auxiliaries.txt
+			(see ConjugationContext.freeze()) if it is up to date, instead of conjugating them
+	"""
+	global _verbs_context
+	if verbs is None:
+		data_dir = data_dir if data_dir is not None else get_data_dir()
+		key = (os.path.join(data_dir, "verbs.txt"), os.path.join(data_dir, "prefixes.txt"))
+		context = _contexts.get(key)
+		if context is None:
+			with _contexts_lock:
+				context = _contexts.get(key)
+				if context is None:
+					(lexicon, prefixes) = (get_lexicon(data_dir), get_prefixes(data_dir))
+					if frozen:
+						context = ConjugationContext.from_frozen(lexicon, prefixes, os.path.join(data_dir, "auxiliaries.txt"))
+					if context is None:
+						context = ConjugationContext(lexicon, prefixes)
+					_contexts[key] = context
+		return context
+
+	for lexicon in list(_lexicons.values()):
+		if lexicon.verbs is verbs:
+			return get_context(data_dir = os.path.dirname(lexicon.path), frozen = frozen)
+	with _contexts_lock:
+		(cached_verbs, context) = _verbs_context
+		if cached_verbs is not verbs:
+			if context is not None:
+				v.clear_templates(context)
+			lexicon = Lexicon("", "", verbs, get_suffix_index(verbs))
+			context = ConjugationContext(lexicon, get_prefixes(data_dir))
+			_verbs_context = (verbs, context)
+	return context
+
+def install_context(context : ConjugationContext, data_dir : str = None):
+	"""
+	Make <context> the one get_context() returns for <data_dir> (default get_data_dir()) from now on.
+
+	Its lexicon and prefixes also replace those get_lexicon() and get_prefixes() return. Callers
+	holding the previous context keep using it unchanged, but it is no longer kept alive by the
+	interned conjugation templates.
+	"""
+	data_dir = data_dir if data_dir is not None else get_data_dir()
+	(verbs_path, prefixes_path) = (os.path.join(data_dir, "verbs.txt"), os.path.join(data_dir, "prefixes.txt"))
+	with _contexts_lock:
+		_lexicons[verbs_path] = context.lexicon
+		_prefix_automata[prefixes_path] = context.prefixes
+		previous = _contexts.get((verbs_path, prefixes_path))
+		_contexts[(verbs_path, prefixes_path)] = context
+	if previous is not None and previous is not context:
+		v.clear_templates(previous)
+
+def clear_contexts():
+	"""Forget every built context (and the conjugation templates of their verbs) so that the next get_context() rebuilds it."""
+	global _verbs_context
+	with _contexts_lock:
+		_contexts.clear()
+		_verbs_context = (None, None)
+	v.clear_templates()
@@ -0,0 +1,164 @@
+"""
+Instrumentation
+
+Opt-in timers and counters across the conjugation pipeline, to tell where the time of a
+request goes. Each pipeline stage is timed (calls, total and max time), and the following
+events are counted:
+	- lookups --> find_verb_matches() calls
+	- prefix_matches --> prefix automaton matches attempted (what used to be regex evaluations)
+	- cells_computed --> conjugations constructed, one by one or by conjugate_all()
+	- cache_hits, cache_misses --> ConjugationCache lookups
+
+Instrumentation works by swapping instrumented wrappers in for the functions and methods
+concerned while it is enabled, and the originals back when it is disabled, so there is no
+overhead at all when it is off.
+
+Usage:
+	with instrument.instrumented():
+		conjugator.conjugate_many(words)
+	print(instrument.prometheus())
+"""
+
+import contextlib
+import functools
+import threading
+import time
+
+import conjcache
+import conjutils
+import verbs as v
+
+# (owner, attribute, stage timed or None, counter, count(args, kwargs, result) -> int)
+_TARGETS = (
+	(conjutils.Lexicon, "from_file", "lexicon_load", None, None),
+	(conjutils.Lexicon, "from_snapshot", "lexicon_load", None, None),
+	(conjutils, "find_verb_matches", "suffix_match", "lookups", None),
+	(conjutils.PrefixAutomaton, "strip", "prefix_strip", None, None),
+	(conjutils.PrefixAutomaton, "splits", "prefix_strip", None, None),
+	(conjutils.PrefixAutomaton, "match_at", None, "prefix_matches", None),
+	(conjutils, "determine_verb_class", "class_construction", None, None),
+	(v.Verb, "conjugate", "table_fill", None, None),
+	(v, "conjugate_all", "table_fill", "cells_computed",
+	 lambda args, kwargs, result: len(args[0]) * len(v.cell_indices(*args[1:], **kwargs))),
+	(v.Verb, "_construct", None, "cells_computed", None),
+	(conjcache.ConjugationCache, "get", None, "cache_hits",
+	 lambda args, kwargs, result: 1 if result is not None else 0),
+	(conjcache.ConjugationCache, "get", None, "cache_misses",
+	 lambda args, kwargs, result: 1 if result is None else 0),
+)
+
+STAGES = ("lexicon_load", "suffix_match", "prefix_strip", "class_construction", "table_fill")
+COUNTERS = ("lookups", "prefix_matches", "cells_computed", "cache_hits", "cache_misses")
+
+_lock = threading.Lock()
+_originals = {} # (owner, attribute) : original function, while enabled
+_timers = {} # stage : [calls, total ns, max ns]
+_counters = {} # counter : count
+
+
+def reset():
+	"""Zero every timer and counter."""
+	with _lock:
+		_timers.clear()
+		_timers.update({stage : [0, 0, 0] for stage in STAGES})
+		_counters.clear()
+		_counters.update({counter : 0 for counter in COUNTERS})
+
+reset()
+
+def _record(stage : str, elapsed : int, counts : list):
+	with _lock:
+		if stage is not None:
+			timer = _timers[stage]
+			timer[0] += 1
+			timer[1] += elapsed
+			timer[2] = max(timer[2], elapsed)
+		for (counter, count) in counts:
+			_counters[counter] += count
+
+def _wrap(function, targets : list):
+	"""Return <function> timed and counted as the (stage, counter, count) <targets> describe."""
+	stage = next((stage for (stage, counter, count) in targets if stage is not None), None)
+
+	@functools.wraps(function)
+	def wrapper(*args, **kwargs):
+		start = time.perf_counter_ns()
+		result = function(*args, **kwargs)
+		elapsed = time.perf_counter_ns() - start
+		counts = [(counter, count(args, kwargs, result) if count is not None else 1)
+				  for (_, counter, count) in targets if counter is not None]
+		_record(stage, elapsed, counts)
+		return result
+	return wrapper
+
+def is_enabled() -> bool:
+	return bool(_originals)
+
+def enable():
+	"""Swap the instrumented wrappers in. Timers and counters keep accumulating until reset()."""
+	with _lock:
+		if _originals:
+			return
+		targets = {}
+		for (owner, attribute, stage, counter, count) in _TARGETS:
+			targets.setdefault((owner, attribute), []).append((stage, counter, count))
+		for ((owner, attribute), wrapped) in targets.items():
+			original = owner.__dict__[attribute]
+			_originals[(owner, attribute)] = original
+			function = original.__func__ if isinstance(original, classmethod) else original
+			wrapper = _wrap(function, wrapped)
+			setattr(owner, attribute, classmethod(wrapper) if isinstance(original, classmethod) else wrapper)
+
+def disable():
+	"""Swap the original functions back."""
+	with _lock:
+		for ((owner, attribute), original) in _originals.items():
+			setattr(owner, attribute, original)
+		_originals.clear()
+
+@contextlib.contextmanager
+def instrumented(fresh : bool = True):
+	"""Context manager enabling instrumentation for its body (from zeroed metrics unless <fresh> is False)."""
+	if fresh:
+		reset()
+	was_enabled = is_enabled()
+	enable()
+	try:
+		yield
+	finally:
+		if not was_enabled:
+			disable()
+
+def instrument(function):
+	"""Decorator running every call of <function> with instrumentation enabled (metrics accumulate across calls)."""
+	@functools.wraps(function)
+	def wrapper(*args, **kwargs):
+		with instrumented(fresh = False):
+			return function(*args, **kwargs)
+	return wrapper
+
+def snapshot() -> dict:
+	"""
+	Return the current metrics.
+
+	Return:
+		dict --> {"stages" : {stage : {"calls", "total_seconds", "max_seconds"}}, "counters" : {counter : count}}
+	"""
+	with _lock:
+		return {"stages" : {stage : {"calls" : calls, "total_seconds" : total / 1e9, "max_seconds" : longest / 1e9}
+							for (stage, (calls, total, longest)) in _timers.items()},
+				"counters" : dict(_counters)}
+
+def prometheus(prefix : str = "conjugator") -> str:
+	"""Return the current metrics in the Prometheus text exposition format."""
+	metrics = snapshot()
+	lines = [f"# TYPE {prefix}_stage_calls_total counter"]
+	lines += [f'{prefix}_stage_calls_total{{stage="{stage}"}} {timer["calls"]}' for (stage, timer) in metrics["stages"].items()]
+	lines.append(f"# TYPE {prefix}_stage_seconds_total counter")
+	lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {timer["total_seconds"]:.9f}' for (stage, timer) in metrics["stages"].items()]
+	lines.append(f"# TYPE {prefix}_stage_max_seconds gauge")
+	lines += [f'{prefix}_stage_max_seconds{{stage="{stage}"}} {timer["max_seconds"]:.9f}' for (stage, timer) in metrics["stages"].items()]
+	for (counter, count) in metrics["counters"].items():
+		lines.append(f"# TYPE {prefix}_{counter}_total counter")
+		lines.append(f"{prefix}_{counter}_total {count}")
+	return "\n".join(lines) + "\n"
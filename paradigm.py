@@ -0,0 +1,120 @@
+"""
+Paradigm Templates
+
+Flyweight storage of conjugated verbs. Verbs of one class differ only in their stems and,
+for irregular and preterite-present verbs, the present forms listed in verbs.txt: the endings
+and the auxiliary forms are the same for all of them. So instead of a filled ConjugationTable
+per verb, a Paradigm stores just those stems and overrides, and the template shared by its
+whole class says how each cell is built from them. Forms are materialized when read.
+
+The templates are those verbs are conjugated with (verbs.ConjugationTemplate, here also
+ParadigmTemplate), interned per class, auxiliary (haben/sein), kind of present tense and
+compound kind in a ConjugationContext. The strong categories of verbs.txt (1aL, 7c, ...) thus
+share the Strong template, and M and PP the Mixed ones.
+
+Usage:
+	paradigm = paradigm.Paradigm.from_verb(context.classify("gehen"))
+	paradigm.get_conjugation_at(Tense.PAST, Mood.INDICATIVE, Aspect.SIMPLE, Person.FIRST, Number.SINGULAR)
+"""
+
+import sys
+
+import verbs as v
+
+# the stems a Paradigm stores, in order (those the recipes of verbs.ConjugationTemplate refer to)
+STEMS = v.STEMS
+
+ParadigmTemplate = v.ConjugationTemplate
+template_of = v.template_of
+clear_templates = v.clear_templates
+
+
+class Paradigm:
+	"""
+	A conjugated verb stored as its stems and overrides plus its class's shared template.
+
+	Behaves like a filled ConjugationTable (indexed by table_hash()), whose forms are built on read.
+
+	Attributes:
+		template : ParadigmTemplate --> the shared template of the verb's class
+		stems : tuple --> the verb's STEMS
+		override : mapping --> whole forms of irregular and preterite-present verbs by table index (see verbs.irregular_overrides())
+		prefix : str --> prefix of a compound, "" otherwise
+		root : Paradigm --> paradigm of a compound's root, None otherwise
+
+	Methods:
+		from_verb(verb : Verb, roots : dict = None) -> Paradigm
+			construct the paradigm of a classified verb
+		get_conjugation_at(self, tense : int, mood : int, aspect : int, person : int, number : int) -> str
+			materialize a single form
+		expand(self) -> list
+			materialize every form, as ConjugationTable.expand()
+	"""
+	__slots__ = ("template", "stems", "override", "prefix", "root")
+
+	def __init__(self, template : ParadigmTemplate, stems : tuple, override = v.NO_OVERRIDES, prefix : str = "", root = None):
+		self.template = template
+		self.stems = stems
+		self.override = override
+		self.prefix = prefix
+		self.root = root
+
+	@classmethod
+	def from_verb(cls, verb : v.Verb, roots : dict = None):
+		"""
+		Construct the paradigm of <verb> (which need not be conjugated).
+
+		Parameters:
+			verb : Verb --> a verb, e.g. from ConjugationContext.classify()
+			roots (default None) : dict --> memo of the roots' paradigms, keyed by root Verb; pass the same
+				dict for many compounds so that those of one root share its paradigm
+		"""
+		root = None
+		if verb._root is not None:
+			if roots is None:
+				root = cls.from_verb(verb._root)
+			else:
+				root = roots.get(verb._root)
+				if root is None:
+					root = roots[verb._root] = cls.from_verb(verb._root, roots)
+		stems = tuple(sys.intern(getattr(verb, name)) for name in STEMS)
+		return cls(template_of(verb), stems, verb._overrides, verb._prefix if root is not None else "", root)
+
+	def __len__(self) -> int:
+		return v.n_entries
+
+	def __getitem__(self, index : int) -> str:
+		slot = v.CELL_SLOTS[index]
+		return self._form(self.template.recipes[slot]) if slot >= 0 else ""
+
+	def __iter__(self):
+		return iter(self.expand())
+
+	def __repr__(self) -> str:
+		return f"Paradigm({self.stems[0]!r})"
+
+	def _form(self, recipe : tuple) -> str:
+		op = recipe[0]
+		if op == v.ENDING:
+			return v.add_ending(self.stems[recipe[1]], recipe[2])
+		if op == v.PERIPHRASIS:
+			return recipe[1] + " " + self.stems[recipe[2]] + recipe[3]
+		if op == v.CONSTANT:
+			return recipe[1]
+		if op == v.CONCAT:
+			return self.stems[recipe[1]] + recipe[2]
+		if op == v.OVERRIDE:
+			return self.override[recipe[1]]
+		form = self.root[recipe[1]]
+		if not form:
+			return ""
+		return form + " " + self.prefix if recipe[2] else self.prefix + form
+
+	def get_conjugation_at(self, tense : int, mood : int, aspect : int, person : int, number : int) -> str:
+		"""Return the form of the given cell, as Verb.get_conjugation_at() once the verb is conjugated."""
+		return self[v.table_hash(mood, tense, aspect, person, number)]
+
+	def expand(self) -> list:
+		"""Return every form as a plain list indexed by table_hash()."""
+		recipes = self.template.recipes
+		return [self._form(recipes[slot]) if slot >= 0 else "" for slot in v.CELL_SLOTS]
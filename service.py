@@ -0,0 +1,291 @@
+"""
+Conjugation Service
+
+asyncio front end to the conjugator for async applications, plus a small HTTP server built
+on it (standard library only).
+
+The lexicon and the auxiliaries are set up once, by ConjugationService.start(). Conjugations
+run on an executor so they never block the event loop, and concurrent requests for the same
+infinitive and cells are coalesced into a single computation whose result they all share.
+
+HTTP endpoints (GET, JSON responses):
+	/conjugate?infinitive=gehen[&tense=past,present][&mood=...][&aspect=...][&person=...][&number=...]
+	/stats --> cache and coalescing counters
+	/health
+
+Usage:
+	python service.py [--host HOST] [--port PORT | --unix PATH] [--threads N | --processes N] [--reload S]
+					  [--frequencies FILE [--warm-top N] [--warm-seconds S]
+					   [--warm-tense T] [--warm-mood M] [--warm-aspect A] [--warm-person P] [--warm-number N]]
+
+The warm-up caches the cells selected by the --warm-* options (default all of them), so
+it only serves the requests selecting the same cells: warm the selection the clients ask for.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import sys
+import types
+import urllib.parse
+
+import conjcache
+import conjugator
+import conjutils
+import verbs as v
+
+_SELECTORS = (("tense", v.Tense), ("mood", v.Mood), ("aspect", v.Aspect), ("person", v.Person), ("number", v.Number))
+
+
+def _conjugate(infinitive : str, selection : tuple) -> dict:
+	"""Executor job: return the requested cells of <infinitive> (a plain dict, so it can come back from a process)."""
+	(word, cells) = next(conjugator.iter_conjugations([infinitive], *selection))
+	return cells
+
+
+class ConjugationService:
+	"""
+	Coalescing, cached asynchronous conjugator.
+
+	Attributes:
+		cache : ConjugationCache --> read-only snapshots of the conjugations computed so far
+		computations : int --> conjugations handed to the executor
+		coalesced : int --> requests that waited on an identical computation already in flight
+
+	Methods:
+		start(self)
+			set up the lexicon and the auxiliaries (awaitable, idempotent)
+		conjugate(self, infinitive : str, tense, mood, aspect, person, number) -> mappingproxy
+			conjugate asynchronously (awaitable)
+		serve(self, host : str = "127.0.0.1", port : int = 8080, path : str = None) -> asyncio.AbstractServer
+			start the HTTP server on a TCP port, or a Unix socket if <path> is given (awaitable)
+		close(self)
+			shut the executor down
+	"""
+
+	def __init__(self, executor : concurrent.futures.Executor = None, cache : conjcache.ConjugationCache = None):
+		"""
+		Construct the service.
+
+		Parameters:
+			executor (default a ThreadPoolExecutor) : Executor --> where conjugations run
+			cache (default ConjugationCache()) : ConjugationCache --> cache of finished conjugations
+		"""
+		self._own_executor = executor is None
+		self.executor = executor if executor is not None else concurrent.futures.ThreadPoolExecutor()
+		self.cache = cache if cache is not None else conjcache.ConjugationCache()
+		self.computations = 0
+		self.coalesced = 0
+		self._pending = {} # cache key : task computing it
+		self._starting = None # task loading the context, shared by the concurrent first calls
+
+	async def start(self):
+		"""Load the lexicon and conjugate the auxiliaries, once, off the event loop."""
+		if self._starting is None:
+			self._starting = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(None, conjutils.get_context))
+		starting = self._starting
+		try:
+			await asyncio.shield(starting) # one cancelled caller must not cancel the others
+		except Exception:
+			if self._starting is starting:
+				self._starting = None # let the next call retry
+			raise
+
+	async def conjugate(self,
+						infinitive : str,
+						tense = len(v.Tense),
+						mood = len(v.Mood),
+						aspect = len(v.Aspect),
+						person = len(v.Person),
+						number = len(v.Number)):
+		"""
+		Conjugate <infinitive> without blocking the event loop.
+
+		Parameters are those of conjugator.conjugate().
+		Return:
+			mappingproxy[tuple[Mood, Tense, Aspect, Person, Number], str] --> read-only requested cells
+		"""
+		await self.start()
+		selection = (tense, mood, aspect, person, number)
+		key = conjugator.cache_key(infinitive, v.cell_indices(*selection), conjutils.get_context())
+		forms = self.cache.get(key)
+		if forms is not None:
+			return forms
+
+		task = self._pending.get(key)
+		if task is None:
+			task = asyncio.ensure_future(self._compute(key, infinitive, selection))
+			self._pending[key] = task
+			self.computations += 1
+		else:
+			self.coalesced += 1
+		return await asyncio.shield(task) # one cancelled waiter must not cancel the others
+
+	async def _compute(self, key : tuple, infinitive : str, selection : tuple):
+		try:
+			cells = await asyncio.get_running_loop().run_in_executor(self.executor, _conjugate, infinitive, selection)
+			forms = types.MappingProxyType(cells)
+			self.cache.put(key, forms)
+			return forms
+		finally:
+			del self._pending[key]
+
+	def stats(self) -> dict:
+		"""Return the cache counters plus the computation/coalescing counters."""
+		stats = self.cache.stats()
+		stats.update({"computations" : self.computations, "coalesced" : self.coalesced, "in_flight" : len(self._pending)})
+		return stats
+
+	def close(self):
+		"""Shut the executor down if the service created it."""
+		if self._own_executor:
+			self.executor.shutdown()
+
+	async def serve(self, host : str = "127.0.0.1", port : int = 8080, path : str = None):
+		"""Start the HTTP server (on Unix socket <path> if given) and return the asyncio server."""
+		await self.start()
+		if path is not None:
+			return await asyncio.start_unix_server(self._handle, path = path)
+		return await asyncio.start_server(self._handle, host, port)
+
+	async def _handle(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+		"""Answer one HTTP request, then close the connection."""
+		try:
+			request = (await reader.readline()).decode("latin-1").split()
+			while (await reader.readline()).strip(): # skip the headers
+				pass
+			(status, body) = await self._respond(request)
+		except (ValueError, UnicodeDecodeError, ConnectionError) as error:
+			(status, body) = ("400 Bad Request", {"error" : str(error)})
+		except Exception as error:
+			(status, body) = ("500 Internal Server Error", {"error" : f"{type(error).__name__}: {error}"})
+		data = json.dumps(body, ensure_ascii = False).encode("utf-8")
+		writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json; charset=utf-8\r\n"
+					 f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+		try:
+			await writer.drain()
+		finally:
+			writer.close()
+
+	async def _respond(self, request : list) -> tuple:
+		"""Return the (status, JSON body) answering the split HTTP request line <request>."""
+		if len(request) < 2 or request[0] != "GET":
+			return ("405 Method Not Allowed", {"error" : "only GET is supported"})
+		url = urllib.parse.urlsplit(request[1])
+		query = urllib.parse.parse_qs(url.query)
+		if url.path == "/health":
+			return ("200 OK", {"status" : "ok"})
+		if url.path == "/stats":
+			return ("200 OK", self.stats())
+		if url.path != "/conjugate":
+			return ("404 Not Found", {"error" : f"no such endpoint {url.path}"})
+
+		infinitive = query.get("infinitive", [""])[0].strip()
+		if not infinitive:
+			return ("400 Bad Request", {"error" : "missing infinitive"})
+		selection = []
+		for (name, enum_type) in _SELECTORS:
+			if name in query:
+				try:
+					selection.append(conjugator.parse_enums(query[name][0], enum_type))
+				except argparse.ArgumentTypeError as error:
+					return ("400 Bad Request", {"error" : str(error)})
+			else:
+				selection.append(len(enum_type))
+		forms = await self.conjugate(infinitive, *selection)
+		return ("200 OK", {"infinitive" : infinitive,
+						   "forms" : {conjugator.cell_name(cell) : form for (cell, form) in forms.items()}})
+
+
+_service = None
+
+async def conjugate(infinitive : str,
+					tense = len(v.Tense),
+					mood = len(v.Mood),
+					aspect = len(v.Aspect),
+					person = len(v.Person),
+					number = len(v.Number)):
+	"""Conjugate <infinitive> asynchronously through a default ConjugationService (see ConjugationService.conjugate())."""
+	global _service
+	if _service is None:
+		_service = ConjugationService()
+	return await _service.conjugate(infinitive, tense, mood, aspect, person, number)
+
+
+def _report_warm_up(future):
+	if future.exception() is not None:
+		print(f"cache warm-up failed: {future.exception()}", file = sys.stderr)
+		return
+	report = future.result()
+	print(f"cache warmed with {report['verbs']} verbs ({100 * report['share']:.1f}% of the listed traffic) "
+		  f"in {report['seconds']:.2f}s, ~{report['bytes'] // 1024} KiB", file = sys.stderr)
+
+def warm_cache(service : ConjugationService, args : argparse.Namespace):
+	"""Start warming the cache of <service> with the verbs of args.frequencies in the background and return the Future of the report."""
+	with open(args.frequencies, "r", encoding = "utf-8") as file:
+		frequencies = conjugator.read_frequencies(file)
+	warming = conjugator.prefetch(frequencies, args.warm_top, args.warm_seconds, None,
+								  args.warm_tense, args.warm_mood, args.warm_aspect, args.warm_person, args.warm_number,
+								  cache = service.cache, background = True)
+	warming.add_done_callback(_report_warm_up)
+	return warming
+
+async def serve_forever(args : argparse.Namespace):
+	if args.processes:
+		executor = concurrent.futures.ProcessPoolExecutor(args.processes, initializer = conjutils.get_context)
+	else:
+		executor = concurrent.futures.ThreadPoolExecutor(args.threads)
+	service = ConjugationService(executor, conjcache.ConjugationCache(args.cache_size))
+	manager = None
+	if args.reload:
+		import conjreload
+		manager = conjreload.LexiconManager()
+		manager.add_cache(service.cache)
+		manager.start(args.reload)
+	if args.frequencies:
+		warm_cache(service, args)
+	server = await service.serve(args.host, args.port, args.unix)
+	where = args.unix if args.unix else f"http://{args.host}:{args.port}"
+	print(f"serving conjugations on {where}", file = sys.stderr)
+	try:
+		async with server:
+			await server.serve_forever()
+	finally:
+		if manager is not None:
+			manager.stop()
+		executor.shutdown()
+
+def parse_args(argv : list = None) -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description = "Serve conjugations over HTTP.")
+	parser.add_argument("--host", default = "127.0.0.1", help = "address to listen on (default: 127.0.0.1)")
+	parser.add_argument("--port", type = int, default = 8080, help = "TCP port to listen on (default: 8080)")
+	parser.add_argument("--unix", metavar = "PATH", help = "listen on this Unix socket instead of a TCP port")
+	parser.add_argument("--threads", type = int, default = None, help = "conjugation threads (default: Python's default)")
+	parser.add_argument("--processes", type = int, default = 0, help = "conjugate in this many processes instead of threads")
+	parser.add_argument("--cache-size", type = int, default = 1024, help = "conjugations kept in the cache (default: 1024)")
+	parser.add_argument("--reload", type = float, default = 0, metavar = "S",
+						help = "poll verbs.txt and prefixes.txt every S seconds and serve their edits (threads only)")
+	parser.add_argument("--frequencies", metavar = "FILE",
+						help = "'infinitive,count' list whose most frequent verbs are conjugated into the cache in the background")
+	parser.add_argument("--warm-top", type = int, default = None, help = "verbs to warm at most (default: the cache size)")
+	parser.add_argument("--warm-seconds", type = float, default = None, help = "time budget of the warm-up (default: none)")
+	for (name, enum_type) in _SELECTORS:
+		parser.add_argument("--warm-" + name, type = lambda values, enum_type = enum_type: conjugator.parse_enums(values, enum_type),
+							default = len(enum_type),
+							help = "comma separated " + name + "s to warm, as the requests select them (default: all)")
+	args = parser.parse_args(argv)
+	if args.reload and args.processes:
+		parser.error("--reload needs the conjugations to run in threads, not --processes")
+	return args
+
+def main(argv : list = None):
+	args = parse_args(argv)
+	try:
+		asyncio.run(serve_forever(args))
+	except KeyboardInterrupt:
+		pass
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,59 @@
+# tests conjugation cache (conjcache) module
+
+import os
+import shutil
+import pytest
+import conjcache
+import conjugator
+import conjutils
+import verbs as v
+
+
+def test_eviction_policies():
+    '''Tests which entry each policy evicts and the counters'''
+    for (policy, used, evicted) in (("lru", "a", "b"), ("fifo", "a", "a"), ("lfu", "ab", "c")):
+        cache = conjcache.ConjugationCache(max_size = 3, policy = policy)
+        for key in "abc":
+            cache.put(key, key.upper())
+        for key in used:
+            assert cache.get(key) == key.upper()
+        cache.put("d", "D")
+        assert evicted not in cache and "d" in cache and len(cache) == 3, policy
+        assert cache.stats()["evictions"] == 1
+
+    cache = conjcache.ConjugationCache(max_size = 2)
+    assert cache.get("x") is None
+    assert cache.get_or_compute("x", lambda: 1) == 1 and cache.get_or_compute("x", lambda: 2) == 1
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["misses"] == 0
+    with pytest.raises(ValueError):
+        conjcache.ConjugationCache(policy = "random")
+
+def test_conjugate_cached():
+    '''Tests that conjugate() serves repeated requests from the cache as read-only snapshots'''
+    conjugator.configure_cache(max_size = 8)
+    forms = conjugator.conjugate("gehen", tense = v.Tense.PAST, mood = v.Mood.INDICATIVE)
+    assert conjugator.conjugate("gehen", tense = (v.Tense.PAST,), mood = (v.Mood.INDICATIVE,)) is forms
+    assert conjugator.cache_stats()["hits"] == 1
+    cell = (v.Mood.INDICATIVE, v.Tense.PAST, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.SINGULAR)
+    assert forms[cell] == "gingst"
+    with pytest.raises(TypeError):
+        forms[cell] = "ging"
+    conjugator.configure_cache()
+
+def test_cache_per_lexicon(tmp_path):
+    '''Tests that conjugations of the same infinitive with different lexicons are cached apart'''
+    data_dir = conjutils.get_data_dir()
+    for name in ("verbs.txt", "prefixes.txt"):
+        shutil.copy(os.path.join(data_dir, name), tmp_path / name)
+    text = (tmp_path / "verbs.txt").read_text(encoding = "utf-8")
+    (tmp_path / "verbs.txt").write_text(text.replace("PP,wissen,wuss,", "PP,wissen,wüss,"), encoding = "utf-8")
+    other = conjutils.get_context(data_dir = str(tmp_path))
+
+    cache = conjcache.ConjugationCache()
+    cell = (v.Mood.INDICATIVE, v.Tense.PAST, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    assert conjugator.conjugate("wissen", tense = v.Tense.PAST, cache = cache)[cell] == "wusste"
+    assert conjugator.conjugate("wissen", tense = v.Tense.PAST, irregular_verbs = other.lexicon.verbs, cache = cache)[cell] == "wüsste"
+    assert conjugator.conjugate("wissen", tense = v.Tense.PAST, cache = cache)[cell] == "wusste"
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,24 @@
+# tests precomputed conjugation database (conjdb) module
+
+import pytest
+import conjdb
+import conjugator
+import verbs as v
+
+
+def test_database_lookup(tmp_path):
+    '''Tests that the mapped database serves the same forms as conjugating'''
+    path = str(tmp_path / "verbs.db")
+    count = conjdb.build_database(path, weak_verbs = ["lernen", "gehen", ""])
+    with conjdb.ConjugationDatabase(path) as database:
+        assert len(database) == count
+        assert "lernen" in database and "gehen" in database and "lachen" not in database
+        assert database.infinitives() == sorted(database.infinitives())
+
+        cell = (v.Tense.PAST, v.Mood.INDICATIVE, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.SINGULAR)
+        assert database.get_conjugation_at("gehen", *cell) == "gingst"
+        assert database.get_conjugation_at("lernen", *cell) == "lerntest"
+        (table,) = conjugator.conjugate_many(["sehen"], tables = True)
+        assert database.get_table("sehen") == table.expand()
+        with pytest.raises(KeyError):
+            database.get_table("lachen")
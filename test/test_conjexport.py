@@ -0,0 +1,40 @@
+# tests bulk export (conjexport) module
+
+import csv
+import io
+import conjexport
+import verbs as v
+
+
+def test_long_csv():
+    '''Tests that the long CSV has one row per filled cell'''
+    out = io.StringIO(newline = "")
+    verbs = list(conjexport.iter_conjugated(["gehen", "lernen", "anfangen"], chunk_size = 2))
+    count = conjexport.write_long_csv(verbs, out, chunk_size = 2)
+    rows = list(csv.reader(io.StringIO(out.getvalue(), newline = "")))
+    assert rows[0] == list(conjexport.COLUMNS) and len(rows) == count + 1
+    assert count == sum(1 for verb in verbs for form in verb.get_table().expand() if form)
+    assert ["gehen", "INDICATIVE", "PAST", "SIMPLE", "SECOND", "SINGULAR", "gingst"] in rows
+    assert ["anfangen", "INDICATIVE", "PRESENT", "SIMPLE", "FIRST", "SINGULAR", "fange an"] in rows
+
+def test_columnar(tmp_path):
+    '''Tests that the columnar file round-trips across several blocks'''
+    words = ["gehen", "lernen", "sehen", "machen", "gehen"]
+    verbs = list(conjexport.iter_conjugated(words))
+    path = tmp_path / "verbs.col"
+    with open(path, "wb") as file:
+        count = conjexport.write_columnar(verbs, file, chunk_size = 2)
+    with open(path, "rb") as file:
+        rows = list(conjexport.read_columnar(file))
+    expected = [(verb.infinitive, *v.table_unhash(index), form)
+                for verb in verbs for (index, form) in enumerate(verb.get_table().expand()) if form]
+    assert rows == expected and len(rows) == count
+    with open(path, "rb") as file:
+        assert len(list(conjexport.iter_columnar(file))) == 3
+
+    # each block carries its own dictionary: repeating a verb repeats its block
+    (once, twice) = (io.BytesIO(), io.BytesIO())
+    conjexport.write_columnar(verbs[:1], once, chunk_size = 1)
+    conjexport.write_columnar(verbs[:1] * 2, twice, chunk_size = 1)
+    block = len(twice.getvalue()) - len(once.getvalue())
+    assert twice.getvalue() == once.getvalue() + once.getvalue()[-block:]
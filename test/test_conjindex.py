@@ -0,0 +1,30 @@
+# tests reverse lookup index (conjindex) module
+
+import conjindex
+import conjugator
+import conjutils
+import verbs as v
+
+
+def test_reverse_lookup(tmp_path):
+    '''Tests indexing conjugations as they are produced, lookups and saving/loading'''
+    index = conjindex.ReverseIndex()
+    conjugations = list(index.record(conjugator.iter_conjugations(["gehen", "sehen"])))
+    assert len(conjugations) == 2
+
+    assert index.lookup("gingst") == [("gehen", v.Tense.PAST, v.Mood.INDICATIVE, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.SINGULAR)]
+    analyses = index.lookup("Hätte  gesehen")
+    assert ("sehen", v.Tense.PAST, v.Mood.SUBJUNCTIVE_2, v.Aspect.PERFECT, v.Person.FIRST, v.Number.SINGULAR) in analyses
+    assert ("sehen", v.Tense.PAST, v.Mood.SUBJUNCTIVE_2, v.Aspect.PERFECT, v.Person.THIRD, v.Number.SINGULAR) in analyses
+    assert index.lookup("lernte") == []
+
+    verb = conjutils.determine_verb_class("lernen", [], conjutils.get_context())
+    verb.conjugate(tense = v.Tense.PAST, mood = v.Mood.INDICATIVE, aspect = v.Aspect.SIMPLE)
+    index.add_verb(verb)
+    assert len(index.lookup("lernte")) == 2 # 1st and 3rd person singular
+
+    path = str(tmp_path / "index.json")
+    index.save(path)
+    loaded = conjindex.ReverseIndex.load(path)
+    assert len(loaded) == len(index)
+    assert loaded.lookup("hätte gesehen") == analyses
@@ -0,0 +1,70 @@
+# tests lexicon queries (conjquery) module
+
+import os
+import shutil
+import conjcache
+import conjugator
+import conjquery
+import conjreload
+import conjutils
+import verbs as v
+
+
+def test_select():
+    '''Tests that the indexes select the same verbs as scanning the lexicon'''
+    index = conjquery.get_index()
+    assert conjquery.get_index() is index
+    rows = conjutils.get_irregular_verbs()[1:]
+    expected = list(dict.fromkeys(row[conjutils.IrregularIdx.INFINITIVE] for row in rows if row[0] == "1aS"))
+    assert index.select(category = "1aS") == expected
+    assert index.select(category = ("PP", "M")) == index.select(verb_class = "Mixed")
+    assert "kommen" in index.select(verb_class = "Strong", separability = "simple")
+    assert {"befehlen", "empfehlen"} <= set(index.select(separability = "inseparable"))
+    assert "vergessen" in index.select(separability = "simple") # gessen is no verb
+    assert index.select(category = "PP", verb_class = "Strong") == []
+    assert index.select() == index.infinitives and "simple" in index.values("separability")
+
+def test_query(tmp_path):
+    '''Tests that queries conjugate only the matching verbs and cells, through the cache, in the queried context'''
+    cache = conjcache.ConjugationCache()
+    selection = {"mood" : v.Mood.INDICATIVE, "tense" : v.Tense.PAST, "aspect" : v.Aspect.SIMPLE,
+                 "person" : v.Person.FIRST, "number" : v.Number.SINGULAR}
+    results = dict(conjquery.query(category = "PP", cache = cache, **selection))
+    cell = (v.Mood.INDICATIVE, v.Tense.PAST, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    assert results["wissen"] == {cell : "wusste"} and len(results) == len(conjquery.get_index().select(category = "PP"))
+    assert cache.stats()["misses"] == len(results)
+
+    list(conjquery.query(category = "PP", cache = cache, **selection))
+    assert cache.stats()["hits"] == len(results)
+
+    # another lexicon, through the same cache
+    data_dir = conjutils.get_data_dir()
+    for name in ("verbs.txt", "prefixes.txt"):
+        shutil.copy(os.path.join(data_dir, name), tmp_path / name)
+    text = (tmp_path / "verbs.txt").read_text(encoding = "utf-8")
+    (tmp_path / "verbs.txt").write_text(text.replace("PP,wissen,wuss,", "PP,wissen,wüss,"), encoding = "utf-8")
+    other = conjutils.get_context(data_dir = str(tmp_path))
+    assert dict(conjquery.query(category = "PP", context = other, cache = cache, **selection))["wissen"] == {cell : "wüsste"}
+    assert dict(conjquery.query(category = "PP", cache = cache, **selection))["wissen"] == {cell : "wusste"}
+
+def test_query_after_reload(tmp_path, monkeypatch):
+    '''Tests that queries in the default context see a reloaded lexicon'''
+    data_dir = conjutils.get_data_dir()
+    for name in ("verbs.txt", "prefixes.txt"):
+        shutil.copy(os.path.join(data_dir, name), tmp_path / name)
+    monkeypatch.setenv("VERB_DATA_DIR", str(tmp_path))
+    cache = conjcache.ConjugationCache()
+    manager = conjreload.LexiconManager(caches = [cache])
+    selection = {"mood" : v.Mood.INDICATIVE, "tense" : v.Tense.PAST, "aspect" : v.Aspect.SIMPLE,
+                 "person" : v.Person.FIRST, "number" : v.Number.SINGULAR}
+    cell = (v.Mood.INDICATIVE, v.Tense.PAST, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    assert dict(conjquery.query(category = "PP", cache = cache, **selection))["wissen"] == {cell : "wusste"}
+
+    text = (tmp_path / "verbs.txt").read_text(encoding = "utf-8")
+    (tmp_path / "verbs.txt").write_text(text.replace("PP,wissen,wuss,", "PP,wissen,wüss,"), encoding = "utf-8")
+    stat = os.stat(tmp_path / "verbs.txt")
+    os.utime(tmp_path / "verbs.txt", ns = (stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert manager.poll()["verbs"] == ["wissen"]
+    assert dict(conjquery.query(category = "PP", cache = cache, **selection))["wissen"] == {cell : "wüsste"}
+    assert conjquery.get_index().context is manager.context
+    assert conjugator.conjugate("wissen", cache = cache, **selection)[cell] == "wüsste"
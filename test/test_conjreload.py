@@ -0,0 +1,106 @@
+# tests lexicon reloading (conjreload) module
+
+import os
+import shutil
+import conjcache
+import conjreload
+import conjugator
+import conjutils
+import verbs as v
+
+PAST = (v.Mood.INDICATIVE, v.Tense.PAST, v.Aspect.SIMPLE, v.Person.THIRD, v.Number.SINGULAR)
+
+
+def _edit(path, old, new):
+    '''Replaces <old> by <new> in file <path> and moves its mtime forward'''
+    text = path.read_text(encoding = "utf-8")
+    path.write_text(text.replace(old, new), encoding = "utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns = (stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+def test_invalidate():
+    '''Tests that invalidation drops only the matching entries, under both policies'''
+    for policy in ("lru", "lfu"):
+        cache = conjcache.ConjugationCache(8, policy)
+        for key in ("gehen", "vergehen", "lernen"):
+            cache.put(key, key)
+        cache.get("lernen")
+        assert cache.invalidate(lambda key: key.endswith("gehen")) == 2
+        assert (cache.get("gehen"), cache.get("lernen")) == (None, "lernen")
+        cache.put("sehen", "sehen") # the lfu bookkeeping is consistent again
+        assert cache.stats()["size"] == 2
+
+        assert cache.rekey(lambda key: None if key == "sehen" else key.upper()) == 1
+        assert (cache.get("LERNEN"), cache.get("lernen"), len(cache)) == ("lernen", None, 1)
+        for key in ("a", "b"):
+            cache.put(key, key) # and after moving
+        assert len(cache) == 3
+
+def test_reload(tmp_path):
+    '''Tests that edits are picked up incrementally and only invalidate the affected conjugations'''
+    data_dir = conjutils.get_data_dir()
+    for name in ("verbs.txt", "prefixes.txt"):
+        shutil.copy(os.path.join(data_dir, name), tmp_path / name)
+    (cache, service_cache) = (conjcache.ConjugationCache(), conjcache.ConjugationCache())
+    manager = conjreload.LexiconManager(str(tmp_path), [cache])
+    manager.add_cache(service_cache)
+    old = manager.context
+    assert conjutils.get_context(data_dir = str(tmp_path)) is old
+    assert manager.poll() is None
+
+    def conjugate(word):
+        return conjugator.conjugate(word, irregular_verbs = manager.context.lexicon.verbs, cache = cache)
+    for word in ("gehen", "vergehen", "lernen"):
+        conjugate(word)
+    conjugator.conjugate("gehen", context = manager.context, cache = service_cache)
+    os.utime(tmp_path / "verbs.txt") # touched only
+    assert manager.poll() is None
+
+    _edit(tmp_path / "verbs.txt", "7cv,gehen,ging,gegangen,,", "7cv,gehen,gung,gegungen,,")
+    report = manager.poll()
+    assert report["verbs"] == ["gehen"] and report["invalidated"] == 3 and service_cache.stats()["size"] == 0
+    (key,) = [key for key in cache._entries if key[1] == "lernen"] # moved to the new context
+    assert key[0] is manager.context and cache.get(key) is not None
+    assert conjugate("vergehen")[PAST] == "vergung" and conjugate("gehen")[PAST] == "gung"
+    assert conjugator.conjugate("gehen", context = old, cache = cache)[PAST] == "ging" # unchanged, and not shared
+    assert conjugate("gehen")[PAST] == "gung"
+    assert conjutils.get_context(data_dir = str(tmp_path)) is manager.context
+
+    verbs = manager.context.lexicon.verbs
+    fresh = conjutils.SuffixIndex(verbs)
+    for word in ("gehen", "vergehen", "ergehen", "lernen", "sein", "stehen"):
+        assert manager.context.lexicon.suffix_index.all_matches(word) == fresh.all_matches(word)
+    normalization = manager.context.normalization
+    assert normalization._spellings[0][3] is old.normalization._spellings[0][3] # prefixes unchanged: automaton reused
+
+    assert manager.context.decompose("querlaufen") is None
+    _edit(tmp_path / "prefixes.txt", "prefix,is_separable\n", "prefix,is_separable\nquer,true,\n")
+    report = manager.poll()
+    assert report["prefixes"] == ["quer"] and report["verbs"] == []
+    assert manager.context.decompose("querlaufen") == ("quer", "", "laufen")
+    assert manager.context.normalize("Querlaufen") == ("querlaufen", True)
+    assert manager.version == 2
+
+    # a stacked prefix changes too
+    for word in ("wiederaufnehmen", "aufnehmen", "lernen"):
+        conjugate(word)
+    _edit(tmp_path / "prefixes.txt", "au[fs],true,", "aus,true,")
+    report = manager.poll()
+    assert report["prefixes"] == ["auf", "aus"] and report["invalidated"] == 2
+    assert not {"wiederaufnehmen", "aufnehmen"} & {key[1] for key in cache._entries if key[0] is manager.context}
+    fresh = conjutils.NormalizationIndex(manager.context.lexicon.verbs, manager.context.prefixes)
+    for word in ("aufgeben", "ausgeben", "querlaufen", "beissen", "Gehen", "vermoegen"):
+        assert manager.context.normalize(word) == fresh.resolve(word), word
+
+def test_stale_context(tmp_path):
+    '''Tests that a context loaded before an edit is replaced for its own data directory only'''
+    data_dir = conjutils.get_data_dir()
+    for name in ("verbs.txt", "prefixes.txt"):
+        shutil.copy(os.path.join(data_dir, name), tmp_path / name)
+    default = conjutils.get_context()
+    stale = conjutils.get_context(data_dir = str(tmp_path))
+    _edit(tmp_path / "verbs.txt", ",sehen,sah,", ",sehen,soh,")
+    manager = conjreload.LexiconManager(str(tmp_path), [])
+    assert manager.context is not stale and conjutils.get_context(data_dir = str(tmp_path)) is manager.context
+    assert conjugator.conjugate("sehen", context = manager.context, cache = conjcache.ConjugationCache())[PAST] == "soh"
+    assert conjutils.get_context() is default
@@ -1,8 +1,84 @@
 # tests conjugator (integration of conjutils and verbs modules)
 
+import io
 import pytest
+import conjcache
 import conjutils
+import conjugator
 import verbs
 
 def test_test():
-    assert True == True
\ No newline at end of file
+    assert True == True
+
+def test_conjugate_many():
+    '''Tests batch conjugation of selected cells and of whole tables'''
+    past = (verbs.Mood.INDICATIVE, verbs.Tense.PAST, verbs.Aspect.SIMPLE, verbs.Person.SECOND, verbs.Number.SINGULAR)
+    pluperfect = (verbs.Mood.SUBJUNCTIVE_2, verbs.Tense.PAST, verbs.Aspect.PERFECT, verbs.Person.FIRST, verbs.Number.SINGULAR)
+    future = (verbs.Mood.INDICATIVE, verbs.Tense.FUTURE, verbs.Aspect.SIMPLE, verbs.Person.THIRD, verbs.Number.PLURAL)
+
+    results = conjugator.conjugate_many(["gehen", "sehen", "lernen", "gehen"], tense = verbs.Tense.PAST)
+    assert len(results) == 4 and results[0] is results[3]
+    with pytest.raises(TypeError):
+        results[0][past] = "ginget" # shared by both gehen, so read-only
+    assert results[0][past] == "gingst"
+    assert results[1][pluperfect] == "hätte gesehen"
+    assert results[2][past] == "lerntest"
+    assert future not in results[0]
+
+    (table, repeated) = conjugator.conjugate_many(["können", "können"], tables = True)
+    assert table[verbs.table_hash(*future)] == "werden können"
+    assert table[verbs.table_hash(verbs.Mood.INDICATIVE, verbs.Tense.PRESENT, verbs.Aspect.SIMPLE,
+                                  verbs.Person.FIRST, verbs.Number.SINGULAR)] == "kann"
+    assert repeated is not table and repeated.expand() == table.expand()
+    repeated[verbs.table_hash(*future)] = "" # tables are mutable, so each entry has its own
+    assert table[verbs.table_hash(*future)] == "werden können"
+
+def test_stream(tmp_path):
+    '''Tests the non-interactive mode reading infinitives from a file'''
+    infile = tmp_path / "words.txt"
+    infile.write_text("gehen\n\nlernen\n", encoding = "utf-8")
+    outfile = tmp_path / "out.jsonl"
+    conjugator.main(["-i", str(infile), "-o", str(outfile), "--mood", "indicative", "--tense", "past",
+                     "--aspect", "simple", "--person", "second", "--number", "singular"])
+    lines = outfile.read_text(encoding = "utf-8").splitlines()
+    assert lines == ['{"infinitive": "gehen", "forms": {"INDICATIVE.PAST.SIMPLE.SECOND.SINGULAR": "gingst"}}',
+                     '{"infinitive": "lernen", "forms": {"INDICATIVE.PAST.SIMPLE.SECOND.SINGULAR": "lerntest"}}']
+
+    outfile = tmp_path / "out.csv"
+    conjugator.main(["-i", str(infile), "-o", str(outfile), "-f", "csv", "--mood", "imperative"])
+    assert outfile.read_text(encoding = "utf-8").splitlines()[1] == "gehen,gehen,geh,geht"
+
+    infile.write_text("Gehen\nbeissen\n", encoding = "utf-8")
+    conjugator.main(["-i", str(infile), "-o", str(outfile), "-f", "csv", "--mood", "imperative", "--normalize"])
+    assert outfile.read_text(encoding = "utf-8").splitlines()[1:] == ["gehen,gehen,geh,geht", "beißen,beißen,beiß,beißt"]
+
+def test_conjugate_parallel():
+    '''Tests that the process pool gives the same results as the serial generator'''
+    words = ["gehen", "lernen", "sehen", "können", "haben"] * 3
+    serial = list(conjugator.iter_conjugations(words, tense = verbs.Tense.PAST))
+    assert list(conjugator.conjugate_parallel(words, tense = verbs.Tense.PAST, workers = 2, chunk_size = 2)) == serial
+    unordered = conjugator.conjugate_parallel(words, tense = verbs.Tense.PAST, workers = 2, chunk_size = 2, ordered = False)
+    assert sorted(word for (word, cells) in unordered) == sorted(words)
+
+def test_prefetch():
+    '''Tests that the most frequent verbs are warmed into the cache within the budgets'''
+    frequencies = conjugator.read_frequencies(io.StringIO("infinitive,count\nsein,50\n\nhaben 30\ngehen,10\nlernen,5\nsein,5\n"))
+    assert frequencies == [("sein", 55), ("haben", 30), ("gehen", 10), ("lernen", 5)]
+
+    cache = conjcache.ConjugationCache()
+    report = conjugator.prefetch(frequencies, top = 2, tense = verbs.Tense.PAST, cache = cache)
+    assert (report["verbs"], report["share"], report["stopped_by"]) == (2, 0.85, "top")
+    assert conjugator.conjugate("haben", tense = verbs.Tense.PAST, cache = cache) is not None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 0)
+
+    default = conjutils.get_context()
+    other = conjutils.ConjugationContext(default.lexicon, default.prefixes)
+    cache = conjcache.ConjugationCache()
+    conjugator.prefetch(frequencies, top = 1, cache = cache, context = other)
+    assert conjugator.cache_key("sein", verbs.cell_indices(), other) in cache
+    assert conjugator.cache_key("sein", verbs.cell_indices(), default) not in cache
+
+    report = conjugator.prefetch(frequencies, max_bytes = 1, cache = conjcache.ConjugationCache())
+    assert (report["verbs"], report["stopped_by"]) == (0, "memory")
+    report = conjugator.prefetch(frequencies, cache = conjcache.ConjugationCache(), background = True).result(timeout = 30)
+    assert (report["verbs"], report["share"], report["stopped_by"]) == (4, 1.0, "list")
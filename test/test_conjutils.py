@@ -1,5 +1,8 @@
 # tests conjugator utilties (conjutils) module
 
+import concurrent.futures
+import os
+import shutil
 import pytest
 import conjutils as conjutils
 import verbs as v
@@ -9,6 +12,7 @@ from conjutils import IrregularIdx
 def test_class_determination():
     '''Tests class determination using listed irregular verbs (closed class)'''
     irregular_verbs = conjutils.get_irregular_verbs()
+    context = conjutils.get_context(irregular_verbs)
     verbs = [verb[IrregularIdx.INFINITIVE] for verb in irregular_verbs[1:]]
     mixed_verbs = ["brennen", "bringen", "denken", "kennen", "nennen", "rennen", "senden", "wenden",
                     "wissen", "können", "dürfen", "sollen", "wollen", "mögen", "müssen",
@@ -16,9 +20,9 @@ def test_class_determination():
     for verb in verbs:
         matches = conjutils.find_verb_matches(verb, irregular_verbs)
         assert_type = "Mixed" if verb in mixed_verbs else "Strong"
-        status = conjutils.determine_verb_class(verb, matches).kind() == assert_type
+        status = conjutils.determine_verb_class(verb, matches, context).kind() == assert_type
         if not status:
-            print(f"Exepcted {assert_type}, got {conjutils.determine_verb_class(verb, matches).kind()} for {verb}, match: {matches}")
+            print(f"Exepcted {assert_type}, got {conjutils.determine_verb_class(verb, matches, context).kind()} for {verb}, match: {matches}")
             assert status is True
 
 
@@ -26,6 +30,199 @@ def test_class_determination():
     weak_verbs = ["lacheln", "studieren", "lieben", "leben", "lernen"]
     for verb in weak_verbs:
         matches = conjutils.find_verb_matches(verb, irregular_verbs)
-        assert conjutils.determine_verb_class(verb, matches).kind() == "Weak"
+        assert conjutils.determine_verb_class(verb, matches, context).kind() == "Weak"
 
-    
\ No newline at end of file
+    
+def test_suffix_index():
+    '''Tests longest and all suffix matches of the irregular verb index'''
+    irregular_verbs = conjutils.get_irregular_verbs()
+    index = conjutils.SuffixIndex(irregular_verbs)
+
+    # longest infinitive wins regardless of row order
+    assert index.longest_match("vergessen")[IrregularIdx.INFINITIVE] == "vergessen"
+    assert index.longest_match("essen")[IrregularIdx.INFINITIVE] == "essen"
+    assert index.longest_match("treiben")[IrregularIdx.INFINITIVE] == "treiben"
+    assert index.longest_match("abtreiben")[IrregularIdx.INFINITIVE] == "treiben"
+    assert [verb[IrregularIdx.INFINITIVE] for verb in index.all_matches("vergessen")] == ["vergessen", "essen"]
+
+    # misses
+    assert index.longest_match("lernen") == ()
+    assert index.all_matches("lernen") == []
+    assert conjutils.find_verb_matches("lernen", irregular_verbs) == []
+    assert conjutils.find_verb_matches("vergessen", index) == index.longest_match("vergessen")
+
+def test_lexicon_cache(tmp_path, monkeypatch):
+    '''Tests that the lexicon is loaded once, honours VERB_DATA_DIR and round-trips through a snapshot'''
+    assert conjutils.get_irregular_verbs() is conjutils.get_irregular_verbs()
+
+    (tmp_path / "verbs.txt").write_text("class,present,past,participle,conjugation\n5L,geben,gab,gegeben,,\n", encoding = "utf-8")
+    monkeypatch.setenv("VERB_DATA_DIR", str(tmp_path))
+    lexicon = conjutils.get_lexicon()
+    assert lexicon.verbs[1] == ("5L", "geben", "gab", "gegeben", "")
+    assert conjutils.find_verb_matches("aufgeben", lexicon.verbs) == lexicon.verbs[1]
+
+    # a written snapshot is used instead of parsing the file
+    snapshot = str(tmp_path / "verbs.snapshot")
+    lexicon.write_snapshot(snapshot)
+    loaded = conjutils.Lexicon.from_snapshot(lexicon.path, snapshot)
+    assert loaded.verbs == lexicon.verbs
+    assert loaded.suffix_index.longest_match("geben") == lexicon.verbs[1]
+
+    # changing the source invalidates it
+    (tmp_path / "verbs.txt").write_text("class,present,past,participle,conjugation\n5L,lesen,las,gelesen,,\n", encoding = "utf-8")
+    assert conjutils.Lexicon.from_snapshot(lexicon.path, snapshot) is None
+    conjutils.clear_lexicons()
+    assert conjutils.get_lexicon(snapshot = snapshot).verbs[1][IrregularIdx.INFINITIVE] == "lesen"
+    assert conjutils.Lexicon.from_snapshot(lexicon.path, snapshot) is not None
+    conjutils.clear_lexicons()
+
+def test_prefix_automaton():
+    '''Tests prefix pattern expansion and greedy/all-splits prefix stripping'''
+    assert conjutils.expand_pattern("da(r|(bei))?") == ["da", "dar", "dabei"]
+    assert conjutils.expand_pattern("au[fs]") == ["auf", "aus"]
+
+    prefixes = conjutils.get_prefixes()
+    assert prefixes.strip("wiederaufnehmen") == ([("wieder", True), ("auf", True)], "nehmen")
+    assert prefixes.strip("verstehen") == ([("ver", False)], "stehen")
+    assert prefixes.strip("lernen") == ([], "lernen")
+    assert prefixes.match_at("herausgeben") == [("heraus", True), ("her", True)]
+    assert conjutils.get_prefix("anfangen") == ("an", "fangen")
+
+    splits = prefixes.splits("zurückgeben")
+    assert ([("zurück", True)], "geben") in splits
+    assert ([], "zurückgeben") == splits[-1]
+
+def test_conjugation_context(tmp_path):
+    '''Tests that contexts are immutable, independent of each other and safe to share between threads'''
+    context = conjutils.get_context()
+    assert conjutils.get_context() is context
+    assert conjutils.get_context(conjutils.get_irregular_verbs()) is context
+    with pytest.raises(AttributeError):
+        context.haben = None
+
+    cell = (v.Tense.FUTURE, v.Mood.INDICATIVE, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    assert context.classify("gehen").compute_conjugation_at(*cell) == "werde gehen"
+    assert v.Weak("lernen").compute_conjugation_at(*cell) == "" # no context, no auxiliaries
+
+    # a second lexicon in the same process, in which "gehen" is weak
+    data_dir = conjutils.get_data_dir()
+    with open(os.path.join(data_dir, "verbs.txt"), encoding = "utf-8") as file:
+        lines = [line for line in file if ",gehen," not in line]
+    (tmp_path / "verbs.txt").write_text("".join(lines), encoding = "utf-8")
+    shutil.copy(os.path.join(data_dir, "prefixes.txt"), tmp_path / "prefixes.txt")
+    other = conjutils.get_context(data_dir = str(tmp_path))
+    assert other is not context
+    assert other.classify("gehen").kind() == "Weak" and context.classify("gehen").kind() == "Strong"
+
+    words = ["gehen", "lernen", "können", "sehen", "bringen", "sein"] * 20
+    def table(word):
+        verb = context.classify(word)
+        verb.conjugate()
+        return verb.get_table().expand()
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(table, words)) == [table(word) for word in words]
+
+def test_frozen_auxiliaries(tmp_path, monkeypatch):
+    '''Tests that frozen auxiliaries match conjugated ones and are ignored once the lexicon changes'''
+    built = conjutils.get_context(frozen = False)
+    path = str(tmp_path / "auxiliaries.txt")
+    built.freeze(path)
+    frozen = conjutils.ConjugationContext.from_frozen(built.lexicon, built.prefixes, path)
+    for (a, b) in ((built.haben, frozen.haben), (built.sein, frozen.sein), (built.werden, frozen.werden)):
+        assert a.get_table().expand() == b.get_table().expand() and a.get_filled() == b.get_filled()
+
+    other = conjutils.Lexicon("", "0" * 64, built.lexicon.verbs, built.lexicon.suffix_index, "0" * 8)
+    assert conjutils.ConjugationContext.from_frozen(other, built.prefixes, path) is None
+    assert conjutils.ConjugationContext.from_frozen(built.lexicon, built.prefixes, str(tmp_path / "missing")) is None
+    monkeypatch.setattr(v, "RULES_VERSION", v.RULES_VERSION + 1)
+    assert conjutils.ConjugationContext.from_frozen(built.lexicon, built.prefixes, path) is None
+    monkeypatch.undo()
+
+    # damaged files are ignored too
+    lines = open(path, encoding = "utf-8").read().splitlines()
+    damaged = {"truncated" : lines[:len(lines) // 2], "garbage" : [lines[0]] + ["garbage"] * (len(lines) - 1),
+               "binary" : None}
+    for (name, content) in damaged.items():
+        damaged_path = tmp_path / name
+        if content is None:
+            damaged_path.write_bytes(b"\xff\xfe\x00garbage")
+        else:
+            damaged_path.write_text("\n".join(content) + "\n", encoding = "utf-8")
+        assert conjutils.ConjugationContext.from_frozen(built.lexicon, built.prefixes, str(damaged_path)) is None, name
+    assert set(os.listdir(tmp_path)) == {"auxiliaries.txt", *damaged} # no temporary file left behind
+
+    # the bundled table is up to date with the bundled lexicon and rules (else bump RULES_VERSION and regenerate it)
+    bundled = conjutils.ConjugationContext.from_frozen(built.lexicon, built.prefixes,
+                                                       os.path.join(conjutils.get_data_dir(), "auxiliaries.txt"))
+    assert bundled is not None
+    for (a, b) in ((built.haben, bundled.haben), (built.sein, bundled.sein), (built.werden, bundled.werden)):
+        assert a.get_table().expand() == b.get_table().expand()
+
+    # checking it does not need the lexicon's sha256
+    lexicon = conjutils.Lexicon.from_file(built.lexicon.path)
+    assert conjutils.ConjugationContext.from_frozen(lexicon, built.prefixes, path) is not None
+    assert lexicon._source_hash is None and lexicon.source_hash == built.lexicon.source_hash
+
+def test_compounds():
+    '''Tests that compounds are conjugated from their memoized roots'''
+    conjutils.clear_contexts()
+    context = conjutils.get_context()
+    assert context.decompose("wiederaufnehmen") == ("wieder auf", "", "nehmen")
+    assert context.decompose("anerkennen") == ("an", "er", "kennen")
+    assert context.decompose("vergessen") is None # listed as is
+    assert context.decompose("danken") is None and context.decompose("lernen") is None
+
+    present = (v.Tense.PRESENT, v.Mood.INDICATIVE, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    past = (v.Tense.PAST, v.Mood.INDICATIVE, v.Aspect.SIMPLE, v.Person.THIRD, v.Number.SINGULAR)
+    perfect = (v.Tense.PRESENT, v.Mood.INDICATIVE, v.Aspect.PERFECT, v.Person.FIRST, v.Number.SINGULAR)
+    imperative = (v.Tense.PRESENT, v.Mood.IMPERATIVE, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.SINGULAR)
+    expected = {"anfangen" : ("fange an", "fing an", "habe angefangen", "fang an"),
+                "zurückgeben" : ("gebe zurück", "gab zurück", "habe zurückgegeben", "geb zurück"),
+                "vergeben" : ("vergebe", "vergab", "habe vergeben", "vergeb"),
+                "anerkennen" : ("erkenne an", "erkannte an", "habe anerkannt", "erkenn an"),
+                "aufmachen" : ("mache auf", "machte auf", "habe aufgemacht", "mach auf"),
+                "verkaufen" : ("verkaufe", "verkaufte", "habe verkauft", "verkauf")}
+    for (word, forms) in expected.items():
+        verb = context.classify(word)
+        assert tuple(verb.compute_conjugation_at(*cell) for cell in (present, past, perfect, imperative)) == forms, word
+
+    # words merely starting like a prefix stay simple
+    for word in ("abonnieren", "analysieren", "absolvieren", "absorbieren", "antizipieren", "animieren", "mitigieren",
+                 "empfehlen"):
+        assert context.decompose(word) is None, word
+        assert context.classify(word).compute_conjugation_at(*present) == word[:-1], word
+    assert context.classify("empfehlen").compute_conjugation_at(*past) == "empfahl"
+
+    # every compound of geben shares one conjugated root
+    words = [prefix + "geben" for prefix in ("an", "auf", "aus", "ab", "mit", "nach", "vor", "zurück", "weiter", "ver")]
+    compounds = [context.classify(word) for word in words]
+    assert len({id(verb._root) for verb in compounds if context.decompose(verb.infinitive) is not None}) == 1
+    single = [context.classify(word) for word in words]
+    for verb in single:
+        verb.conjugate()
+    v.conjugate_all(compounds)
+    assert [verb.get_table().expand() for verb in compounds] == [verb.get_table().expand() for verb in single]
+
+def test_normalization():
+    '''Tests that input typed without umlauts, ß or in another case gets its canonical spelling back'''
+    assert conjutils.fold("Lächeln") == conjutils.fold("laecheln") == "laecheln"
+    assert conjutils.fold("beißen") == "beissen" and conjutils.strip_umlauts("Lächeln") == "lacheln"
+    context = conjutils.get_context()
+    expected = {"beissen" : ("beißen", True), "Mogen" : ("mogen", True), "vermoegen" : ("vermögen", True),
+                "zurueckgeben" : ("zurückgeben", True), "ausschliessen" : ("ausschließen", True),
+                "Gehen" : ("gehen", True), "gehen" : ("gehen", False), "lacheln" : ("lacheln", False),
+                "fällen" : ("fällen", False), "faellen" : ("faellen", False), # typed umlauts and digraphs are kept
+                "Faellen" : ("faellen", True), "fallen" : ("fallen", False), "Moegen" : ("mögen", True),
+                "zuruckgeben" : ("zuruckgeben", False)}
+    for (word, resolved) in expected.items():
+        assert context.normalize(word) == resolved, word
+
+    # bare vowels are verbs of their own: only suggested, or read as umlauts on request
+    for word in ("wagen", "garen", "trugen", "schworen", "gebaren", "hangen"):
+        assert context.normalize(word) == (word, False), word
+        assert context.normalization.suggest(word) is not None, word
+    assert context.normalize("Mogen", bare_vowels = True) == ("mögen", True)
+    assert context.normalize("zuruckgeben", bare_vowels = True) == ("zurückgeben", True)
+    assert context.normalization.suggest("mogen") == "mögen" and context.normalization.suggest("moegen") is None
+    assert context.normalization.suggest("gehen") is None and context.normalization.suggest("mögen") is None
+    assert context.classify("beissen").kind() == "Weak" and context.classify(context.normalize("beissen")[0]).kind() == "Strong"
@@ -0,0 +1,34 @@
+# tests pipeline instrumentation (instrument) module
+
+import conjcache
+import conjugator
+import conjutils
+import instrument
+import verbs as v
+
+
+def test_instrumented():
+    '''Tests that metrics are gathered while enabled and that the originals are restored afterwards'''
+    conjutils.clear_contexts() # no memoized lookups
+    conjutils.get_context() # built outside, so that only the conjugations below are counted
+    original = conjutils.find_verb_matches
+    with instrument.instrumented():
+        assert conjutils.find_verb_matches is not original
+        conjugator.conjugate_many(["gehen", "lernen"], tense = v.Tense.PAST, mood = v.Mood.INDICATIVE)
+        conjutils.get_prefix("anfangen")
+        cache = conjcache.ConjugationCache()
+        cache.get_or_compute("gehen", lambda: 1)
+        cache.get("gehen")
+    assert conjutils.find_verb_matches is original and not instrument.is_enabled()
+
+    metrics = instrument.snapshot()
+    assert metrics["counters"]["lookups"] >= 2
+    assert metrics["counters"]["cells_computed"] == 2 * 12
+    assert metrics["counters"]["prefix_matches"] > 0
+    assert (metrics["counters"]["cache_hits"], metrics["counters"]["cache_misses"]) == (1, 1)
+    assert metrics["stages"]["class_construction"]["calls"] == 2
+    assert 'conjugator_stage_calls_total{stage="prefix_strip"} 3' in instrument.prometheus() # decompositions and get_prefix()
+
+    # nothing is recorded while disabled
+    conjugator.conjugate_many(["gehen"])
+    assert instrument.snapshot() == metrics
@@ -0,0 +1,46 @@
+# tests paradigm templates (paradigm) module
+
+import conjutils
+import paradigm
+import verbs as v
+
+
+def test_paradigm():
+    '''Tests that paradigms materialize the same forms as conjugated verbs and share their templates'''
+    context = conjutils.get_context()
+    words = [verb[conjutils.IrregularIdx.INFINITIVE] for verb in context.lexicon.verbs[1:]] + \
+            ["lernen", "machen", "anfangen", "zurückgeben", "anerkennen", "aufmachen", "verkaufen", "vergeben"]
+    roots = {}
+    for word in words:
+        verb = context.classify(word)
+        expected = context.classify(word)
+        expected.conjugate()
+        assert paradigm.Paradigm.from_verb(verb, roots).expand() == expected.get_table().expand(), word
+
+    (fallen, heissen, lernen, machen) = (paradigm.Paradigm.from_verb(context.classify(word))
+                                         for word in ("fallen", "heißen", "lernen", "machen"))
+    assert fallen.template is heissen.template and lernen.template is machen.template # categories 7c and 7a, and two weak verbs
+    assert fallen.template is not lernen.template
+    assert lernen.get_conjugation_at(v.Tense.PAST, v.Mood.INDICATIVE, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.SINGULAR) == "lerntest"
+    assert lernen.get_conjugation_at(v.Tense.PRESENT, v.Mood.INDICATIVE, v.Aspect.PERFECT, v.Person.FIRST, v.Number.SINGULAR) == "habe gelernt"
+
+    (anfangen, empfangen) = (paradigm.Paradigm.from_verb(context.classify(word), roots) for word in ("anfangen", "empfangen"))
+    assert anfangen.root is not None and anfangen.root is empfangen.root # fangen, shared through <roots>
+
+def test_templates_follow_contexts():
+    '''Tests that the templates of a replaced or cleared context are no longer interned'''
+    context = conjutils.get_context()
+    lernen = context.classify("lernen")
+    lernen.conjugate()
+    template = paradigm.template_of(lernen)
+    assert paradigm.Paradigm.from_verb(lernen).template is template is lernen._template # one template for both
+
+    conjutils.clear_contexts()
+    rebuilt = conjutils.get_context()
+    assert paradigm.template_of(rebuilt.classify("lernen")) is not template
+    assert all(key[1] is not context for key in v._templates)
+
+    conjutils.install_context(context)
+    assert paradigm.template_of(context.classify("lernen")) is not template
+    assert all(key[1] is not rebuilt for key in v._templates)
+    conjutils.clear_contexts()
@@ -0,0 +1,96 @@
+# tests asynchronous conjugation service (service) module
+
+import asyncio
+import json
+import conjutils
+import service
+import verbs as v
+
+
+def test_coalescing():
+    '''Tests that concurrent identical requests share one computation and agree with the conjugator'''
+    async def run():
+        conjugation_service = service.ConjugationService()
+        try:
+            results = await asyncio.gather(*[conjugation_service.conjugate("gehen", tense = v.Tense.PAST) for _ in range(10)])
+            again = await conjugation_service.conjugate("gehen", tense = v.Tense.PAST)
+            return (results, again, conjugation_service.stats())
+        finally:
+            conjugation_service.close()
+
+    (results, again, stats) = asyncio.run(run())
+    assert all(result is results[0] for result in results) and again is results[0]
+    assert (stats["computations"], stats["coalesced"], stats["in_flight"]) == (1, 9, 0)
+    cell = (v.Mood.INDICATIVE, v.Tense.PAST, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    assert results[0][cell] == "ging"
+
+def test_http():
+    '''Tests the HTTP endpoints'''
+    async def get(port, target):
+        (reader, writer) = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+        response = await reader.read()
+        writer.close()
+        (head, body) = response.split(b"\r\n\r\n", 1)
+        return (head.split()[1].decode(), json.loads(body))
+
+    async def run():
+        conjugation_service = service.ConjugationService()
+        server = await conjugation_service.serve(port = 0)
+        port = server.sockets[0].getsockname()[1]
+        async def fail(*args):
+            raise RuntimeError("lexicon unavailable")
+        try:
+            responses = [await get(port, target) for target in
+                         ("/conjugate?infinitive=sehen&tense=past&mood=indicative&aspect=simple&person=third&number=singular",
+                          "/conjugate?infinitive=sehen&tense=someday", "/conjugate", "/health", "/nowhere")]
+            conjugation_service.conjugate = fail
+            return responses + [await get(port, "/conjugate?infinitive=sehen")]
+        finally:
+            server.close()
+            await server.wait_closed()
+            conjugation_service.close()
+
+    (forms, bad_enum, missing, health, nowhere, failed) = asyncio.run(run())
+    assert forms == ("200", {"infinitive" : "sehen", "forms" : {"INDICATIVE.PAST.SIMPLE.THIRD.SINGULAR" : "sah"}})
+    assert bad_enum[0] == missing[0] == "400" and nowhere[0] == "404"
+    assert health == ("200", {"status" : "ok"})
+    assert failed == ("500", {"error" : "RuntimeError: lexicon unavailable"})
+
+def test_start(monkeypatch):
+    '''Tests that concurrent first calls load the context once'''
+    (calls, load) = ([], conjutils.get_context)
+    def get_context():
+        calls.append(None)
+        return load()
+    monkeypatch.setattr(conjutils, "get_context", get_context)
+
+    async def run():
+        conjugation_service = service.ConjugationService()
+        try:
+            await asyncio.gather(*[conjugation_service.start() for _ in range(10)])
+            await conjugation_service.start()
+        finally:
+            conjugation_service.close()
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+def test_warm_up_selection(tmp_path):
+    '''Tests that the warm-up caches the cells the --warm-* options select, for the requests selecting them'''
+    frequencies = tmp_path / "words.csv"
+    frequencies.write_text("haben,10\n", encoding = "utf-8")
+    args = service.parse_args(["--frequencies", str(frequencies), "--warm-tense", "past", "--warm-mood", "indicative"])
+    assert (args.warm_tense, args.warm_mood, args.warm_number) == ((v.Tense.PAST,), (v.Mood.INDICATIVE,), len(v.Number))
+
+    async def run():
+        conjugation_service = service.ConjugationService()
+        try:
+            service.warm_cache(conjugation_service, args).result(timeout = 30)
+            await conjugation_service.conjugate("haben", tense = (v.Tense.PAST,), mood = (v.Mood.INDICATIVE,))
+            return conjugation_service.stats()
+        finally:
+            conjugation_service.close()
+
+    stats = asyncio.run(run())
+    assert (stats["hits"], stats["computations"]) == (1, 0)
@@ -1,11 +1,94 @@
 # test Verb module
 
 import pytest
+import conjutils
 import verbs as v
 
 def test_test():
     assert True == True
 
+def test_table_layout():
+    '''Tests integer table indexing and the compact table of valid cells'''
+    assert v.table_hash(v.Mood.SUBJUNCTIVE_2, v.Tense.FUTURE, v.Aspect.PERFECT, v.Person.THIRD, v.Number.PLURAL) == v.n_entries - 1
+    assert all(v.table_hash(*v.table_unhash(index)) == index for index in range(v.n_entries))
+    assert v.n_valid_entries == 87
+    assert not v.is_none_value(v.Tense.PAST, v.Mood.INDICATIVE, v.Aspect.PERFECT, v.Person.FIRST, v.Number.SINGULAR)
+    assert v.is_none_value(v.Tense.PAST, v.Mood.SUBJUNCTIVE_1, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    assert v.is_none_value(v.Tense.PRESENT, v.Mood.IMPERATIVE, v.Aspect.SIMPLE, v.Person.THIRD, v.Number.SINGULAR)
+
+    table = v.ConjugationTable()
+    index = v.table_hash(v.Mood.INDICATIVE, v.Tense.PRESENT, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    table[index] = "lerne"
+    assert table[index] == "lerne" and len(table) == v.n_entries and table.expand()[index] == "lerne"
+    invalid = v.table_hash(v.Mood.IMPERATIVE, v.Tense.PAST, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR)
+    table[invalid] = ""
+    assert table[invalid] == ""
+    with pytest.raises(IndexError):
+        table[invalid] = "lernte"
+    table.clear()
+    assert table[index] == ""
+
+    verb = v.Weak(infinitive = "lernen")
+    assert not hasattr(verb, "__dict__")
+
+def test_irregular_conjugation():
+    '''Tests the simple tenses of sein, whose subjunctive I is not built from its stem and endings'''
+    context = conjutils.get_context()
+    sein = context.classify("sein")
+    def forms(tense, mood):
+        return [sein.compute_conjugation_at(tense, mood, v.Aspect.SIMPLE, person, number) for number in v.Number for person in v.Person]
+    assert forms(v.Tense.PRESENT, v.Mood.INDICATIVE) == ["bin", "bist", "ist", "sind", "seid", "sind"]
+    assert forms(v.Tense.PAST, v.Mood.INDICATIVE) == ["war", "warst", "war", "waren", "wart", "waren"]
+    assert forms(v.Tense.PRESENT, v.Mood.SUBJUNCTIVE_1) == ["sei", "seiest", "sei", "seien", "seiet", "seien"]
+    assert forms(v.Tense.PAST, v.Mood.SUBJUNCTIVE_2) == ["wäre", "wärest", "wäre", "wären", "wäret", "wären"]
+    assert forms(v.Tense.PRESENT, v.Mood.IMPERATIVE) == ["", "sei", "", "seien", "seid", ""]
+
+    finden = context.classify("finden")
+    assert finden.compute_conjugation_at(v.Tense.PAST, v.Mood.INDICATIVE, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.PLURAL) == "fandet"
+    assert finden.compute_conjugation_at(v.Tense.PRESENT, v.Mood.IMPERATIVE, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.PLURAL) == "findet"
+
+def test_lazy_conjugation():
+    '''Tests that lazy verbs construct and remember only the cells asked for'''
+    past = (v.Tense.PAST, v.Mood.INDICATIVE, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.SINGULAR)
+    eager = v.Weak(infinitive = "lernen")
+    assert eager.get_conjugation_at(*past) == ""
+
+    verb = v.Weak(infinitive = "lernen", lazy = True)
+    assert verb.get_filled() == ()
+    assert verb.get_conjugation_at(*past) == "lerntest"
+    assert verb.get_filled() == (v.table_hash(v.Mood.INDICATIVE, v.Tense.PAST, v.Aspect.SIMPLE, v.Person.SECOND, v.Number.SINGULAR),)
+    assert verb.get_conjugation_at(v.Tense.PAST, v.Mood.SUBJUNCTIVE_1, v.Aspect.SIMPLE, v.Person.FIRST, v.Number.SINGULAR) == ""
+    assert len(verb.get_filled()) == 1 # invalid cells are not filled
+
+    verb.conjugate(tense = v.Tense.PRESENT, mood = v.Mood.INDICATIVE, aspect = v.Aspect.SIMPLE)
+    assert len(verb.get_filled()) == 7
+    verb.clear_table()
+    assert verb.get_filled() == ()
+
+def test_conjugate_all():
+    '''Tests that batch conjugation fills the same tables as conjugating verb by verb'''
+    context = conjutils.get_context()
+    irregular_verbs = conjutils.get_irregular_verbs()
+    words = ["gehen", "lernen", "können", "haben", "sein", "sehen", "bringen", "leben"]
+    def make_verbs():
+        return [conjutils.determine_verb_class(word, conjutils.find_verb_matches(word, irregular_verbs), context) for word in words]
+
+    (single, batch) = (make_verbs(), make_verbs())
+    for verb in single:
+        verb.conjugate()
+    v.conjugate_all(batch)
+    for (a, b) in zip(single, batch):
+        assert a.get_table().expand() == b.get_table().expand()
+        assert a.get_filled() == b.get_filled()
+
+    (single, batch) = (make_verbs(), make_verbs())
+    for verb in single:
+        verb.conjugate(tense = v.Tense.PAST, person = v.Person.SECOND)
+    v.conjugate_all(batch, tense = v.Tense.PAST, person = v.Person.SECOND)
+    for (a, b) in zip(single, batch):
+        assert a.get_table().expand() == b.get_table().expand()
+        assert a.get_filled() == b.get_filled()
+
 
 
 ## TODO:
@@ -21,4 +104,4 @@ def test_test():
 ## 5. test conjugation for Mixed verbs, simple and complex (uses override)
 ##  - preterite-presents too
 ## 6. test conjugation for Strong verbs, simple and complex
-##  - also test out umlauts (happens when 'getting' the conjugation)
\ No newline at end of file
+##  - also test out umlauts (happens when 'getting' the conjugation)
@@ -13,24 +13,26 @@ The Verb class does most of the work in the conjugations.
 A Verb is constructed from the following:
   - Its infinitive
 	- Haben/Sein perfect aspect auxiliary indicator
+	- (Optional) The ConjugationContext (see conjutils) providing its auxiliaries
 	- (Optional) Prefix and whether it is separable
 	- (Optional) Parts to override default values from Verbs dataframe:
             - infinitive : TODO: make as present stem instead?
             - past stem
             - past participle
-            - present endings (for irregular and preterite presents)
+            - present forms (for irregular and preterite presents)
 """
 
-import re
+import functools
+import sys
+import threading
+import types
 from enum import IntEnum
 from typing import Union
 
-# Auxiliary verbs, have partial conjugations: simple present + past indicative or subjunctive only
-# These are preconjugated before conjugating anything (so always available to non-auxiliary Verb __init__)
-# these verbs are distinct from 'generic' verbs, that may happen to be haben, sein, or werden! <-- though won't be grammatically correct...
-Haben = None
-Werden = None
-Sein = None
+
+# version of the conjugation rules: bump it with any change that alters a form, so that
+# conjugations saved by an earlier version (e.g. ConjugationContext.freeze()) are not reused
+RULES_VERSION = 2
 
 # enum classes for easier hash table access.
 class Person(IntEnum):
@@ -59,35 +61,230 @@ class Mood(IntEnum):
                     # past stem subjunctive for future is the conditional
 	
 
-# imperative is present indicative simple only, 2nd person sg/pl or 1st person pl
+# imperative is present simple only, 2nd person sg/pl or 1st person pl
 # subjunctive_1 is future and present only
 # subjunctive_2 is future and past only
 def is_none_value(tense : int, mood : int, aspect : int, person : int, number : int) -> bool:
-	valid_imperative = (tense == Tense.PRESENT) and \
-                       (mood == Mood.IMPERATIVE) and \
-					   (aspect == Aspect.SIMPLE) and \
-					   ((person == Person.SECOND) or (person == Person.FIRST and number == Number.PLURAL))
-	valid_subjunctive = ((mood == Mood.SUBJUNCTIVE_1) and (tense == Tense.PRESENT)) or \
-                        ((mood == Mood.SUBJUNCTIVE_2) and (tense == Tense.PAST)) or \
-						(tense == Tense.FUTURE)
-	return (not valid_imperative) or (not valid_subjunctive)
+	"""Return True if the given cell does not exist in German (always empty in a conjugation table)."""
+	if mood == Mood.IMPERATIVE:
+		valid_imperative = (tense == Tense.PRESENT) and \
+						   (aspect == Aspect.SIMPLE) and \
+						   ((person == Person.SECOND) or (person == Person.FIRST and number == Number.PLURAL))
+		return not valid_imperative
+	if mood == Mood.SUBJUNCTIVE_1 or mood == Mood.SUBJUNCTIVE_2:
+		valid_subjunctive = ((mood == Mood.SUBJUNCTIVE_1) and (tense == Tense.PRESENT)) or \
+							((mood == Mood.SUBJUNCTIVE_2) and (tense == Tense.PAST)) or \
+							(tense == Tense.FUTURE)
+		return not valid_subjunctive
+	return False
 
 # hash function
-# offsets
+# offsets (integer strides)
 n_entries = len(Tense) * len(Mood) * len(Aspect) * len(Person) * len(Number) # 3 * 4 * 2 * 3 * 2 = 144
-MOOD_OFFSET = n_entries / len(Mood) # 144 / 4 = 36
-TENSE_OFFSET = MOOD_OFFSET / len(Tense) # 36 / 3 = 12
-ASPECT_OFFSET = TENSE_OFFSET / len(Aspect) # 12 / 2 = 6
-PERSON_OFFSET = ASPECT_OFFSET / len(Person) # 6 / 3 = 2
-NUMBER_OFFSET = PERSON_OFFSET / len(Number) # 2 / 2 = 1
+MOOD_OFFSET = n_entries // len(Mood) # 144 / 4 = 36
+TENSE_OFFSET = MOOD_OFFSET // len(Tense) # 36 / 3 = 12
+ASPECT_OFFSET = TENSE_OFFSET // len(Aspect) # 12 / 2 = 6
+PERSON_OFFSET = ASPECT_OFFSET // len(Person) # 6 / 3 = 2
+NUMBER_OFFSET = PERSON_OFFSET // len(Number) # 2 / 2 = 1
 
 def table_hash(mood : int, tense : int, aspect : int, person : int, number : int) -> int: 
-	index = (MOOD_OFFSET * mood) + \
+	return (MOOD_OFFSET * mood) + \
 	(TENSE_OFFSET * tense) + \
 	(ASPECT_OFFSET * aspect) + \
 	(PERSON_OFFSET * person) + \
 	(NUMBER_OFFSET * number)
-	return int(index)
+
+def table_unhash(index : int) -> tuple:
+	"""Return the (mood, tense, aspect, person, number) enums of table index <index>, inverse of table_hash()."""
+	(mood, index) = divmod(index, MOOD_OFFSET)
+	(tense, index) = divmod(index, TENSE_OFFSET)
+	(aspect, index) = divmod(index, ASPECT_OFFSET)
+	(person, number) = divmod(index, PERSON_OFFSET)
+	return (Mood(mood), Tense(tense), Aspect(aspect), Person(person), Number(number))
+
+# compact slot of every table index, -1 for the cells ruled out by is_none_value
+CELL_SLOTS = []
+n_valid_entries = 0 # 36 indicative + 3 imperative + 24 + 24 subjunctive = 87
+for index in range(n_entries):
+	(mood, tense, aspect, person, number) = table_unhash(index)
+	if is_none_value(tense, mood, aspect, person, number):
+		CELL_SLOTS.append(-1)
+	else:
+		CELL_SLOTS.append(n_valid_entries)
+		n_valid_entries += 1
+CELL_SLOTS = tuple(CELL_SLOTS)
+del index, mood, tense, aspect, person, number
+
+
+class ConjugationTable:
+	"""
+	Conjugation table storing only the cells that exist.
+
+	Behaves like the n_entries long list indexed by table_hash(), but only keeps the
+	n_valid_entries cells is_none_value() allows; the others always read as "".
+	Stored forms are interned, so identical forms across verbs share one string.
+	The table also tracks which cells have been filled, even with "".
+
+	Methods:
+		clear(self)
+			empty every cell
+		copy(self) -> ConjugationTable
+			get an independent table with the same cells
+		expand(self) -> list
+			get the table as a plain list of n_entries forms
+		is_filled(self, index : int) -> bool
+			check if a cell has been filled
+		filled(self) -> tuple
+			get the indexes of all filled cells
+		set_cells(self, cells)
+			fill every valid cell at once
+	"""
+	__slots__ = ("_cells", "_filled")
+
+	def __init__(self):
+		self._cells = [""] * n_valid_entries
+		self._filled = 0 # bit i set once compact slot i is filled
+
+	def __len__(self) -> int:
+		return n_entries
+
+	def __getitem__(self, index : int) -> str:
+		slot = CELL_SLOTS[index]
+		return self._cells[slot] if slot >= 0 else ""
+
+	def __setitem__(self, index : int, form : str):
+		slot = CELL_SLOTS[index]
+		if slot >= 0:
+			self._cells[slot] = sys.intern(form)
+			self._filled |= 1 << slot
+		elif form:
+			raise IndexError(f"table index {index} is not a valid conjugation cell")
+
+	def __iter__(self):
+		cells = self._cells
+		return (cells[slot] if slot >= 0 else "" for slot in CELL_SLOTS)
+
+	def __repr__(self) -> str:
+		return repr(self.expand())
+
+	def clear(self):
+		"""Empty every cell."""
+		self._cells = [""] * n_valid_entries
+		self._filled = 0
+
+	def copy(self) -> "ConjugationTable":
+		"""Return a new table with the same cells, filled or not, that can be changed independently of this one."""
+		table = ConjugationTable.__new__(ConjugationTable)
+		table._cells = list(self._cells)
+		table._filled = self._filled
+		return table
+
+	def expand(self) -> list:
+		"""Return the table as a plain list indexed by table_hash()."""
+		return list(self)
+
+	def set_cells(self, cells):
+		"""Fill every cell at once from the n_valid_entries forms <cells>, in table order."""
+		self._set_interned([sys.intern(form) for form in cells])
+
+	def _set_interned(self, cells):
+		"""set_cells() for forms the caller has already interned (see conjugate_all())."""
+		cells = list(cells)
+		if len(cells) != n_valid_entries:
+			raise ValueError(f"expected {n_valid_entries} cells, got {len(cells)}")
+		self._cells = cells
+		self._filled = (1 << n_valid_entries) - 1
+
+	def is_filled(self, index : int) -> bool:
+		"""Return True if cell <index> has been filled since construction or the last clear()."""
+		slot = CELL_SLOTS[index]
+		return slot >= 0 and bool(self._filled >> slot & 1)
+
+	def filled(self) -> tuple:
+		"""Return the table indexes of all filled cells, in table order."""
+		return tuple(index for (index, slot) in enumerate(CELL_SLOTS) if slot >= 0 and self._filled >> slot & 1)
+
+
+def get_range(enum_val : Union[IntEnum, tuple], enum_type : IntEnum) -> tuple:
+	"""Return the requested values of <enum_type>: <enum_val> if a tuple, itself if a member, else all of them."""
+	if type(enum_val) is tuple:
+		return enum_val # leave as is
+	if enum_val < len(enum_type):
+		return (enum_type(enum_val),) # singleton
+	return tuple(enum_type) # just do 'em all
+
+@functools.lru_cache(maxsize = 256)
+def cell_indices(tense : Union[Tense, tuple] = len(Tense),
+				 mood : Union[Mood, tuple] = len(Mood),
+				 aspect : Union[Aspect, tuple] = len(Aspect),
+				 person : Union[Person, tuple] = len(Person),
+				 number : Union[Number, tuple] = len(Number)) -> tuple:
+	"""Return the table indexes of the requested cells (see Verb.conjugate()), skipping the is_none_value ones."""
+	indices = []
+	for mood_idx in get_range(mood, Mood):
+		for tense_idx in get_range(tense, Tense):
+			for aspect_idx in get_range(aspect, Aspect):
+				for person_idx in get_range(person, Person):
+					for number_idx in get_range(number, Number):
+						index = table_hash(mood_idx, tense_idx, aspect_idx, person_idx, number_idx)
+						if CELL_SLOTS[index] >= 0:
+							indices.append(index)
+	return tuple(indices)
+
+def add_ending(stem : str, ending : str) -> str:
+	"""
+	Append <ending> to <stem>, merging the e of stems such as 'hatte' with an e-initial ending,
+	and inserting one between a stem ending in d or t and the ending t: 'fand' + 't' -> 'fandet'.
+	"""
+	if stem.endswith("e") and ending.startswith("e"):
+		ending = ending[1:]
+	elif ending == "t" and stem.endswith(("d", "t")):
+		ending = "et"
+	return stem + ending
+
+def present_stem(infinitive : str) -> str:
+	"""Return the stem of <infinitive> without its ending -en or -n: 'geben' -> 'geb', 'sein' -> 'sei'."""
+	return infinitive[:-2] if infinitive.endswith("en") else infinitive[:-1]
+
+NO_OVERRIDES = types.MappingProxyType({}) # overrides of the verbs that have none, shared
+
+# table indexes of the simple present indicative, in the order verbs.txt lists the forms: ich, du, er, wir, ihr, sie
+_PRESENT_CELLS = tuple(table_hash(Mood.INDICATIVE, Tense.PRESENT, Aspect.SIMPLE, person, number)
+					   for number in Number for person in Person)
+
+# forms of irregular verbs that neither their stems and endings nor verbs.txt give, by table index
+_IRREGULAR_FORMS = {
+	"sein" : {table_hash(Mood.SUBJUNCTIVE_1, Tense.PRESENT, Aspect.SIMPLE, Person.FIRST, Number.SINGULAR) : "sei",
+			  table_hash(Mood.SUBJUNCTIVE_1, Tense.PRESENT, Aspect.SIMPLE, Person.THIRD, Number.SINGULAR) : "sei"},
+}
+
+def irregular_overrides(infinitive : str, conjugation : tuple) -> dict:
+	"""
+	Return the overrides (whole forms by table index) of the irregular verb <infinitive>.
+
+	Parameters:
+		infinitive : str --> the verb as listed in verbs.txt
+		conjugation : tuple[str] --> its listed present forms (ich, du, er, wir, ihr, sie), () if there are none
+	"""
+	overrides = dict(zip(_PRESENT_CELLS, conjugation))
+	overrides.update(_IRREGULAR_FORMS.get(infinitive, {}))
+	return overrides if overrides else NO_OVERRIDES
+
+_UMLAUTS = {"a" : "ä", "o" : "ö", "u" : "ü"}
+
+def umlaut(stem : str) -> str:
+	"""Return <stem> with its last vowel umlauted (a, o, u, au), ignoring a final e: 'gab' -> 'gäb', 'hatte' -> 'hätte'."""
+	end = len(stem) - 1 if stem.endswith("e") else len(stem)
+	for i in range(end - 1, -1, -1):
+		char = stem[i]
+		if char in "eiyäöü":
+			break # last vowel cannot take an umlaut
+		if char in _UMLAUTS:
+			if char == "u" and i > 0 and stem[i - 1] == "a":
+				i -= 1 # au -> äu
+				char = "a"
+			return stem[:i] + _UMLAUTS[char] + stem[i + 1:]
+	return stem
 
 
 class Verb:
@@ -111,6 +308,10 @@ class Verb:
 		imperative_stem : str --> a verb's stem for imperative mood
 		subjunctive1_stem : str --> a verb's stem for present-stem-based subjunctive (Konjuktiv I)
 		subjunctive2_stem : str --> a verb's stem for past-stem-based subjunctive (Konjuktiv II)
+
+	The auxiliaries building the perfect and future tenses come from the verb's context, an
+	immutable conjutils.ConjugationContext shared by every verb conjugated with it. Without a
+	context, those tenses are left empty.
 	
 	Methods:
 		conjugate(self, tense : int = len(Tense),
@@ -121,11 +322,19 @@ class Verb:
 			conjugate a verb
 		get_conjugation_at(self, tense : int, mood : int, aspect : int, person : int, number : int) -> str
 			get specified conjugation with specified qualities (index)
+		compute_conjugation_at(self, tense : int, mood : int, aspect : int, person : int, number : int) -> str
+			construct specified conjugation without using the table
 		clear_table(self)
 			clear conjugation table
 		get_table(self)
 			get conjugation table
+		get_filled(self) -> tuple
+			get the table indexes of the conjugations constructed so far
 	"""
+	__slots__ = ("infinitive", "stem", "past_stem", "participle", "imperative_stem",
+				 "subjunctive1_stem", "subjunctive2_stem", "_prefix", "_is_separable",
+				 "_use_haben", "_context", "_perfect_aux", "_overrides", "_root", "_template", "_conjugation_table", "_lazy")
+
 	# static/protected class members --> constant for ALL verbs
 
 	_empty = ["", "", "", "", "", ""]
@@ -133,17 +342,14 @@ class Verb:
 	_past_endings = _empty # dependent on class
 	_subjunctive1_endings = ["e", "est", "e", "en", "et", "en"]
 	_subjunctive2_endings = _empty # dependent on class
-	_imperative_endings = _empty # TODO
-
-	_tense_to_ending = [_present_endings, _past_endings]
-	
-  # set up future auxiliary
-	_future_aux = Werden if Werden is not None else None
+	_imperative_endings = ("", "", "", "en", "t", "") # du, wir, ihr only
 
 	def __init__(self, infinitive : str = "",
                  use_haben : bool = True,
 			     prefix : tuple = ("", False),
-				 parts = {}):
+				 parts = {},
+				 lazy : bool = False,
+				 context = None):
 		"""
 		Construct a Verb object.
 
@@ -152,6 +358,9 @@ class Verb:
 			use_haben (default True) : bool --> indicator if a verb uses haben or sein in perfect aspect
 			prefix (default ("", False)) : tuple --> passed in tuple to indicate prefix portion and whether it is separable
 			parts (default {}) : dict str : str --> passed in parts to override default stems
+			lazy (default False) : bool --> construct each conjugation on its first get_conjugation_at() instead of
+				only through conjugate()
+			context (default None) : ConjugationContext --> provides the preconjugated auxiliaries haben, sein and werden
 		"""
 		# stems
 		self.infinitive = infinitive
@@ -168,16 +377,19 @@ class Verb:
 
     # flags
 		self._use_haben = use_haben
+		self._overrides = NO_OVERRIDES # whole forms of irregular and preterite-present verbs by table index, see irregular_overrides()
+		self._root = None # conjugated Verb of the root a compound's simple forms are built from, see conjutils.construct_verb()
+		self._template = None # ConjugationTemplate of the verb's class, looked up on the first conjugation
 		
     # perfect auxiliary
+		self._context = context
 		self._perfect_aux = None
-		if Haben is not None and self._use_haben == True:
-			self._perfect_aux = Haben
-		elif Sein is not None and self._use_haben == False:
-			self._perfect_aux = Sein
+		if context is not None:
+			self._perfect_aux = context.haben if self._use_haben else context.sein
 
-		# conjugation table
-		self._conjugation_table = ["" for person in range(n_entries)]
+		# conjugation table, allocated when the first conjugation is stored
+		self._conjugation_table = None
+		self._lazy = lazy
 
 	def _get_conjugation(self,
 					    tense : int,
@@ -186,43 +398,46 @@ class Verb:
 						person : int,
 						number : int) -> str:
 		"""Return a fully constructed conjugation for given tense, mood, aspect, person, and number."""
-		# auxiliary = (self._tense_to_auxiliary[tense])[person]
-		# ending = (self._tense_to_ending[tense])[person]
-		conjugation = ""
-		#space = " " if auxiliary != "" else "" # so no space AFTER
-		# if not is_none_value(tense, person):
-		# 	conjugation = self._stems[tense] + ending + space + auxiliary
-
-		# TODO: get pronoun from person + number
-		if aspect == Aspect.SIMPLE:
-			if tense != Tense.FUTURE:
-				# TODO: get conjugation using endings and verb stem, check if seperable
-				pass
-			else:
-				# TODO: get conjugation using werden endings + infinitive
-				pass
-		else:
-			if tense != Tense.FUTURE:
-				# TODO: get conjugation using haben/sein endings + past participle
-				pass
-			else:
-				# TODO: get conjugation using werden endings + past participle + haben/sein infinitive
-				pass
-		
-
-
-		return conjugation
+		return self._construct(table_hash(mood, tense, aspect, person, number))
+
+	def _construct(self, index : int) -> str:
+		"""Return the conjugation at table index <index>, constructed from the recipe of the verb's template."""
+		slot = CELL_SLOTS[index]
+		if slot < 0:
+			return ""
+		template = self._template if self._template is not None else self._get_template()
+		return self._build(template.recipes[slot])
+
+	def _get_template(self):
+		"""Return the ConjugationTemplate of this verb's class, remembering it."""
+		self._template = template_of(self)
+		return self._template
+
+	def _build(self, recipe : tuple) -> str:
+		"""Return the form <recipe> (see ConjugationTemplate) builds from this verb."""
+		op = recipe[0]
+		if op == ENDING:
+			return add_ending(getattr(self, STEMS[recipe[1]]), recipe[2])
+		if op == PERIPHRASIS:
+			return recipe[1] + " " + getattr(self, STEMS[recipe[2]]) + recipe[3]
+		if op == CONSTANT:
+			return recipe[1]
+		if op == CONCAT:
+			return getattr(self, STEMS[recipe[1]]) + recipe[2]
+		if op == OVERRIDE:
+			return self._overrides[recipe[1]]
+		form = self._root._get_cell(recipe[1])
+		if not form:
+			return ""
+		return form + " " + self._prefix if recipe[2] else self._prefix + form
+
+	def _get_future_auxiliary(self, mood : int, person : int, number : int) -> str:
+		"""Return the form of werden building the future tenses of <mood>, "" without a context."""
+		if self._context is None:
+			return ""
+		tense = Tense.PAST if mood == Mood.SUBJUNCTIVE_2 else Tense.PRESENT
+		return self._context.werden.get_conjugation_at(tense, mood, Aspect.SIMPLE, person, number)
 	
-	def _get_range(self, enum_val : Union[Tense, tuple], enum_length : int, enum_type : IntEnum) -> tuple:
-		enum_range = []
-		if type(enum_val) is tuple:
-			enum_range = enum_val # leave as is
-		elif enum_val < enum_length:
-			enum_range.append(enum_type(enum_val)) # append singleton
-		else:
-			enum_range = [enum_type(val) for val in range(len(enum_type))] # just do 'em all
-		return tuple(enum_range)
-
 	
 	def conjugate(self,
 			      tense : Union[Tense, tuple]  = len(Tense),
@@ -242,26 +457,13 @@ class Verb:
 		
 			By default, all parameters are set to having the length of their enumeration as the default unless explicitly
 			defined.
+
+		Lazy verbs need not be conjugated, but may be to prefill many cells in bulk.
 		"""
 
-		# get table ranges
-		mood_range = self._get_range(mood, len(Tense), Tense)
-		aspect_range = self._get_range(aspect, len(Aspect), Aspect)
-		tense_range = self._get_range(tense, len(Tense), Tense)
-		person_range = self._get_range(person, len(Person), Person)
-		number_range = self._get_range(number, len(Number), Number)
-
-		for mood_idx in mood_range:
-			for tense_idx in aspect_range:
-				for aspect_idx in tense_range:
-					for person_idx in person_range:
-						for number_idx in number_range:
-							index = table_hash(mood_idx, tense_idx, aspect_idx, person_idx, number_idx)
-							self._conjugation_table[index] = self._get_conjugation(tense_idx,
-															  					   mood_idx,
-																				   aspect_idx,
-																				   person_idx,
-																				   number_idx)
+		table = self.get_table()
+		for index in cell_indices(tense, mood, aspect, person, number):
+			table[index] = self._construct(index)
 
 	def get_conjugation_at(self,
 						   tense: int,
@@ -269,55 +471,262 @@ class Verb:
 						   aspect: int,
 						   person: int,
 						   number: int) -> str:
-		"""Return a specified conjugation."""
+		"""
+		Return a specified conjugation.
+
+		A lazy verb constructs and stores the conjugation the first time it is asked for;
+		cells that is_none_value() rules out are never constructed.
+		"""
 		
 		valid_cond = (tense >= 0 and tense < len(Tense)) and \
                      (mood >= 0 and mood < len(Mood)) and \
 					 (aspect >= 0 and aspect < len(Aspect)) and \
 			         (person >= 0 and person < len(Person)) and \
 					 (number >= 0 and number < len(Number))
-		return self._conjugation_table[table_hash(tense, mood, aspect, person, number)] if valid_cond else ""
+		if not valid_cond:
+			return ""
+		return self._get_cell(table_hash(mood, tense, aspect, person, number))
+
+	def _get_cell(self, index : int) -> str:
+		"""Return the conjugation at table index <index>, constructing it first if the verb is lazy."""
+		table = self._conjugation_table
+		if self._lazy and CELL_SLOTS[index] >= 0:
+			table = self.get_table()
+			if not table.is_filled(index):
+				table[index] = self._construct(index)
+		return table[index] if table is not None else ""
 	
+	def compute_conjugation_at(self,
+							   tense: int,
+							   mood: int,
+							   aspect: int,
+							   person: int,
+							   number: int) -> str:
+		"""Return a specified conjugation, constructing it without reading or filling the table."""
+		return self._get_conjugation(tense, mood, aspect, person, number)
+
 	def clear_table(self):
 		"""Clear the conjugation table."""
-		for i in range(len(self._conjugation_table)):
-				self._conjugation_table[i] = ""
+		if self._conjugation_table is not None:
+			self._conjugation_table.clear()
 
-	def get_table(self) -> list:
-		"""Retrieve the conjugation hash table."""
+	def get_table(self) -> ConjugationTable:
+		"""Retrieve the conjugation hash table (list-like, indexed by table_hash())."""
+		if self._conjugation_table is None:
+			self._conjugation_table = ConjugationTable()
 		return self._conjugation_table
 	
+	def get_filled(self) -> tuple:
+		"""Return the table indexes of the conjugations constructed so far (by conjugate() or lazily)."""
+		return self._conjugation_table.filled() if self._conjugation_table is not None else ()
+
 	def kind(self) -> str:
 		"""Return type of class as string"""
 		return "Verb"
 	
+# the stems of a verb its cells are built from, in order; recipes refer to them by position
+STEMS = ("infinitive", "stem", "past_stem", "participle", "imperative_stem", "subjunctive1_stem", "subjunctive2_stem")
+_STEM_INDEX = {name : i for (i, name) in enumerate(STEMS)}
+
+# how a cell is built, the first item of each recipe
+CONSTANT = 0 # (CONSTANT, form)
+CONCAT = 1 # (CONCAT, stem index, ending) --> stem + ending
+ENDING = 2 # (ENDING, stem index, ending) --> add_ending(stem, ending)
+OVERRIDE = 3 # (OVERRIDE, table index) --> the verb's override of the cell
+PERIPHRASIS = 4 # (PERIPHRASIS, auxiliary form, stem index, suffix) --> "auxiliary stem" + suffix
+ROOT = 5 # (ROOT, table index, separable) --> the root's form with the verb's prefix
+
+
+class ConjugationTemplate:
+	"""
+	Recipes building every valid cell of one class of verbs from their stems.
+
+	Verbs of the same class, auxiliary (haben/sein), overridden cells and compound kind in the
+	same context differ only in their stems and overriding forms, so the rules of
+	conjugation are worked out once per class, here. Verbs, conjugate_all() and paradigm.Paradigm
+	only apply the recipes to their own stems.
+
+	Attributes:
+		key : tuple --> (Verb class, context, use_haben, overridden table indexes, is compound, is separable)
+		recipes : tuple --> per compact slot (see CELL_SLOTS), how its form is built
+	"""
+	__slots__ = ("key", "recipes")
+
+	def __init__(self, verb : Verb):
+		"""Construct the template of <verb>'s class (see template_of())."""
+		self.key = _template_key(verb)
+		self.recipes = tuple(self._recipe(verb, index) for (index, slot) in enumerate(CELL_SLOTS) if slot >= 0)
+
+	@staticmethod
+	def _recipe(verb : Verb, index : int) -> tuple:
+		"""Return the recipe of valid cell <index> for verbs of <verb>'s class."""
+		(mood, tense, aspect, person, number) = table_unhash(index)
+		ending_idx = (number * len(Person)) + person # endings are ordered ich, du, er, wir, ihr, sie
+
+		# TODO: get pronoun from person + number
+		if aspect == Aspect.SIMPLE and tense != Tense.FUTURE:
+			if verb._root is not None:
+				# compound: the root's form with the prefix glued on, or after it if separable
+				return (ROOT, index, verb._is_separable)
+			if index in verb._overrides:
+				return (OVERRIDE, index) # whole forms, not endings
+			if mood == Mood.IMPERATIVE and person == Person.SECOND and number == Number.PLURAL:
+				# the same as the present: ihr geht --> geht!
+				return ConjugationTemplate._recipe(verb, table_hash(Mood.INDICATIVE, tense, aspect, person, number))
+			if mood == Mood.IMPERATIVE:
+				return (CONCAT, _STEM_INDEX["imperative_stem"], verb._imperative_endings[ending_idx])
+			if mood == Mood.INDICATIVE and tense == Tense.PRESENT:
+				return (ENDING, _STEM_INDEX["stem"], verb._present_endings[ending_idx])
+			if mood == Mood.INDICATIVE:
+				return (ENDING, _STEM_INDEX["past_stem"], verb._past_endings[ending_idx])
+			if mood == Mood.SUBJUNCTIVE_1:
+				return (ENDING, _STEM_INDEX["subjunctive1_stem"], verb._subjunctive1_endings[ending_idx])
+			return (ENDING, _STEM_INDEX["subjunctive2_stem"], verb._subjunctive2_endings[ending_idx])
+
+		if aspect == Aspect.SIMPLE:
+			# werden (würde for subjunctive 2) + infinitive
+			(auxiliary, stem, suffix) = (verb._get_future_auxiliary(mood, person, number), "infinitive", "")
+		elif tense != Tense.FUTURE:
+			# haben/sein in the same tense and mood + past participle
+			auxiliary = verb._perfect_aux.get_conjugation_at(tense, mood, Aspect.SIMPLE, person, number) \
+						if verb._perfect_aux is not None else ""
+			(stem, suffix) = ("participle", "")
+		else:
+			# werden + past participle + haben/sein infinitive
+			auxiliary = verb._get_future_auxiliary(mood, person, number)
+			(stem, suffix) = ("participle", " haben" if verb._use_haben else " sein")
+		if not auxiliary:
+			return (CONSTANT, "")
+		return (PERIPHRASIS, auxiliary, _STEM_INDEX[stem], suffix)
+
+
+def _template_key(verb : Verb) -> tuple:
+	return (type(verb), verb._context, verb._use_haben, tuple(verb._overrides),
+			verb._root is not None, verb._root is not None and verb._is_separable)
+
+_templates = {} # template key : ConjugationTemplate
+_templates_lock = threading.Lock()
+
+def template_of(verb : Verb) -> ConjugationTemplate:
+	"""Return the interned template of <verb>'s class, building it the first time that class is seen."""
+	key = _template_key(verb)
+	template = _templates.get(key)
+	if template is None:
+		with _templates_lock:
+			template = _templates.get(key)
+			if template is None:
+				template = _templates[key] = ConjugationTemplate(verb)
+	return template
+
+def clear_templates(context = None):
+	"""Forget the interned templates of <context> (default those of every context), and with them the context."""
+	with _templates_lock:
+		if context is None:
+			_templates.clear()
+		else:
+			for key in [key for key in _templates if key[1] is context]:
+				del _templates[key]
+
+
+def _add_ending_column(stems : list, ending : str) -> list:
+	"""Return add_ending(stem, <ending>) for every stem of <stems>."""
+	if ending.startswith("e"):
+		tail = ending[1:]
+		return [stem + (tail if stem.endswith("e") else ending) for stem in stems]
+	if ending == "t":
+		return [stem + ("et" if stem.endswith(("d", "t")) else "t") for stem in stems]
+	return [stem + ending for stem in stems]
+
+def _build_column(recipe : tuple, group : list) -> list:
+	"""Return the form <recipe> builds for every verb of <group>, all of one template."""
+	op = recipe[0]
+	if op == ENDING:
+		return _add_ending_column([getattr(verb, STEMS[recipe[1]]) for verb in group], recipe[2])
+	if op == PERIPHRASIS:
+		(prefix, name, suffix) = (recipe[1] + " ", STEMS[recipe[2]], recipe[3])
+		return [prefix + getattr(verb, name) + suffix for verb in group]
+	if op == CONSTANT:
+		return [recipe[1]] * len(group)
+	if op == CONCAT:
+		(name, ending) = (STEMS[recipe[1]], recipe[2])
+		return [getattr(verb, name) + ending for verb in group]
+	if op == OVERRIDE:
+		return [verb._overrides[recipe[1]] for verb in group]
+	return [verb._build(recipe) for verb in group]
+
+def conjugate_all(verbs : list,
+				  tense : Union[Tense, tuple] = len(Tense),
+				  mood : Union[Mood, tuple] = len(Mood),
+				  aspect : Union[Aspect, tuple] = len(Aspect),
+				  person : Union[Person, tuple] = len(Person),
+				  number : Union[Number, tuple] = len(Number)):
+	"""
+	Conjugate every verb in <verbs> at once, filling the same tables as calling conjugate() on each.
+
+	Verbs are grouped by ConjugationTemplate, then each requested cell is constructed for a
+	whole group at a time from its one recipe: its ending is broadcast over the group's stems,
+	and periphrastic cells broadcast the one shared auxiliary form over the group's participles
+	or infinitives. Cells sharing a recipe (er/ihr present, wir/sie, ...) share one column, built
+	and interned once. Compounds read their simple cells off their already conjugated roots.
+	Parameters are those of Verb.conjugate().
+
+	Every cell is still one string per verb, so this is about 2-3x the throughput of conjugating
+	verb by verb (see benchmarks/bench_batch.py), not orders of magnitude.
+	"""
+	indices = cell_indices(tense, mood, aspect, person, number)
+	groups = {}
+	for verb in verbs:
+		template = verb._template if verb._template is not None else verb._get_template()
+		groups.setdefault(template, []).append(verb)
+
+	for (template, group) in groups.items():
+		built = {} # recipe : its interned column
+		columns = {}
+		for index in indices:
+			recipe = template.recipes[CELL_SLOTS[index]]
+			column = built.get(recipe)
+			if column is None:
+				column = built[recipe] = list(map(sys.intern, _build_column(recipe, group)))
+			columns[index] = column
+		if len(indices) == n_valid_entries:
+			for (verb, cells) in zip(group, zip(*columns.values())):
+				verb.get_table()._set_interned(cells)
+		else:
+			for (i, verb) in enumerate(group):
+				table = verb.get_table()
+				for (index, column) in columns.items():
+					table[index] = column[i]
+
+
 class Strong(Verb):
 	"""Class for strong verbs"""
+	__slots__ = ()
 
 	# verb class specific endings:
 	# conjugations use same endings as present-tense moods, though there is ablaut in stems.
-	_past_endings = ("", "st", "", "en", "et", "en")
+	_past_endings = ("", "st", "", "en", "t", "en")
 	_subjunctive2_endings = ("e", "est", "e", "en", "et", "en")
 
 	def __init__(self, infinitive : str = "",
                  use_haben : bool = True,
 			     prefix : tuple = ("", False),
-				 parts = {}):
-		super().__init__(infinitive, use_haben, prefix, parts)
+				 parts = {},
+				 lazy : bool = False,
+				 context = None):
+		super().__init__(infinitive, use_haben, prefix, parts, lazy, context)
 		
         # get stems. they are non-derivable.
 		if len(parts) > 0:
-			self.stem = parts["present"][:-2] # remove the [ei]n
+			self.stem = present_stem(parts["present"])
 			self.past_stem = parts["past"]
 			self.participle = parts["participle"]
-			if len(parts["conjugation"]) > 0:
-				self._present_endings = parts["conjugation"]
+			self._overrides = irregular_overrides(parts["present"], parts["conjugation"])
 			
 		self.subjunctive1_stem = self.stem
-		self.subjunctive2_stem = self.past_stem
+		self.subjunctive2_stem = umlaut(self.past_stem)
 		self.imperative_stem = self.stem
 		
-        # TODO: account for umlauts
+        # TODO: account for umlauts in the present tense
 
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -325,16 +734,19 @@ class Strong(Verb):
 	
 class Weak(Verb):
 	"""Class for weak verbs"""
+	__slots__ = ()
 
 	# verb class specific endings:
-	_past_endings = ("te, test", "te", "ten", "tet", "ten")
+	_past_endings = ("te", "test", "te", "ten", "tet", "ten")
 	_subjunctive2_endings = _past_endings
 
 	def __init__(self, infinitive : str = "",
                  use_haben : bool = True,
 			     prefix : tuple = ("", False),
-				 parts = {}):
-		super().__init__(infinitive, use_haben, prefix, parts)
+				 parts = {},
+				 lazy : bool = False,
+				 context = None):
+		super().__init__(infinitive, use_haben, prefix, parts, lazy, context)
 		
         # derive stems
 		self.stem = self.infinitive[:-2] # TODO: not always last 2
@@ -352,24 +764,26 @@ class Weak(Verb):
 	
 class Mixed(Verb):
 	"""Class for mixed and preterite present verbs"""
+	__slots__ = ()
 
 	# verb class specific endings:
-	_past_endings = ("te, test", "te", "ten", "tet", "ten")
+	_past_endings = ("te", "test", "te", "ten", "tet", "ten")
 	_subjunctive2_endings = _past_endings
 
 	def __init__(self, infinitive : str = "",
                  use_haben : bool = True,
 			     prefix : tuple = ("", False),
-				 parts = {}):
-		super().__init__(infinitive, use_haben, prefix, parts)
+				 parts = {},
+				 lazy : bool = False,
+				 context = None):
+		super().__init__(infinitive, use_haben, prefix, parts, lazy, context)
 		
         # get stems. they are non-derivable.
 		if len(parts) > 0:
-			self.stem = parts["present"][:-2] # remove the [ei]n
+			self.stem = present_stem(parts["present"])
 			self.past_stem = parts["past"]
 			self.participle = parts["participle"]
-			if len(parts["conjugation"]) > 0:
-				self._present_endings = parts["conjugation"]
+			self._overrides = irregular_overrides(parts["present"], parts["conjugation"])
 			
 		self.subjunctive1_stem = self.stem
 		self.subjunctive2_stem = self.past_stem